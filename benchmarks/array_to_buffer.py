@@ -0,0 +1,65 @@
+"""Allocations and bytes copied by array_to_buffer, the conversion of every array sent to the frontend.
+
+The arrays that are already C-contiguous with a dtype the frontend supports must be sent without copy,
+the others must be converted with a single copy of the converted size.
+The script exits with an error when a case allocates more than expected.
+
+    python benchmarks/array_to_buffer.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ipywebgl.arraybuffer import array_to_buffer
+
+
+# the metadata dict and the memoryview, whatever the size of the array
+OVERHEAD_BYTES = 4096
+
+SIZE = 4 * 1024 * 1024
+
+
+def cases():
+    """yield the name of the case, the array and the number of bytes the conversion must copy"""
+    vertices = np.random.rand(SIZE // 12, 3).astype(np.float32)
+    yield 'float32 contiguous', vertices, 0
+    yield 'float32 reshaped view', vertices.reshape(-1), 0
+    yield 'bool mask', np.zeros(SIZE, dtype=np.bool_), 0
+    yield 'uint8 texture', np.zeros((1024, 1024, 4), dtype=np.uint8), 0
+    yield 'float32 transposed', vertices.T, vertices.nbytes
+    yield 'float32 strided', vertices[::2], vertices[::2].nbytes
+    yield 'int64 indices', np.arange(SIZE // 8, dtype=np.int64), SIZE // 2
+    yield 'uint64 indices', np.arange(SIZE // 8, dtype=np.uint64), SIZE // 2
+    yield 'float16 normals', np.zeros(SIZE // 2, dtype=np.float16), SIZE * 2
+
+
+def measure(array):
+    """return the bytes allocated while converting, the bytes that do not share the array memory and the time in seconds"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    meta_data, buffer = array_to_buffer(array)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    copied = 0 if np.shares_memory(np.frombuffer(buffer, dtype=np.uint8), array) else buffer.nbytes
+    return peak, copied, elapsed
+
+
+def main() -> int:
+    failures = 0
+    print(f"{'case':<24}{'allocated':>14}{'copied':>14}{'expected':>14}{'ms':>10}")
+    for name, array, expected in cases():
+        allocated, copied, elapsed = measure(array)
+        ok = copied == expected and allocated <= expected + OVERHEAD_BYTES
+        failures += not ok
+        print(f"{name:<24}{allocated:>14}{copied:>14}{expected:>14}{elapsed * 1000:>10.3f}{'' if ok else '  REGRESSION'}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Size and encoding time of the commands sent by execute_commands, as JSON and as binary commands.
+
+Three encodings of the same frame are compared:
+    json          the list of dicts sent when binary_commands is False
+    binary names  the binary stream with the command names and enums as strings of the names table
+    binary codes  the binary stream with the command names and enums as integer codes (the current encoding)
+
+The binary encodings pack each command in a single struct call, they must be faster than json.
+
+    python benchmarks/command_encoding.py [draws]
+"""
+import json
+import os
+import sys
+import time
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ipywebgl import CommandBuffer, GLViewer
+from ipywebgl import commandencoder
+from ipywebgl.commandencoder import encode_commands
+
+
+REPEAT = 5
+
+
+def record_frame(viewer, draws:int) -> list:
+    """the commands of a frame that draws the same mesh many times with a world matrix and a color per draw"""
+    program = viewer.create_program()
+    vao = viewer.create_vertex_array()
+    textures = viewer.create_textures(4)
+    viewer.clear_commands()
+
+    frame = CommandBuffer(viewer)
+    frame.viewport(0, 0, 640, 480)
+    frame.clear_color(0, 0, 0, 1)
+    frame.clear()
+    frame.enable(depth_test=True)
+    frame.use_program(program)
+    for i in range(draws):
+        frame.active_texture(0)
+        frame.bind_texture('TEXTURE_2D', textures[i % len(textures)])
+        frame.uniform_matrix('u_world', np.eye(4, dtype=np.float32))
+        frame.uniform('u_color', np.ones(4, dtype=np.float32))
+        frame.bind_vertex_array(vao)
+        frame.draw_elements('TRIANGLES', 36, 'UNSIGNED_SHORT', 0)
+    return frame._commands
+
+
+def measure(encode) -> tuple:
+    """return the size in bytes of the message and the best encoding time in seconds"""
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        size = encode()
+        best = min(best, time.perf_counter() - start)
+    return size, best
+
+
+def encode_json(commands) -> int:
+    return len(json.dumps(commands).encode())
+
+
+def encode_binary(commands) -> int:
+    keys, names, stream = encode_commands(commands)
+    return len(stream) + len(json.dumps([keys, names]).encode())
+
+
+def encode_binary_names(commands) -> int:
+    # the binary encoding before the integer codes, every string goes in the names table
+    with mock.patch.dict(commandencoder.COMMAND_CODES, clear=True), mock.patch.dict(commandencoder.ENUM_CODES, clear=True):
+        return encode_binary(commands)
+
+
+def main():
+    draws = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    commands = record_frame(GLViewer(), draws)
+    print(f'{len(commands)} commands, {draws} draws')
+    print(f"{'encoding':<16}{'bytes':>12}{'ms':>10}")
+    for name, encode in (('json', encode_json), ('binary names', encode_binary_names), ('binary codes', encode_binary)):
+        size, elapsed = measure(lambda: encode(commands))
+        print(f'{name:<16}{size:>12}{elapsed * 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
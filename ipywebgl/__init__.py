@@ -1,4 +1,11 @@
 from .glviewer import GLViewer
+from .commandbuffer import CommandBuffer
+from .bufferpool import BufferPool, MeshPool
+from .dynamicbuffer import DynamicBuffer
+from .streamtexture import StreamTexture
+from .compressedtexture import CompressedTexture
+from .drawqueue import DrawQueue
+from .instancing import InstancedMesh, InstanceBatcher
 
 def _jupyter_labextension_paths():
     """Called by Jupyter Lab Server to detect if it is a valid labextension and
@@ -1,17 +1,26 @@
-import numpy as np 
+import numpy as np
+
+# dtypes that have no TypedArray counterpart JavaScript side, and what we convert them to
+_FRONTEND_DTYPES = {
+    np.dtype(np.int64): np.dtype(np.int32),
+    np.dtype(np.uint64): np.dtype(np.uint32),
+    np.dtype(np.float16): np.dtype(np.float32),
+}
 
 def array_to_buffer(ar):
-    """Turn a NumPy array into a binary buffer."""
-    # Unsupported int64 array JavaScript side
-    if ar.dtype == np.int64:
-        ar = ar.astype(np.int32)
+    """Turn a NumPy array into a binary buffer.
 
-    # Unsupported float16 array JavaScript side
-    if ar.dtype == np.float16:
-        ar = ar.astype(np.float32)
+    No copy is made when the array is already C-contiguous with a dtype the frontend supports,
+    the returned memoryview is a flat view on the array memory.
+    This also means the data is read when the commands are sent, not when this function is called.
+    """
+    # bool has the same layout as uint8, a view is enough
+    if ar.dtype == np.bool_:
+        ar = ar.view(np.uint8)
 
-    # make sure it's contiguous
-    if not ar.flags["C_CONTIGUOUS"]:
-        ar = np.ascontiguousarray(ar)
+    # convert the unsupported dtypes and make sure it's contiguous, in a single copy if one is needed
+    dtype = _FRONTEND_DTYPES.get(ar.dtype, ar.dtype)
+    if dtype != ar.dtype or not ar.flags["C_CONTIGUOUS"]:
+        ar = np.ascontiguousarray(ar, dtype=dtype)
 
-    return {"shape": list(ar.shape), "dtype": str(ar.dtype)}, memoryview(ar.flatten())
+    return {"shape": list(ar.shape), "dtype": str(ar.dtype)}, memoryview(ar.reshape(-1))
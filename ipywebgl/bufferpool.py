@@ -0,0 +1,416 @@
+import numpy as np
+
+from .glresource import GLResourceWidget
+
+
+_ATTRIBUTE_SIZES = {'i8':1, 'i16':2, 'i32':4, 'u8':1, 'u16':2, 'u32':4, 'f16':2, 'f32':4, 'mat4':16}
+
+
+def layout_stride(layout:str) -> int:
+    """return the size in bytes of a vertex described by a layout string of create_vertex_array_ext ("3f32 3f32", "1mat4:1", ...)"""
+    stride = 0
+    for description in layout.split():
+        size = description[0]
+        attribtype = description[1:].split(':')[0]
+        if size not in ['1', '2', '3', '4']:
+            raise AttributeError("Invalid attribute size")
+        if attribtype not in _ATTRIBUTE_SIZES:
+            raise AttributeError("Invalid attribute type")
+        if attribtype == 'mat4':
+            stride += 64
+        else:
+            stride += int(size) * _ATTRIBUTE_SIZES[attribtype]
+    return stride
+
+
+class BufferAllocation:
+    """A range of elements allocated in a BufferPool.
+
+    The range can move when the pool is compacted or grown, always read first when recording the draw commands.
+
+    Attributes:
+        pool (BufferPool): the pool the range is allocated in.
+        first (int): the index of the first element in the buffer of the pool.
+        count (int): the number of elements.
+    """
+    __slots__ = ('pool', 'first', 'count')
+
+    def __init__(self, pool, first:int, count:int):
+        self.pool = pool
+        self.first = first
+        self.count = count
+
+    @property
+    def buffer(self) -> GLResourceWidget:
+        """the buffer resource the range is allocated in"""
+        return self.pool.buffer
+
+    @property
+    def byte_offset(self) -> int:
+        """the offset in bytes of the range in the buffer"""
+        return self.first * self.pool.stride
+
+    @property
+    def byte_size(self) -> int:
+        """the size in bytes of the range"""
+        return self.count * self.pool.stride
+
+    def __repr__(self):
+        return f'BufferAllocation(first={self.first}, count={self.count})'
+
+
+class BufferPool:
+    """Sub allocate many arrays in one large GL buffer.
+
+    The pool is split in elements of stride bytes (a vertex, an index), the arrays are allocated as ranges of elements with a first fit.
+    When there is no free range large enough, the pool is compacted into a new larger buffer.
+    The buffer is created on its target (WebGL2 does not allow to use an index buffer as a vertex buffer and the opposite),
+    then the uploads and copies go through the COPY_WRITE_BUFFER and COPY_READ_BUFFER targets, so they do not change the bound vertex array.
+
+    All the commands are recorded on the viewer, they are sent with the next execute_commands.
+    When the buffer is replaced (compact or grow), the listeners are called so they can rebuild what uses the buffer (vertex arrays).
+
+    Attributes:
+        buffer (GLResourceWidget): the buffer resource holding all the ranges.
+        stride (int): the size in bytes of an element.
+        capacity (int): the number of elements of the buffer.
+    """
+
+    def __init__(self, viewer, stride:int, capacity:int=65536, target='ARRAY_BUFFER', usage='STATIC_DRAW'):
+        if target not in ['ARRAY_BUFFER', 'ELEMENT_ARRAY_BUFFER']:
+            raise AttributeError("Invalid target")
+        self._viewer = viewer
+        self.stride = stride
+        self.capacity = capacity
+        self.target = target
+        self.usage = usage
+        self.buffer = self._create_buffer(capacity)
+        self._allocations = set()
+        # the free ranges as sorted (first, count)
+        self._free = [(0, capacity)]
+        self._listeners = []
+
+
+    def _create_buffer(self, capacity:int) -> GLResourceWidget:
+        """record the creation of an uninitialized buffer of capacity elements"""
+        viewer = self._viewer
+        buffer = viewer.create_buffer()
+        if self.target == 'ELEMENT_ARRAY_BUFFER':
+            # the element array binding is part of the vertex array state
+            viewer.bind_vertex_array(None)
+        viewer.bind_buffer(self.target, buffer)
+        viewer.buffer_data(self.target, usage=self.usage, update_info=True, size=capacity * self.stride)
+        viewer.bind_buffer(self.target, None)
+        return buffer
+
+
+    def add_listener(self, callback):
+        """Call callback(pool) every time the buffer of the pool is replaced or its ranges moved.
+
+        Args:
+            callback (function): the function to call
+        """
+        self._listeners.append(callback)
+
+
+    @property
+    def used(self) -> int:
+        """the number of elements allocated"""
+        return sum(allocation.count for allocation in self._allocations)
+
+
+    @property
+    def fragmentation(self) -> float:
+        """the part of the free elements that are not at the end of the buffer, compact the pool when it gets high"""
+        free = self.capacity - self.used
+        if free == 0:
+            return 0.0
+        tail = self._free[-1][1] if self._free and sum(self._free[-1]) == self.capacity else 0
+        return 1.0 - tail / free
+
+
+    def allocate(self, data:np.ndarray) -> BufferAllocation:
+        """Allocate a range for the data and record its upload.
+
+        Args:
+            data (np.ndarray): the data, its size in bytes must be a multiple of the stride
+
+        Returns:
+            BufferAllocation: the allocated range
+        """
+        data = np.asarray(data)
+        if data.nbytes % self.stride != 0:
+            raise AttributeError(f"Invalid data, its size must be a multiple of the stride ({self.stride} bytes)")
+        allocation = self.reserve(data.nbytes // self.stride)
+        self.write(allocation, data)
+        return allocation
+
+
+    def reserve(self, count:int) -> BufferAllocation:
+        """Allocate a range of count elements without uploading anything.
+
+        Args:
+            count (int): the number of elements
+
+        Returns:
+            BufferAllocation: the allocated range
+        """
+        index = self._find_free(count)
+        if index is None:
+            self.compact(max(self.capacity * 2, self.used + count))
+            index = self._find_free(count)
+
+        first, free_count = self._free[index]
+        if free_count == count:
+            del self._free[index]
+        else:
+            self._free[index] = (first + count, free_count - count)
+
+        allocation = BufferAllocation(self, first, count)
+        self._allocations.add(allocation)
+        return allocation
+
+
+    def write(self, allocation:BufferAllocation, data:np.ndarray, first:int=0):
+        """Record the upload of data in a range.
+
+        Args:
+            allocation (BufferAllocation): the range
+            data (np.ndarray): the data
+            first (int, optional): the element of the range where the data starts. Defaults to 0.
+        """
+        if first * self.stride + np.asarray(data).nbytes > allocation.byte_size:
+            raise AttributeError("Invalid data, it does not fit in the allocation")
+        viewer = self._viewer
+        viewer.bind_buffer('COPY_WRITE_BUFFER', self.buffer)
+        viewer.buffer_sub_data('COPY_WRITE_BUFFER', (allocation.first + first) * self.stride, data)
+        viewer.bind_buffer('COPY_WRITE_BUFFER', None)
+
+
+    def free(self, allocation:BufferAllocation):
+        """Release a range, its elements can be reused by the next allocations.
+
+        Args:
+            allocation (BufferAllocation): the range
+        """
+        if allocation not in self._allocations:
+            raise AttributeError("Invalid allocation, it is not used by this pool")
+        self._allocations.remove(allocation)
+
+        # insert the range and merge it with its free neighbours
+        first, count = allocation.first, allocation.count
+        index = 0
+        while index < len(self._free) and self._free[index][0] < first:
+            index += 1
+        if index < len(self._free) and first + count == self._free[index][0]:
+            count += self._free[index][1]
+            del self._free[index]
+        if index > 0 and sum(self._free[index - 1]) == first:
+            first = self._free[index - 1][0]
+            count += self._free[index - 1][1]
+            index -= 1
+            del self._free[index]
+        self._free.insert(index, (first, count))
+
+
+    def compact(self, capacity:int=None):
+        """Pack all the ranges at the start of a new buffer, with a gpu copy, and delete the previous buffer.
+
+        The ranges keep their order, their first element changes.
+        The listeners are called once the commands are recorded.
+
+        Args:
+            capacity (int, optional): the number of elements of the new buffer. Defaults to the current capacity.
+        """
+        if capacity is None:
+            capacity = self.capacity
+        if capacity < self.used:
+            raise AttributeError("Invalid capacity, the allocated ranges do not fit")
+
+        viewer = self._viewer
+        previous = self.buffer
+        self.buffer = self._create_buffer(capacity)
+        viewer.bind_buffer('COPY_READ_BUFFER', previous)
+        viewer.bind_buffer('COPY_WRITE_BUFFER', self.buffer)
+
+        # copy the contiguous ranges with one command
+        first = 0
+        run = None
+        for allocation in sorted(self._allocations, key=lambda allocation: allocation.first):
+            if run is not None and run[0] + run[2] == allocation.first:
+                run[2] += allocation.count
+            else:
+                if run is not None:
+                    self._copy_run(run)
+                run = [allocation.first, first, allocation.count]
+            allocation.first = first
+            first += allocation.count
+        if run is not None:
+            self._copy_run(run)
+
+        viewer.bind_buffer('COPY_READ_BUFFER', None)
+        viewer.bind_buffer('COPY_WRITE_BUFFER', None)
+        viewer.delete_buffer(previous)
+
+        self.capacity = capacity
+        self._free = [(first, capacity - first)] if first < capacity else []
+        for callback in self._listeners:
+            callback(self)
+
+
+    def _copy_run(self, run):
+        """record the copy of a run (read first, write first, count)"""
+        self._viewer.copy_buffer_sub_data('COPY_READ_BUFFER', 'COPY_WRITE_BUFFER', run[0] * self.stride, run[1] * self.stride, run[2] * self.stride)
+
+
+    def _find_free(self, count:int):
+        """return the index of the first free range large enough, None if there is none"""
+        for index, (_, free_count) in enumerate(self._free):
+            if free_count >= count:
+                return index
+        return None
+
+
+class Mesh:
+    """A mesh packed in a MeshPool.
+
+    Attributes:
+        vertices (BufferAllocation): the range of the vertices.
+        indices (BufferAllocation): the range of the indices, None for a non indexed mesh.
+    """
+    __slots__ = ('vertices', 'indices', '_indices')
+
+    def __init__(self, vertices:BufferAllocation, indices:BufferAllocation=None, indices_data:np.ndarray=None):
+        self.vertices = vertices
+        self.indices = indices
+        self._indices = indices_data
+
+    def __repr__(self):
+        return f'Mesh(vertices={self.vertices!r}, indices={self.indices!r})'
+
+
+class MeshPool:
+    """Pack many meshes with the same vertex layout in one vertex buffer and one index buffer, drawn with a single vertex array.
+
+    WebGL2 has no base vertex for the indexed draws, so the indices are stored as u32 already offset by the first vertex of the mesh.
+    The pool keeps a copy of the indices, to offset them again when the vertices move.
+
+    All the commands are recorded on the viewer, execute them once (execute_commands(execute_once=True)) before drawing.
+    The vertex array is replaced when a buffer is compacted or grown, record the draw commands after the changes.
+
+    Example:
+        >>> pool = ipywebgl.MeshPool(w, program, '3f32 3f32', ['in_vert', 'in_normal'])
+        >>> meshes = [pool.add(mesh.vertices, mesh.indices) for mesh in scene]
+        >>> w.execute_commands(execute_once=True)
+        >>> w.use_program(program)
+        >>> pool.bind()
+        >>> for mesh in meshes:
+        ...     pool.draw(mesh)
+        >>> w.execute_commands()
+
+    Attributes:
+        vertices (BufferPool): the pool of the vertices.
+        indices (BufferPool): the pool of the indices.
+        vao (GLResourceWidget): the vertex array binding both buffers.
+    """
+
+    def __init__(self, viewer, program:GLResourceWidget, layout:str, attributes, vertex_capacity:int=65536, index_capacity:int=196608, usage='STATIC_DRAW'):
+        self._viewer = viewer
+        self._program = program
+        self._layout = layout
+        self._attributes = list(attributes)
+        self._meshes = set()
+        self.vertices = BufferPool(viewer, layout_stride(layout), vertex_capacity, 'ARRAY_BUFFER', usage)
+        self.indices = BufferPool(viewer, 4, index_capacity, 'ELEMENT_ARRAY_BUFFER', usage)
+        self.vao = None
+        self._build_vertex_array()
+        self.vertices.add_listener(self._vertices_moved)
+        self.indices.add_listener(self._indices_moved)
+
+
+    def _build_vertex_array(self):
+        """record a new vertex array on the current buffers, and delete the previous one"""
+        viewer = self._viewer
+        if self.vao is not None:
+            viewer.delete_vertex_array(self.vao)
+        self.vao = viewer.create_vertex_array_ext(self._program, [(self.vertices.buffer, self._layout, *self._attributes)], auto_execute=False)
+        viewer.bind_vertex_array(self.vao)
+        viewer.bind_buffer('ELEMENT_ARRAY_BUFFER', self.indices.buffer)
+        viewer.bind_vertex_array(None)
+
+
+    def _vertices_moved(self, pool):
+        # the indices are offset by the first vertex, they must be uploaded again
+        for mesh in self._meshes:
+            if mesh.indices is not None:
+                self.indices.write(mesh.indices, mesh._indices + np.uint32(mesh.vertices.first))
+        self._build_vertex_array()
+
+
+    def _indices_moved(self, pool):
+        self._build_vertex_array()
+
+
+    def add(self, vertices:np.ndarray, indices:np.ndarray=None) -> Mesh:
+        """Pack a mesh in the pool.
+
+        Args:
+            vertices (np.ndarray): the interleaved vertices, its size must be a multiple of the vertex size
+            indices (np.ndarray, optional): the indices of the mesh, relative to its first vertex. Defaults to None.
+
+        Returns:
+            Mesh: the mesh handle, to draw it or remove it
+        """
+        vertex_range = self.vertices.allocate(vertices)
+        mesh = Mesh(vertex_range)
+        if indices is not None:
+            mesh._indices = np.ascontiguousarray(indices, dtype=np.uint32).reshape(-1)
+            mesh.indices = self.indices.reserve(mesh._indices.size)
+            # the index range can grow the indices pool, write it after the reserve
+            self.indices.write(mesh.indices, mesh._indices + np.uint32(mesh.vertices.first))
+        self._meshes.add(mesh)
+        return mesh
+
+
+    def remove(self, mesh:Mesh):
+        """Release the ranges of a mesh.
+
+        Args:
+            mesh (Mesh): the mesh to remove
+        """
+        self._meshes.remove(mesh)
+        self.vertices.free(mesh.vertices)
+        if mesh.indices is not None:
+            self.indices.free(mesh.indices)
+
+
+    def compact(self):
+        """Pack the vertices and the indices at the start of their buffers, this rebuilds the vertex array."""
+        self.vertices.compact()
+        self.indices.compact()
+
+
+    def bind(self):
+        """Append the bindVertexArray command of the pool vertex array."""
+        self._viewer.bind_vertex_array(self.vao)
+
+
+    def draw(self, mesh:Mesh, mode='TRIANGLES', instance_count:int=None):
+        """Append the draw command of a mesh, the vertex array of the pool must be bound.
+
+        Args:
+            mesh (Mesh): the mesh to draw
+            mode (str, optional): the type of primitives. Defaults to 'TRIANGLES'.
+            instance_count (int, optional): the number of instances, None for a non instanced draw. Defaults to None.
+        """
+        viewer = self._viewer
+        if mesh.indices is not None:
+            if instance_count is None:
+                viewer.draw_elements(mode, mesh.indices.count, 'UNSIGNED_INT', mesh.indices.byte_offset)
+            else:
+                viewer.draw_elements_instanced(mode, mesh.indices.count, 'UNSIGNED_INT', mesh.indices.byte_offset, instance_count)
+        else:
+            if instance_count is None:
+                viewer.draw_arrays(mode, mesh.vertices.first, mesh.vertices.count)
+            else:
+                viewer.draw_arrays_instanced(mode, mesh.vertices.first, mesh.vertices.count, instance_count)
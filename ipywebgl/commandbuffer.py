@@ -0,0 +1,151 @@
+import numpy as np
+
+from .arraybuffer import array_to_buffer
+from .glcommands import GLCommands
+
+
+class CommandBuffer(GLCommands):
+    """A commands buffer recorded once and executed many times on a GLViewer.
+
+    It records the same commands as the GLViewer, but it is not cleared when it is executed.
+    The values that change between the executions (uniforms, instance counts, ...) can be patched in place,
+    so an animation loop does not have to rebuild the whole commands buffer every frame.
+
+    The arrays are sent without copy, so modifying in place an array that was recorded is also picked up on the next execution,
+    as long as it was already contiguous and of a dtype supported by the frontend.
+
+    The resources are created on the viewer, it is better to create them and fill them on the viewer directly
+    and to only record the commands that are replayed in the CommandBuffer.
+    A CommandBuffer cannot execute the commands of the _ext methods on its own, they must be called with auto_execute=False
+    (an AttributeError is raised otherwise), their commands stay in the CommandBuffer and are sent with it
+    (use split_setup so they are only executed once).
+
+    Example:
+        >>> buffer = ipywebgl.CommandBuffer(w)
+        >>> buffer.clear()
+        >>> buffer.use_program(program)
+        >>> buffer.uniform_matrix('u_world', world)
+        >>> buffer.mark('world')
+        >>> buffer.bind_vertex_array(vao)
+        >>> buffer.draw_arrays_instanced('TRIANGLES', 0, 36, 10)
+        >>> buffer.mark('draw')
+        >>> buffer.execute_commands()
+        >>> buffer.set_array('world', new_world)
+        >>> buffer.patch('draw', instance_count=20)
+        >>> buffer.execute_commands()
+    """
+
+    def __init__(self, viewer):
+        self._viewer = viewer
+        self._commands = []
+        self._buffers = []
+        self._marks = {}
+
+
+    @property
+    def viewer(self):
+        """the GLViewer the commands are executed on"""
+        return self._viewer
+
+
+    def _create_resource(self, kind:str):
+        """the resources are owned by the viewer"""
+        return self._viewer._create_resource(kind)
+
+
+    def _release_resource(self, resource, command:str):
+        """the resources are owned by the viewer"""
+        self._viewer._release_resource(resource, command)
+
+
+    def _uniform_location(self, name:str) -> int:
+        """the uniform ids are owned by the viewer"""
+        return self._viewer._uniform_location(name)
+
+
+    def _create_request(self):
+        """the requests are answered to the viewer"""
+        return self._viewer._create_request()
+
+
+    def _auto_execute(self):
+        """executing here would send everything recorded so far and keep it, the commands are sent with the buffer"""
+        raise AttributeError("Invalid auto_execute, the _ext methods of a CommandBuffer must be called with auto_execute=False")
+
+
+    def __len__(self):
+        return len(self._commands)
+
+
+    def mark(self, name:str):
+        """Give a name to the last recorded command, so it can be patched later.
+
+        Args:
+            name (str): the name of the command
+        """
+        if not self._commands:
+            raise Exception('no command to mark, the commands buffer is empty')
+        self._marks[name] = len(self._commands) - 1
+
+
+    def _marked_command(self, name:str):
+        """return the command marked with that name"""
+        if name not in self._marks:
+            raise AttributeError(f"Invalid mark {name}")
+        return self._commands[self._marks[name]]
+
+
+    def patch(self, name:str, **values):
+        """Change some values of a marked command, for the next executions.
+
+        Args:
+            name (str): the name of the marked command
+            **values: the values to change, using the names of the command dict (count, instance_count, offset, ...)
+        """
+        command = self._marked_command(name)
+        for key in values:
+            if key in ('cmd', 'buffer_metadata'):
+                raise AttributeError(f"Invalid key {key}, it cannot be patched")
+            if key not in command:
+                raise AttributeError(f"Invalid key {key} for the command {command['cmd']}")
+        command.update(values)
+
+
+    def set_array(self, name:str, array:np.array):
+        """Replace the data of a marked command (uniform, buffer_data, tex_image_2d, ...), for the next executions.
+
+        Args:
+            name (str): the name of the marked command
+            array (np.array): the new data
+        """
+        command = self._marked_command(name)
+        if 'buffer_metadata' not in command:
+            raise AttributeError(f"Invalid command {command['cmd']}, it has no data")
+        index = command['buffer_metadata']['index']
+        meta_data, buffer = array_to_buffer(array)
+        meta_data['index'] = index
+        self._buffers[index] = buffer
+        command['buffer_metadata'] = meta_data
+
+
+    def execute_commands(self, execute_once=False, clear_previous=True, split_setup=False, render_pass='default'):
+        """Send the commands buffer to the viewer frontend.
+
+        The commands buffer is kept, so it can be executed again after patching some values.
+        See GLViewer.execute_commands for the arguments.
+
+        Args:
+            execute_once (bool, optional): Do we execute this only once. Defaults to False.
+            clear_previous (bool, optional): Do we replace the current commands or just append?. Defaults to True.
+            split_setup (bool, optional): Do we execute the setup commands only once and only keep the draw commands. Defaults to False.
+            render_pass (str, optional): the name of the render pass the commands are stored in. Defaults to 'default'.
+        """
+        self._viewer._submit_commands(self._commands, self._buffers, execute_once, clear_previous, split_setup, render_pass)
+
+
+    def clear_commands(self):
+        """Clear the commands buffer and its marks.
+        """
+        self._commands = []
+        self._buffers = []
+        self._marks = {}
@@ -0,0 +1,66 @@
+# the command names and the enum values sent as integer codes by the binary commands, the code is the index in the tuple
+# they must match the ones in src/commandcodes.ts, in the same order
+COMMANDS = (
+    'viewport', 'enable', 'disable', 'clearColor', 'clear', 'frontFace', 'cullFace', 'depthFunc', 'depthMask',
+    'depthRange', 'blendColor', 'blendEquation', 'blendEquationSeparate', 'blendFunc', 'blendFuncSeparate',
+    'createTextures', 'createBuffers', 'createVertexArrays', 'createTexture', 'bindTexture', 'activeTexture',
+    'generateMipmap', 'texImage2D', 'compressedTexImage2D', 'compressedTexSubImage2D', 'texSubImage2D', 'texSubImage3D',
+    'texStorage2D', 'texImage3D', 'texStorage3D', 'texParameteri', 'texParameterf', 'texParameter_str', 'pixelStorei',
+    'createShader', 'shaderSource', 'compileShader', 'createProgram', 'attachShader', 'bindAttribLocation',
+    'linkProgram', 'useProgram', 'uniform', 'uniformMatrix', 'uniformBlockBinding', 'createBuffer', 'bindBuffer',
+    'bindBufferBase', 'bufferData', 'copyBufferSubData', 'createUniformBuffer', 'bufferSubData', 'bufferSubDataStr',
+    'createVertexArray', 'bindVertexArray', 'vertexAttribPointer', 'vertexAttribIPointer', 'enableVertexAttribArray',
+    'disableVertexAttribArray', 'vertexAttrib[1234]fv', 'vertexAttribI4[u]iv', 'vertexAttribDivisor', 'drawArrays',
+    'drawArraysInstanced', 'drawElements', 'drawElementsInstanced', 'deleteTexture', 'deleteShader', 'deleteProgram',
+    'deleteBuffer', 'deleteVertexArray', 'deleteFramebuffer', 'createFramebuffer', 'bindFramebuffer',
+    'framebufferTexture2D', 'drawBuffers', 'readPixels',
+)
+
+ENUMS = (
+    'ALPHA', 'ALWAYS', 'ARRAY_BUFFER', 'BACK', 'BROWSER_DEFAULT_WEBGL', 'BYTE', 'CCW', 'CLAMP_TO_EDGE',
+    'COLOR_ATTACHMENT0', 'COLOR_ATTACHMENT1', 'COLOR_ATTACHMENT10', 'COLOR_ATTACHMENT11', 'COLOR_ATTACHMENT12',
+    'COLOR_ATTACHMENT13', 'COLOR_ATTACHMENT14', 'COLOR_ATTACHMENT15', 'COLOR_ATTACHMENT2', 'COLOR_ATTACHMENT3',
+    'COLOR_ATTACHMENT4', 'COLOR_ATTACHMENT5', 'COLOR_ATTACHMENT6', 'COLOR_ATTACHMENT7', 'COLOR_ATTACHMENT8',
+    'COLOR_ATTACHMENT9', 'COMPARE_REF_TO_TEXTURE', 'COMPRESSED_R11_EAC', 'COMPRESSED_RED_GREEN_RGTC2_EXT',
+    'COMPRESSED_RED_RGTC1_EXT', 'COMPRESSED_RG11_EAC', 'COMPRESSED_RGB8_ETC2',
+    'COMPRESSED_RGB8_PUNCHTHROUGH_ALPHA1_ETC2', 'COMPRESSED_RGBA8_ETC2_EAC', 'COMPRESSED_RGBA_BPTC_UNORM_EXT',
+    'COMPRESSED_RGBA_S3TC_DXT1_EXT', 'COMPRESSED_RGBA_S3TC_DXT3_EXT', 'COMPRESSED_RGBA_S3TC_DXT5_EXT',
+    'COMPRESSED_RGB_BPTC_SIGNED_FLOAT_EXT', 'COMPRESSED_RGB_BPTC_UNSIGNED_FLOAT_EXT', 'COMPRESSED_RGB_ETC1_WEBGL',
+    'COMPRESSED_RGB_S3TC_DXT1_EXT', 'COMPRESSED_SIGNED_R11_EAC', 'COMPRESSED_SIGNED_RED_GREEN_RGTC2_EXT',
+    'COMPRESSED_SIGNED_RED_RGTC1_EXT', 'COMPRESSED_SIGNED_RG11_EAC', 'COMPRESSED_SRGB8_ALPHA8_ETC2_EAC',
+    'COMPRESSED_SRGB8_ETC2', 'COMPRESSED_SRGB8_PUNCHTHROUGH_ALPHA1_ETC2', 'COMPRESSED_SRGB_ALPHA_BPTC_UNORM_EXT',
+    'COMPRESSED_SRGB_ALPHA_S3TC_DXT1_EXT', 'COMPRESSED_SRGB_ALPHA_S3TC_DXT3_EXT', 'COMPRESSED_SRGB_ALPHA_S3TC_DXT5_EXT',
+    'COMPRESSED_SRGB_S3TC_DXT1_EXT', 'CONSTANT_ALPHA', 'CONSTANT_COLOR', 'COPY_READ_BUFFER', 'COPY_WRITE_BUFFER', 'CW',
+    'DEPTH24_STENCIL8', 'DEPTH32F_STENCIL8', 'DEPTH_ATTACHMENT', 'DEPTH_COMPONENT', 'DEPTH_COMPONENT16',
+    'DEPTH_COMPONENT24', 'DEPTH_COMPONENT32F', 'DEPTH_STENCIL_ATTACHMENT', 'DRAW_FRAMEBUFFER', 'DST_ALPHA', 'DST_COLOR',
+    'DYNAMIC_COPY', 'DYNAMIC_DRAW', 'DYNAMIC_READ', 'ELEMENT_ARRAY_BUFFER', 'EQUAL', 'FLOAT',
+    'FLOAT_32_UNSIGNED_INT_24_8_REV', 'FRAGMENT_SHADER', 'FRAMEBUFFER', 'FRONT', 'FRONT_AND_BACK', 'FUNC_ADD',
+    'FUNC_REVERSE_SUBTRACT', 'FUNC_SUBTRACT', 'GEQUAL', 'GREATER', 'HALF_FLOAT', 'INT', 'LEQUAL', 'LESS', 'LINEAR',
+    'LINEAR_MIPMAP_LINEAR', 'LINEAR_MIPMAP_NEAREST', 'LINES', 'LINE_LOOP', 'LINE_STRIP', 'LUMINANCE', 'LUMINANCE_ALPHA',
+    'MAX', 'MIN', 'MIRRORED_REPEAT', 'NEAREST', 'NEAREST_MIPMAP_LINEAR', 'NEAREST_MIPMAP_NEAREST', 'NEVER', 'NONE',
+    'NOTEQUAL', 'ONE', 'ONE_MINUS_CONSTANT_ALPHA', 'ONE_MINUS_CONSTANT_COLOR', 'ONE_MINUS_DST_ALPHA',
+    'ONE_MINUS_DST_COLOR', 'ONE_MINUS_SRC_ALPHA', 'ONE_MINUS_SRC_COLOR', 'PACK_ALIGNMENT', 'PACK_ROW_LENGTH',
+    'PACK_SKIP_PIXELS', 'PACK_SKIP_ROWS', 'PIXEL_PACK_BUFFER', 'PIXEL_UNPACK_BUFFER', 'POINTS', 'R11F_G11F_B10F',
+    'R16F', 'R16I', 'R16UI', 'R32F', 'R32I', 'R32UI', 'R8', 'R8I', 'R8UI', 'R8_SNORM', 'READ_FRAMEBUFFER', 'RED',
+    'RED_INTEGER', 'REPEAT', 'RG', 'RG16F', 'RG16I', 'RG16UI', 'RG32F', 'RG32I', 'RG32UI', 'RG8', 'RG8I', 'RG8UI',
+    'RG8_SNORM', 'RGB', 'RGB10_A2', 'RGB10_A2UI', 'RGB16F', 'RGB16I', 'RGB16UI', 'RGB32F', 'RGB32I', 'RGB32UI',
+    'RGB565', 'RGB5_A1', 'RGB8', 'RGB8I', 'RGB8UI', 'RGB8_SNORM', 'RGB9_E5', 'RGBA', 'RGBA16F', 'RGBA16I', 'RGBA16UI',
+    'RGBA32F', 'RGBA32I', 'RGBA32UI', 'RGBA4', 'RGBA8', 'RGBA8I', 'RGBA8UI', 'RGBA8_SNORM', 'RGBA_INTEGER',
+    'RGB_INTEGER', 'RG_INTEGER', 'SHORT', 'SRC_ALPHA', 'SRC_ALPHA_SATURATE', 'SRC_COLOR', 'SRGB8', 'SRGB8_ALPHA8',
+    'STATIC_COPY', 'STATIC_DRAW', 'STATIC_READ', 'STENCIL_ATTACHMENT', 'STREAM_COPY', 'STREAM_DRAW', 'STREAM_READ',
+    'TEXTURE_2D', 'TEXTURE_2D_ARRAY', 'TEXTURE_3D', 'TEXTURE_BASE_LEVEL', 'TEXTURE_COMPARE_FUNC',
+    'TEXTURE_COMPARE_MODE', 'TEXTURE_CUBE_MAP', 'TEXTURE_CUBE_MAP_NEGATIVE_X', 'TEXTURE_CUBE_MAP_NEGATIVE_Y',
+    'TEXTURE_CUBE_MAP_NEGATIVE_Z', 'TEXTURE_CUBE_MAP_POSITIVE_X', 'TEXTURE_CUBE_MAP_POSITIVE_Y',
+    'TEXTURE_CUBE_MAP_POSITIVE_Z', 'TEXTURE_MAG_FILTER', 'TEXTURE_MAX_LEVEL', 'TEXTURE_MAX_LOD', 'TEXTURE_MIN_FILTER',
+    'TEXTURE_MIN_LOD', 'TEXTURE_WRAP_R', 'TEXTURE_WRAP_S', 'TEXTURE_WRAP_T', 'TRANSFORM_FEEDBACK_BUFFER', 'TRIANGLES',
+    'TRIANGLE_FAN', 'TRIANGLE_STRIP', 'UNIFORM_BUFFER', 'UNPACK_ALIGNMENT', 'UNPACK_COLORSPACE_CONVERSION_WEBGL',
+    'UNPACK_FLIP_Y_WEBGL', 'UNPACK_IMAGE_HEIGHT', 'UNPACK_PREMULTIPLY_ALPHA_WEBGL', 'UNPACK_ROW_LENGTH',
+    'UNPACK_SKIP_IMAGES', 'UNPACK_SKIP_PIXELS', 'UNPACK_SKIP_ROWS', 'UNSIGNED_BYTE', 'UNSIGNED_INT',
+    'UNSIGNED_INT_10F_11F_11F_REV', 'UNSIGNED_INT_24_8', 'UNSIGNED_INT_2_10_10_10_REV', 'UNSIGNED_INT_5_9_9_9_REV',
+    'UNSIGNED_SHORT', 'UNSIGNED_SHORT_4_4_4_4', 'UNSIGNED_SHORT_5_5_5_1', 'UNSIGNED_SHORT_5_6_5', 'VERTEX_SHADER',
+    'ZERO',
+)
+
+COMMAND_CODES = {name:code for code, name in enumerate(COMMANDS)}
+
+ENUM_CODES = {name:code for code, name in enumerate(ENUMS)}
@@ -0,0 +1,246 @@
+import struct
+from numbers import Integral, Real
+
+from .commandcodes import COMMAND_CODES, ENUM_CODES
+
+# value tags, they must match the ones in src/commandencoder.ts
+_NULL = 0
+_FALSE = 1
+_TRUE = 2
+_INT = 3
+_FLOAT = 4
+_NAME = 5
+_NAME32 = 6
+_LIST = 7
+_DICT = 8
+_OPCODE = 9
+_ENUM = 10
+
+_TAG = struct.Struct('<B')
+_KEY = struct.Struct('<H')
+_COUNT = struct.Struct('<I')
+_INT_VALUE = struct.Struct('<Bi')
+_FLOAT_VALUE = struct.Struct('<Bd')
+_NAME_VALUE = struct.Struct('<BH')
+_NAME32_VALUE = struct.Struct('<BI')
+_OPCODE_VALUE = struct.Struct('<BB')
+_ENUM_VALUE = struct.Struct('<BH')
+_LIST_HEADER = struct.Struct('<BI')
+
+_NULL_BYTES = _TAG.pack(_NULL)
+_FALSE_BYTES = _TAG.pack(_FALSE)
+_TRUE_BYTES = _TAG.pack(_TRUE)
+
+# the dict keys of every command ever encoded, the keys table is sent with every stream
+_KEYS = {}
+
+# the packing functions of each command layout (the keys of the command),
+# a few per layout since the commands with the same keys can have other value types or list lengths
+_PACKERS = {}
+_PACKERS_PER_LAYOUT = 4
+
+
+def _key_index(key):
+    index = _KEYS.get(key)
+    if index is None:
+        index = len(_KEYS)
+        _KEYS[key] = index
+    return index
+
+
+def _compile_packer(command):
+    """Build a function that packs a command with the same keys and value types in a single struct call.
+
+    The function returns None when the command does not match the layout it was built for
+    (other value types, list lengths or nested keys, int out of range, unknown command code),
+    the command is then encoded value by value.
+    """
+    lines = []
+    formats = ['<']
+    args = []
+    counter = [0]
+
+    def variable():
+        counter[0] += 1
+        return f'v{counter[0]}'
+
+    def visit_dict(value, expression):
+        formats.append('B')
+        args.append(str(len(value)))
+        for key, item in value.items():
+            formats.append('H')
+            args.append(str(_key_index(key)))
+            name = variable()
+            lines.append(f'{name} = {expression}[{key!r}]')
+            if not visit_value(item, name, key == 'cmd'):
+                return False
+        return True
+
+    def visit_value(value, name, is_cmd=False):
+        value_type = type(value)
+        if value_type is str:
+            lines.append(f'if type({name}) is not str: return None')
+            if is_cmd and value in COMMAND_CODES:
+                lines.append(f'o{name} = COMMAND_CODES.get({name})')
+                lines.append(f'if o{name} is None: return None')
+                formats.append('BB')
+                args.extend((str(_OPCODE), f'o{name}'))
+                return True
+            if is_cmd:
+                lines.append(f'if {name} in COMMAND_CODES: return None')
+            lines.append(f'e{name} = ENUM_CODES.get({name})')
+            lines.append(f'if e{name} is None:')
+            lines.append(f'    t{name} = {_NAME}; e{name} = names.get({name})')
+            lines.append(f'    if e{name} is None: e{name} = names[{name}] = len(names)')
+            lines.append(f'else: t{name} = {_ENUM}')
+            formats.append('BH')
+            args.extend((f't{name}', f'e{name}'))
+        elif value_type is bool:
+            lines.append(f'if type({name}) is not bool: return None')
+            formats.append('B')
+            args.append(f'({_TRUE} if {name} else {_FALSE})')
+        elif value is None:
+            lines.append(f'if {name} is not None: return None')
+            formats.append('B')
+            args.append(str(_NULL))
+        elif value_type is int:
+            lines.append(f'if type({name}) is not int: return None')
+            formats.append('Bi')
+            args.extend((str(_INT), name))
+        elif value_type is float:
+            lines.append(f'if type({name}) is not float: return None')
+            formats.append('Bd')
+            args.extend((str(_FLOAT), name))
+        elif value_type is dict:
+            lines.append(f'if type({name}) is not dict or tuple({name}) != {tuple(value)!r}: return None')
+            formats.append('B')
+            args.append(str(_DICT))
+            return visit_dict(value, name)
+        elif value_type is list or value_type is tuple:
+            lines.append(f'if type({name}) is not {value_type.__name__} or len({name}) != {len(value)}: return None')
+            formats.append('BI')
+            args.extend((str(_LIST), str(len(value))))
+            for i, item in enumerate(value):
+                item_name = variable()
+                lines.append(f'{item_name} = {name}[{i}]')
+                if not visit_value(item, item_name):
+                    return False
+        else:
+            return False
+        return True
+
+    if not visit_dict(command, 'command'):
+        return None
+    source = 'def pack(command, names):\n'
+    source += ''.join(f'    {line}\n' for line in lines)
+    source += f'    try:\n        return PACK({", ".join(args)})\n    except struct.error:\n        return None\n'
+    namespace = {'PACK':struct.Struct(''.join(formats)).pack, 'struct':struct, 'COMMAND_CODES':COMMAND_CODES, 'ENUM_CODES':ENUM_CODES}
+    exec(source, namespace)
+    return namespace['pack']
+
+
+def encode_commands(commands):
+    """Encode a list of commands into a compact binary stream.
+
+    The commands are the same dicts that are sent as JSON, so the frontend rebuilds exactly the same objects.
+    The command names and the GL enums are integer codes shared with the frontend (commandcodes.py),
+    the frontend dispatches the commands on the command code without comparing strings.
+    The other strings are stored only once, in the keys table for the dict keys, or in the names table for the values
+    (uniform names, shader sources, ...), the stream only references them by index.
+
+    The commands recorded by the same method have the same keys and value types, each layout is compiled once
+    into a single struct call, so encoding a frame is faster than json.dumps (benchmarks/command_encoding.py).
+
+    Stream layout (little endian):
+        u32 command count, then for each command a dict
+        dict: u8 field count, then for each field a u16 key (keys index) followed by a value
+        value: u8 tag followed by the payload (i32, f64, u8 command code, u16 enum code, u16/u32 names index, u32 count + values, dict)
+
+    Args:
+        commands (list): the list of command dicts
+
+    Returns:
+        (list, list, bytes): the keys table, the names table and the encoded stream
+    """
+    names = {}
+    chunks = [_COUNT.pack(len(commands))]
+    out = bytearray()
+
+    def name_index(name):
+        index = names.get(name)
+        if index is None:
+            index = len(names)
+            names[name] = index
+        return index
+
+    def write_dict(value):
+        out.extend(_TAG.pack(len(value)))
+        for key, item in value.items():
+            out.extend(_KEY.pack(_key_index(key)))
+            if key == 'cmd' and item in COMMAND_CODES:
+                out.extend(_OPCODE_VALUE.pack(_OPCODE, COMMAND_CODES[item]))
+            else:
+                write_value(item)
+
+    def write_value(value):
+        value_type = type(value)
+        if value_type is str:
+            code = ENUM_CODES.get(value)
+            if code is not None:
+                out.extend(_ENUM_VALUE.pack(_ENUM, code))
+                return
+            index = name_index(value)
+            if index < 65536:
+                out.extend(_NAME_VALUE.pack(_NAME, index))
+            else:
+                out.extend(_NAME32_VALUE.pack(_NAME32, index))
+        elif value_type is bool:
+            out.extend(_TRUE_BYTES if value else _FALSE_BYTES)
+        elif value_type is int:
+            if -2147483648 <= value <= 2147483647:
+                out.extend(_INT_VALUE.pack(_INT, value))
+            else:
+                out.extend(_FLOAT_VALUE.pack(_FLOAT, value))
+        elif value_type is float:
+            out.extend(_FLOAT_VALUE.pack(_FLOAT, value))
+        elif value_type is dict:
+            out.extend(_TAG.pack(_DICT))
+            write_dict(value)
+        elif value_type is list or value_type is tuple:
+            out.extend(_LIST_HEADER.pack(_LIST, len(value)))
+            for item in value:
+                write_value(item)
+        elif value is None:
+            out.extend(_NULL_BYTES)
+        elif isinstance(value, Integral):
+            write_value(int(value))
+        elif isinstance(value, Real):
+            write_value(float(value))
+        else:
+            raise TypeError(f"Cannot encode a command value of type {value_type.__name__}")
+
+    append = chunks.append
+    for command in commands:
+        layout = tuple(command)
+        packers = _PACKERS.get(layout)
+        if packers is None:
+            packers = _PACKERS[layout] = []
+        packed = None
+        for pack in packers:
+            packed = pack(command, names)
+            if packed is not None:
+                break
+        else:
+            if len(packers) < _PACKERS_PER_LAYOUT:
+                pack = _compile_packer(command)
+                if pack is not None:
+                    packers.append(pack)
+                    packed = pack(command, names)
+        if packed is None:
+            write_dict(command)
+            append(bytes(out))
+            out.clear()
+        else:
+            append(packed)
+
+    return list(_KEYS), list(names), b''.join(chunks)
@@ -0,0 +1,318 @@
+import os
+import struct
+
+import numpy as np
+
+
+def _astc_formats():
+    formats = {}
+    for block in ['4x4', '5x4', '5x5', '6x5', '6x6', '8x5', '8x6', '8x8', '10x5', '10x6', '10x8', '10x10', '12x10', '12x12']:
+        width, height = (int(size) for size in block.split('x'))
+        formats[f'COMPRESSED_RGBA_ASTC_{block}_KHR'] = (width, height, 16)
+        formats[f'COMPRESSED_SRGB8_ALPHA8_ASTC_{block}_KHR'] = (width, height, 16)
+    return formats
+
+
+# the compressed internal formats, with their (block width, block height, block bytes)
+# the names are the constants of the webgl extensions, they are resolved by the frontend when the extension is available
+COMPRESSED_FORMATS = {
+    # WEBGL_compressed_texture_s3tc
+    'COMPRESSED_RGB_S3TC_DXT1_EXT':(4, 4, 8),
+    'COMPRESSED_RGBA_S3TC_DXT1_EXT':(4, 4, 8),
+    'COMPRESSED_RGBA_S3TC_DXT3_EXT':(4, 4, 16),
+    'COMPRESSED_RGBA_S3TC_DXT5_EXT':(4, 4, 16),
+    # WEBGL_compressed_texture_s3tc_srgb
+    'COMPRESSED_SRGB_S3TC_DXT1_EXT':(4, 4, 8),
+    'COMPRESSED_SRGB_ALPHA_S3TC_DXT1_EXT':(4, 4, 8),
+    'COMPRESSED_SRGB_ALPHA_S3TC_DXT3_EXT':(4, 4, 16),
+    'COMPRESSED_SRGB_ALPHA_S3TC_DXT5_EXT':(4, 4, 16),
+    # EXT_texture_compression_rgtc
+    'COMPRESSED_RED_RGTC1_EXT':(4, 4, 8),
+    'COMPRESSED_SIGNED_RED_RGTC1_EXT':(4, 4, 8),
+    'COMPRESSED_RED_GREEN_RGTC2_EXT':(4, 4, 16),
+    'COMPRESSED_SIGNED_RED_GREEN_RGTC2_EXT':(4, 4, 16),
+    # EXT_texture_compression_bptc
+    'COMPRESSED_RGBA_BPTC_UNORM_EXT':(4, 4, 16),
+    'COMPRESSED_SRGB_ALPHA_BPTC_UNORM_EXT':(4, 4, 16),
+    'COMPRESSED_RGB_BPTC_SIGNED_FLOAT_EXT':(4, 4, 16),
+    'COMPRESSED_RGB_BPTC_UNSIGNED_FLOAT_EXT':(4, 4, 16),
+    # WEBGL_compressed_texture_etc
+    'COMPRESSED_R11_EAC':(4, 4, 8),
+    'COMPRESSED_SIGNED_R11_EAC':(4, 4, 8),
+    'COMPRESSED_RG11_EAC':(4, 4, 16),
+    'COMPRESSED_SIGNED_RG11_EAC':(4, 4, 16),
+    'COMPRESSED_RGB8_ETC2':(4, 4, 8),
+    'COMPRESSED_SRGB8_ETC2':(4, 4, 8),
+    'COMPRESSED_RGB8_PUNCHTHROUGH_ALPHA1_ETC2':(4, 4, 8),
+    'COMPRESSED_SRGB8_PUNCHTHROUGH_ALPHA1_ETC2':(4, 4, 8),
+    'COMPRESSED_RGBA8_ETC2_EAC':(4, 4, 16),
+    'COMPRESSED_SRGB8_ALPHA8_ETC2_EAC':(4, 4, 16),
+    # WEBGL_compressed_texture_etc1
+    'COMPRESSED_RGB_ETC1_WEBGL':(4, 4, 8),
+    # WEBGL_compressed_texture_astc
+    **_astc_formats(),
+}
+
+
+def compressed_size(format:str, width:int, height:int) -> int:
+    """Return the size in bytes of a compressed image.
+
+    Args:
+        format (str): the compressed internal format
+        width (int): the width of the image
+        height (int): the height of the image
+
+    Returns:
+        int: the number of bytes
+    """
+    block_width, block_height, block_bytes = COMPRESSED_FORMATS[format]
+    return -(-width // block_width) * -(-height // block_height) * block_bytes
+
+
+_DDS_FOURCC = {
+    b'DXT1':'COMPRESSED_RGB_S3TC_DXT1_EXT',
+    b'DXT3':'COMPRESSED_RGBA_S3TC_DXT3_EXT',
+    b'DXT5':'COMPRESSED_RGBA_S3TC_DXT5_EXT',
+    b'ATI1':'COMPRESSED_RED_RGTC1_EXT',
+    b'BC4U':'COMPRESSED_RED_RGTC1_EXT',
+    b'BC4S':'COMPRESSED_SIGNED_RED_RGTC1_EXT',
+    b'ATI2':'COMPRESSED_RED_GREEN_RGTC2_EXT',
+    b'BC5U':'COMPRESSED_RED_GREEN_RGTC2_EXT',
+    b'BC5S':'COMPRESSED_SIGNED_RED_GREEN_RGTC2_EXT',
+}
+
+_DXGI_FORMATS = {
+    71:'COMPRESSED_RGBA_S3TC_DXT1_EXT',
+    72:'COMPRESSED_SRGB_ALPHA_S3TC_DXT1_EXT',
+    74:'COMPRESSED_RGBA_S3TC_DXT3_EXT',
+    75:'COMPRESSED_SRGB_ALPHA_S3TC_DXT3_EXT',
+    77:'COMPRESSED_RGBA_S3TC_DXT5_EXT',
+    78:'COMPRESSED_SRGB_ALPHA_S3TC_DXT5_EXT',
+    80:'COMPRESSED_RED_RGTC1_EXT',
+    81:'COMPRESSED_SIGNED_RED_RGTC1_EXT',
+    83:'COMPRESSED_RED_GREEN_RGTC2_EXT',
+    84:'COMPRESSED_SIGNED_RED_GREEN_RGTC2_EXT',
+    95:'COMPRESSED_RGB_BPTC_UNSIGNED_FLOAT_EXT',
+    96:'COMPRESSED_RGB_BPTC_SIGNED_FLOAT_EXT',
+    98:'COMPRESSED_RGBA_BPTC_UNORM_EXT',
+    99:'COMPRESSED_SRGB_ALPHA_BPTC_UNORM_EXT',
+}
+
+
+def _vk_formats():
+    formats = {
+        131:'COMPRESSED_RGB_S3TC_DXT1_EXT',
+        132:'COMPRESSED_SRGB_S3TC_DXT1_EXT',
+        133:'COMPRESSED_RGBA_S3TC_DXT1_EXT',
+        134:'COMPRESSED_SRGB_ALPHA_S3TC_DXT1_EXT',
+        135:'COMPRESSED_RGBA_S3TC_DXT3_EXT',
+        136:'COMPRESSED_SRGB_ALPHA_S3TC_DXT3_EXT',
+        137:'COMPRESSED_RGBA_S3TC_DXT5_EXT',
+        138:'COMPRESSED_SRGB_ALPHA_S3TC_DXT5_EXT',
+        139:'COMPRESSED_RED_RGTC1_EXT',
+        140:'COMPRESSED_SIGNED_RED_RGTC1_EXT',
+        141:'COMPRESSED_RED_GREEN_RGTC2_EXT',
+        142:'COMPRESSED_SIGNED_RED_GREEN_RGTC2_EXT',
+        143:'COMPRESSED_RGB_BPTC_UNSIGNED_FLOAT_EXT',
+        144:'COMPRESSED_RGB_BPTC_SIGNED_FLOAT_EXT',
+        145:'COMPRESSED_RGBA_BPTC_UNORM_EXT',
+        146:'COMPRESSED_SRGB_ALPHA_BPTC_UNORM_EXT',
+        147:'COMPRESSED_RGB8_ETC2',
+        148:'COMPRESSED_SRGB8_ETC2',
+        149:'COMPRESSED_RGB8_PUNCHTHROUGH_ALPHA1_ETC2',
+        150:'COMPRESSED_SRGB8_PUNCHTHROUGH_ALPHA1_ETC2',
+        151:'COMPRESSED_RGBA8_ETC2_EAC',
+        152:'COMPRESSED_SRGB8_ALPHA8_ETC2_EAC',
+        153:'COMPRESSED_R11_EAC',
+        154:'COMPRESSED_SIGNED_R11_EAC',
+        155:'COMPRESSED_RG11_EAC',
+        156:'COMPRESSED_SIGNED_RG11_EAC',
+    }
+    # the astc formats follow, an unorm and a srgb value for each block size
+    for i, block in enumerate(['4x4', '5x4', '5x5', '6x5', '6x6', '8x5', '8x6', '8x8', '10x5', '10x6', '10x8', '10x10', '12x10', '12x12']):
+        formats[157 + i * 2] = f'COMPRESSED_RGBA_ASTC_{block}_KHR'
+        formats[158 + i * 2] = f'COMPRESSED_SRGB8_ALPHA8_ASTC_{block}_KHR'
+    return formats
+
+_VK_FORMATS = _vk_formats()
+
+_KTX2_IDENTIFIER = b'\xabKTX 20\xbb\r\n\x1a\n'
+
+
+class CompressedTexture:
+    """A precompressed 2d texture and its mip levels, read from a DDS or a KTX2 file.
+
+    The blocks are sent as they are with compressedTexImage2D, so the message and the gpu memory are
+    4 to 8 times smaller than the uncompressed texels. The browser must support the format,
+    see GLViewer.compressed_texture_formats.
+
+    Only the uncompressed containers are supported, a KTX2 with a supercompression (basis universal, zstd) needs a transcoder.
+
+    Example:
+        >>> atlas = ipywebgl.CompressedTexture.load('atlas.ktx2')
+        >>> texture = atlas.upload(w)
+
+    Attributes:
+        format (str): the compressed internal format.
+        width (int): the width of the first level.
+        height (int): the height of the first level.
+        levels (list): the mip levels, as (width, height, data) tuples, data is a uint8 array.
+    """
+
+    def __init__(self, format:str, width:int, height:int, levels:list):
+        if format not in COMPRESSED_FORMATS:
+            raise AttributeError("Invalid format")
+        if not levels:
+            raise AttributeError("Invalid levels, at least one level is needed")
+        self.format = format
+        self.width = width
+        self.height = height
+        self.levels = levels
+
+
+    @property
+    def nbytes(self) -> int:
+        """the size in bytes of all the levels"""
+        return sum(data.nbytes for _, _, data in self.levels)
+
+
+    @classmethod
+    def load(cls, source):
+        """Read a DDS or a KTX2 texture, the container is detected from its header.
+
+        Args:
+            source (str, os.PathLike or bytes): the path of the file, or its content
+
+        Returns:
+            CompressedTexture: the texture
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                source = f.read()
+        header = bytes(source[:12])
+        if header.startswith(b'DDS '):
+            return cls.from_dds(source)
+        if header == _KTX2_IDENTIFIER:
+            return cls.from_ktx2(source)
+        raise Exception('unknown texture container, only DDS and KTX2 are supported')
+
+
+    @classmethod
+    def _read_levels(cls, data:np.ndarray, format:str, width:int, height:int, offsets:list):
+        """cut the levels out of the file, offsets are (offset, size) for each level"""
+        levels = []
+        for level, (offset, size) in enumerate(offsets):
+            level_width = max(1, width >> level)
+            level_height = max(1, height >> level)
+            expected = compressed_size(format, level_width, level_height)
+            if size < expected or offset + expected > len(data):
+                raise Exception(f'truncated texture, the level {level} is incomplete')
+            levels.append((level_width, level_height, data[offset:offset + expected]))
+        return cls(format, width, height, levels)
+
+
+    @classmethod
+    def from_dds(cls, source):
+        """Read a DDS texture (BC1 to BC7), the cube maps and the arrays are not supported.
+
+        Args:
+            source (bytes): the content of the file
+
+        Returns:
+            CompressedTexture: the texture
+        """
+        data = np.frombuffer(source, dtype=np.uint8)
+        if len(data) < 128 or bytes(data[:4]) != b'DDS ':
+            raise Exception('invalid DDS file')
+        height, width, _, depth, mip_count = struct.unpack_from('<5I', data, 12)
+        flags = struct.unpack_from('<I', data, 8)[0]
+        four_cc = bytes(data[84:88])
+        caps2 = struct.unpack_from('<I', data, 112)[0]
+        if caps2 & 0x200 or (flags & 0x800000 and depth > 1):
+            raise Exception('only the 2d DDS textures are supported')
+
+        offset = 128
+        if four_cc == b'DX10':
+            dxgi_format, _, _, array_size = struct.unpack_from('<4I', data, 128)
+            if array_size > 1:
+                raise Exception('only the 2d DDS textures are supported')
+            format = _DXGI_FORMATS.get(dxgi_format)
+            if format is None:
+                raise Exception(f'unsupported DXGI format {dxgi_format}')
+            offset = 148
+        else:
+            format = _DDS_FOURCC.get(four_cc)
+            if format is None:
+                raise Exception(f'unsupported DDS format {four_cc}')
+
+        # DDSD_MIPMAPCOUNT
+        level_count = max(1, mip_count) if flags & 0x20000 else 1
+        offsets = []
+        for level in range(level_count):
+            size = compressed_size(format, max(1, width >> level), max(1, height >> level))
+            offsets.append((offset, size))
+            offset += size
+        return cls._read_levels(data, format, width, height, offsets)
+
+
+    @classmethod
+    def from_ktx2(cls, source):
+        """Read a KTX2 texture (BC, ETC2, EAC or ASTC), the cube maps, the arrays and the supercompressed files are not supported.
+
+        Args:
+            source (bytes): the content of the file
+
+        Returns:
+            CompressedTexture: the texture
+        """
+        data = np.frombuffer(source, dtype=np.uint8)
+        if len(data) < 80 or bytes(data[:12]) != _KTX2_IDENTIFIER:
+            raise Exception('invalid KTX2 file')
+        vk_format, _, width, height, depth, layers, faces, level_count, supercompression = struct.unpack_from('<9I', data, 12)
+        if supercompression != 0:
+            raise Exception('supercompressed KTX2 files are not supported, they need a transcoder')
+        if depth > 1 or layers > 1 or faces > 1:
+            raise Exception('only the 2d KTX2 textures are supported')
+        format = _VK_FORMATS.get(vk_format)
+        if format is None:
+            raise Exception(f'unsupported KTX2 vkFormat {vk_format}')
+
+        level_count = max(1, level_count)
+        index = struct.unpack_from(f'<{level_count * 3}Q', data, 80)
+        offsets = [(index[i * 3], index[i * 3 + 1]) for i in range(level_count)]
+        return cls._read_levels(data, format, width, height, offsets)
+
+
+    def upload(self, viewer, texture=None, target='TEXTURE_2D', filter='LINEAR', wrap='REPEAT'):
+        """Record the compressedTexImage2D commands of all the levels in a texture.
+
+        Args:
+            viewer (GLViewer): the viewer to record the commands on
+            texture (GLResourceWidget, optional): the texture to fill, a new one is created when None. Defaults to None.
+            target (str, optional): 'TEXTURE_2D' or a cube map face. Defaults to 'TEXTURE_2D'.
+            filter (str, optional): 'LINEAR' or 'NEAREST'. Defaults to 'LINEAR'.
+            wrap (str, optional): the wrap mode in s and t. Defaults to 'REPEAT'.
+
+        Returns:
+            GLResourceWidget: the texture
+        """
+        supported = getattr(viewer, 'compressed_texture_formats', None)
+        if supported and self.format not in supported:
+            raise Exception(f'the compressed format {self.format} is not supported by the browser')
+        if texture is None:
+            texture = viewer.create_texture()
+        bind_target = 'TEXTURE_CUBE_MAP' if target.startswith('TEXTURE_CUBE_MAP_') else target
+        viewer.bind_texture(bind_target, texture)
+        for level, (width, height, data) in enumerate(self.levels):
+            viewer.compressed_tex_image_2d(target, level, self.format, width, height, data)
+        if target == bind_target:
+            min_filter = filter
+            if len(self.levels) > 1:
+                min_filter = 'LINEAR_MIPMAP_LINEAR' if filter == 'LINEAR' else 'NEAREST_MIPMAP_NEAREST'
+            viewer.tex_parameter(bind_target, 'TEXTURE_MAX_LEVEL', len(self.levels) - 1)
+            viewer.tex_parameter(bind_target, 'TEXTURE_MIN_FILTER', min_filter)
+            viewer.tex_parameter(bind_target, 'TEXTURE_MAG_FILTER', filter)
+            viewer.tex_parameter(bind_target, 'TEXTURE_WRAP_S', wrap)
+            viewer.tex_parameter(bind_target, 'TEXTURE_WRAP_T', wrap)
+        viewer.bind_texture(bind_target, None)
+        return texture
@@ -0,0 +1,254 @@
+import numpy as np
+
+
+_UNSET = object()
+
+
+def _uid(resource) -> int:
+    return -1 if resource is None else resource.uid
+
+
+class DrawItem:
+    """A draw collected by a DrawQueue, with the state it needs.
+
+    Attributes:
+        program (GLResourceWidget): the program.
+        vertex_array (GLResourceWidget): the vertex array.
+        textures (tuple): the (target, texture) bound on each texture unit, the unit is the index.
+        uniforms (tuple): the (name, array) set with uniform.
+        uniform_matrices (tuple): the (name, array) set with uniform_matrix.
+        transparent (bool): drawn after the opaque items, sorted back to front.
+        depth (float): the distance to the camera used to sort the transparent items, None to compute it from position.
+        position (np.ndarray): the position of the item, used when depth is None.
+    """
+
+    __slots__ = ('program', 'vertex_array', 'textures', 'uniforms', 'uniform_matrices', 'mode', 'first', 'count',
+        'index_type', 'offset', 'instance_count', 'transparent', 'depth', 'position', 'key')
+
+    def __init__(self, program, vertex_array, textures, uniforms, uniform_matrices, mode:str, first:int, count:int,
+                 index_type:str, offset:int, instance_count:int, transparent:bool, depth:float, position):
+        self.program = program
+        self.vertex_array = vertex_array
+        self.textures = textures
+        self.uniforms = uniforms
+        self.uniform_matrices = uniform_matrices
+        self.mode = mode
+        self.first = first
+        self.count = count
+        self.index_type = index_type
+        self.offset = offset
+        self.instance_count = instance_count
+        self.transparent = transparent
+        self.depth = depth
+        self.position = position
+        # the state key, sorted by cost of the change: program, then textures, then vertex array
+        self.key = (_uid(program), tuple((target, _uid(texture)) for target, texture in textures), _uid(vertex_array))
+
+    def __repr__(self):
+        return f'DrawItem(program={_uid(self.program)}, vertex_array={_uid(self.vertex_array)}, count={self.count}, transparent={self.transparent})'
+
+
+class DrawQueue:
+    """Collect the draws of a frame and record them sorted by state, instead of in the scene order.
+
+    The opaque items are sorted by program, then textures, then vertex array, so each program and texture is bound once
+    for all the items that share it. The transparent items are recorded after, sorted back to front by their depth
+    (or by the distance between their position and the camera_pos of the viewer).
+    The binds of the state that is already bound are skipped, and a uniform array already set on the program is not sent again.
+
+    Use emit_opaque and emit_transparent to change the blending and the depth mask between the two lists.
+
+    Example:
+        >>> queue = ipywebgl.DrawQueue(w)
+        >>> for obj in scene:
+        >>>     queue.add(obj.program, obj.vao, obj.count, index_type='UNSIGNED_SHORT', textures=[obj.albedo],
+        >>>         uniform_matrices={'u_world': obj.world}, transparent=obj.alpha < 1, position=obj.center)
+        >>> w.clear()
+        >>> queue.emit_opaque()
+        >>> w.enable(blend=True)
+        >>> w.blend_func('SRC_ALPHA', 'ONE_MINUS_SRC_ALPHA')
+        >>> queue.emit_transparent()
+        >>> w.execute_commands()
+
+    Attributes:
+        last_stats (dict): the number of items, program changes, texture changes and vertex array changes recorded by the last emit.
+    """
+
+    def __init__(self, viewer):
+        self._viewer = viewer
+        self._opaque = []
+        self._transparent = []
+        self.last_stats = {}
+
+
+    def __len__(self):
+        return len(self._opaque) + len(self._transparent)
+
+
+    def add(self, program, vertex_array, count:int, mode='TRIANGLES', first:int=0, index_type:str=None, offset:int=0,
+            instance_count:int=None, textures=None, uniforms:dict=None, uniform_matrices:dict=None,
+            transparent=False, depth:float=None, position=None) -> DrawItem:
+        """Add a draw to the queue.
+
+        Args:
+            program (GLResourceWidget): the program
+            vertex_array (GLResourceWidget): the vertex array
+            count (int): the number of vertices (or indices) to draw
+            mode (str, optional): the type of primitives. Defaults to 'TRIANGLES'.
+            first (int, optional): the first vertex, for a draw without indices. Defaults to 0.
+            index_type (str, optional): the type of the indices ('UNSIGNED_BYTE', 'UNSIGNED_SHORT', 'UNSIGNED_INT'), None to draw without indices. Defaults to None.
+            offset (int, optional): the offset in bytes in the indices buffer. Defaults to 0.
+            instance_count (int, optional): the number of instances, None for a non instanced draw. Defaults to None.
+            textures (list, optional): the texture bound on each unit, a texture (bound to TEXTURE_2D) or a (target, texture) pair. Defaults to None.
+            uniforms (dict, optional): the name (or id) and array of the uniforms set with uniform. Defaults to None.
+            uniform_matrices (dict, optional): the name (or id) and array of the uniforms set with uniform_matrix. Defaults to None.
+            transparent (bool, optional): draw it after the opaque items, back to front. Defaults to False.
+            depth (float, optional): the distance to the camera used to sort the transparent items. Defaults to None.
+            position (np.ndarray, optional): the position used to compute the depth from the camera_pos, when depth is None. Defaults to None.
+
+        Returns:
+            DrawItem: the item
+        """
+        if index_type not in [None, 'UNSIGNED_BYTE', 'UNSIGNED_SHORT', 'UNSIGNED_INT']:
+            raise AttributeError("Invalid index_type")
+        bound = []
+        for texture in textures or []:
+            if isinstance(texture, tuple):
+                target, texture = texture
+            else:
+                target = 'TEXTURE_2D'
+            if target not in ["TEXTURE_2D", "TEXTURE_CUBE_MAP", "TEXTURE_3D", "TEXTURE_2D_ARRAY"]:
+                raise AttributeError("Invalid target")
+            bound.append((target, texture))
+        if position is not None:
+            position = np.asarray(position, dtype=np.float64).reshape(3)
+
+        item = DrawItem(program, vertex_array, tuple(bound), tuple((uniforms or {}).items()), tuple((uniform_matrices or {}).items()),
+            mode, first, count, index_type, offset, instance_count, transparent, depth, position)
+        if transparent:
+            self._transparent.append(item)
+        else:
+            self._opaque.append(item)
+        return item
+
+
+    def clear(self):
+        """Remove all the items."""
+        self._opaque = []
+        self._transparent = []
+
+
+    def sorted_opaque(self) -> list:
+        """Return the opaque items in the order they are recorded."""
+        return sorted(self._opaque, key=lambda item: item.key)
+
+
+    def sorted_transparent(self) -> list:
+        """Return the transparent items back to front, the items at the same depth are sorted by state."""
+        camera = np.asarray(getattr(self._viewer, 'camera_pos', (0, 0, 0)), dtype=np.float64)
+        def depth(item):
+            if item.depth is not None:
+                return item.depth
+            if item.position is not None:
+                return float(np.linalg.norm(item.position - camera))
+            return 0.0
+        return sorted(self._transparent, key=lambda item: (-depth(item), item.key))
+
+
+    def emit_opaque(self, commands=None, clear=False) -> dict:
+        """Record the opaque items sorted by state.
+
+        Args:
+            commands (GLViewer or CommandBuffer, optional): where to record the commands, the viewer when None. Defaults to None.
+            clear (bool, optional): remove the opaque items once recorded. Defaults to False.
+
+        Returns:
+            dict: the stats of the recording, see last_stats
+        """
+        self.last_stats = self._record(self.sorted_opaque(), commands)
+        if clear:
+            self._opaque = []
+        return self.last_stats
+
+
+    def emit_transparent(self, commands=None, clear=False) -> dict:
+        """Record the transparent items back to front.
+
+        Args:
+            commands (GLViewer or CommandBuffer, optional): where to record the commands, the viewer when None. Defaults to None.
+            clear (bool, optional): remove the transparent items once recorded. Defaults to False.
+
+        Returns:
+            dict: the stats of the recording, see last_stats
+        """
+        self.last_stats = self._record(self.sorted_transparent(), commands)
+        if clear:
+            self._transparent = []
+        return self.last_stats
+
+
+    def emit(self, commands=None, clear=False) -> dict:
+        """Record the opaque items sorted by state, then the transparent items back to front.
+
+        Args:
+            commands (GLViewer or CommandBuffer, optional): where to record the commands, the viewer when None. Defaults to None.
+            clear (bool, optional): remove the items once recorded. Defaults to False.
+
+        Returns:
+            dict: the stats of the recording, see last_stats
+        """
+        self.last_stats = self._record(self.sorted_opaque() + self.sorted_transparent(), commands)
+        if clear:
+            self.clear()
+        return self.last_stats
+
+
+    def _record(self, items:list, commands) -> dict:
+        """record the items, only binding the state that changes"""
+        if commands is None:
+            commands = self._viewer
+        stats = {'items':len(items), 'program_changes':0, 'texture_changes':0, 'vertex_array_changes':0}
+        program = vertex_array = _UNSET
+        active_unit = None
+        textures = {}
+        uniforms = {}
+        for item in items:
+            if item.program is not program:
+                program = item.program
+                commands.use_program(program)
+                stats['program_changes'] += 1
+
+            for unit, (target, texture) in enumerate(item.textures):
+                if textures.get((unit, target), -2) == _uid(texture):
+                    continue
+                if active_unit != unit:
+                    active_unit = unit
+                    commands.active_texture(unit)
+                textures[(unit, target)] = _uid(texture)
+                commands.bind_texture(target, texture)
+                stats['texture_changes'] += 1
+
+            # the uniforms are kept by the program, an array already set is not sent again
+            for method, values in ((commands.uniform, item.uniforms), (commands.uniform_matrix, item.uniform_matrices)):
+                for name, array in values:
+                    key = (_uid(program), name)
+                    if uniforms.get(key) is not array:
+                        uniforms[key] = array
+                        method(name, array)
+
+            if item.vertex_array is not vertex_array:
+                vertex_array = item.vertex_array
+                commands.bind_vertex_array(vertex_array)
+                stats['vertex_array_changes'] += 1
+
+            if item.index_type is not None:
+                if item.instance_count is None:
+                    commands.draw_elements(item.mode, item.count, item.index_type, item.offset)
+                else:
+                    commands.draw_elements_instanced(item.mode, item.count, item.index_type, item.offset, item.instance_count)
+            else:
+                if item.instance_count is None:
+                    commands.draw_arrays(item.mode, item.first, item.count)
+                else:
+                    commands.draw_arrays_instanced(item.mode, item.first, item.count, item.instance_count)
+        return stats
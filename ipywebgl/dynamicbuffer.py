@@ -0,0 +1,156 @@
+import numpy as np
+
+from .arraybuffer import _FRONTEND_DTYPES
+from .glresource import GLResourceWidget
+
+
+class DynamicBuffer:
+    """A GL buffer mirrored by a numpy array, only the rows that changed are uploaded.
+
+    The rows are the items of the first axis of the array (a vertex, an instance matrix, ...).
+    Writing through the buffer (buffer[10:20] = values) marks the rows as dirty,
+    the array can also be modified directly and then compared with the last uploaded snapshot (update(diff=True)).
+    update records one bufferSubData for each run of dirty rows, so the bandwidth scales with the changes and not with the buffer size.
+
+    The commands are recorded on the viewer, they are sent with the next execute_commands.
+
+    Example:
+        >>> positions = ipywebgl.DynamicBuffer(w, np.zeros((10000, 3), dtype=np.float32))
+        >>> vao = w.create_vertex_array_ext(program, [(positions.buffer, '3f32', 'in_vert')])
+        >>> positions[42] = [1, 2, 3]
+        >>> positions.update()
+        >>> w.execute_commands(execute_once=True)
+
+    Attributes:
+        data (np.ndarray): the array mirrored in the buffer, float16, int64 and uint64 are converted to the 4 bytes types the frontend uses.
+        buffer (GLResourceWidget): the buffer resource.
+        merge_gap (int): two dirty runs separated by less rows than this are uploaded as one. Defaults to 8.
+        last_update_bytes (int): the number of bytes recorded by the last update.
+    """
+
+    def __init__(self, viewer, data:np.ndarray, target='ARRAY_BUFFER', usage='DYNAMIC_DRAW', merge_gap:int=8):
+        if target not in ['ARRAY_BUFFER', 'ELEMENT_ARRAY_BUFFER', 'UNIFORM_BUFFER', 'TRANSFORM_FEEDBACK_BUFFER']:
+            raise AttributeError("Invalid target")
+        self._viewer = viewer
+        self._usage = usage
+        data = np.asarray(data)
+        # stored in the dtype sent to the frontend, so the rows have the same size in python and in the buffer
+        self.data = np.array(data, dtype=_FRONTEND_DTYPES.get(data.dtype, data.dtype), copy=True, order='C')
+        if self.data.ndim == 0:
+            raise AttributeError("Invalid data, it must have at least one dimension")
+        self._snapshot = self.data.copy()
+        self._dirty = np.zeros(len(self.data), dtype=bool)
+        self.merge_gap = merge_gap
+        self.last_update_bytes = 0
+
+        self.buffer = viewer.create_buffer()
+        viewer.bind_buffer(target, self.buffer)
+        viewer.buffer_data(target, self._snapshot, usage, update_info=True)
+        viewer.bind_buffer(target, None)
+
+
+    def __len__(self):
+        return len(self.data)
+
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        rows = key[0] if isinstance(key, tuple) else key
+        try:
+            self._dirty[rows] = True
+        except IndexError:
+            # a fancy key, only the diff can find the rows
+            self._dirty[:] = True
+
+
+    def resize(self, rows:int):
+        """Change the number of rows, the buffer resource stays the same so the vertex arrays that use it are still valid.
+
+        The rows that are kept are copied, the new ones are zeros, and the whole data is uploaded with a bufferData.
+
+        Args:
+            rows (int): the new number of rows
+        """
+        data = np.zeros((rows,) + self.data.shape[1:], dtype=self.data.dtype)
+        kept = min(rows, len(self.data))
+        data[:kept] = self.data[:kept]
+        self.data = data
+        self._snapshot = data.copy()
+        self._dirty = np.zeros(rows, dtype=bool)
+
+        viewer = self._viewer
+        viewer.bind_buffer('COPY_WRITE_BUFFER', self.buffer)
+        viewer.buffer_data('COPY_WRITE_BUFFER', self._snapshot, self._usage, update_info=True)
+        viewer.bind_buffer('COPY_WRITE_BUFFER', None)
+
+
+    def mark_dirty(self, start:int=0, stop:int=None):
+        """Mark a range of rows as dirty, after modifying the data array directly.
+
+        Args:
+            start (int, optional): the first row. Defaults to 0.
+            stop (int, optional): the row after the last one, None for the end. Defaults to None.
+        """
+        self._dirty[start:stop] = True
+
+
+    def dirty_runs(self, diff=False) -> list:
+        """Return the runs of rows to upload, as (start, stop) pairs.
+
+        Args:
+            diff (bool, optional): compare the whole array with the last uploaded snapshot, instead of using the marked rows. Defaults to False.
+
+        Returns:
+            list of (int, int): the runs, sorted
+        """
+        dirty = self._dirty
+        if diff or dirty.any():
+            # only upload the rows whose bytes really changed
+            rows = len(self.data)
+            current = self.data.view(np.uint8).reshape(rows, -1)
+            previous = self._snapshot.view(np.uint8).reshape(rows, -1)
+            candidates = np.ones(rows, dtype=bool) if diff else dirty
+            dirty = np.zeros(rows, dtype=bool)
+            dirty[candidates] = (current[candidates] != previous[candidates]).any(axis=1)
+
+        # the edges of the runs of dirty rows
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], dirty, [False])).astype(np.int8)))
+        runs = []
+        for start, stop in zip(edges[::2], edges[1::2]):
+            if runs and start - runs[-1][1] < self.merge_gap:
+                runs[-1][1] = stop
+            else:
+                runs.append([start, stop])
+        return [(int(start), int(stop)) for start, stop in runs]
+
+
+    def update(self, diff=False):
+        """Record the bufferSubData commands of the dirty rows, and take them as the new snapshot.
+
+        Args:
+            diff (bool, optional): compare the whole array with the last uploaded snapshot, use it after modifying data directly. Defaults to False.
+
+        Returns:
+            int: the number of bytes recorded
+        """
+        runs = self.dirty_runs(diff)
+        viewer = self._viewer
+        row_size = self.data[0].nbytes if len(self.data) else 0
+        recorded = 0
+        if runs:
+            # the copy target does not change the bound vertex array or uniform buffer bindings
+            viewer.bind_buffer('COPY_WRITE_BUFFER', self.buffer)
+            for start, stop in runs:
+                # copy the rows, the data can be modified again before the commands are sent
+                rows = self.data[start:stop].copy()
+                self._snapshot[start:stop] = rows
+                viewer.buffer_sub_data('COPY_WRITE_BUFFER', start * row_size, rows)
+                recorded += rows.nbytes
+            viewer.bind_buffer('COPY_WRITE_BUFFER', None)
+        self._dirty[:] = False
+        self.last_update_bytes = recorded
+        return recorded
@@ -11,9 +11,42 @@ class GLResourceWidget(DOMWidget):
     _view_name = Unicode('GLResourceView').tag(sync=True)
     _view_module = Unicode(module_name).tag(sync=True)
     _view_module_version = Unicode(module_version).tag(sync=True)
-      
+
     _context = Instance(DOMWidget).tag(sync=True, **widget_serialization)
     uid = Int(-1).tag(sync=True)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+
+
+class GLResourceHandle:
+    """A lightweight resource, used instead of a GLResourceWidget when the viewer has lightweight_resources set.
+
+    It only holds the uid of the resource, no widget (and no comm) is created for it.
+    The GLResourceWidget used to inspect the resource is created the first time the handle is displayed,
+    it then gets its info from the frontend.
+
+    Attributes:
+        uid (int): the uid of the resource in the viewer.
+        kind (str): the kind of resource {'texture', 'shader', 'program', 'buffer', 'vertex_array', 'framebuffer'}.
+    """
+    __slots__ = ('uid', 'kind', '_context', '_widget', '__weakref__')
+
+    def __init__(self, context, uid:int, kind:str):
+        self.uid = uid
+        self.kind = kind
+        self._context = context
+        self._widget = None
+
+    def widget(self) -> GLResourceWidget:
+        """return the widget displaying the resource info, it is created on the first call"""
+        if self._widget is None:
+            self._widget = GLResourceWidget(_context=self._context, uid=self.uid)
+        return self._widget
+
+    def _ipython_display_(self, **kwargs):
+        from IPython.display import display
+        display(self.widget())
+
+    def __repr__(self):
+        return f'GLResourceHandle(uid={self.uid}, kind={self.kind!r})'
@@ -1,15 +1,25 @@
 from ipywidgets import DOMWidget, Widget, register, widget_serialization
 from ipywidgets.widgets.trait_types import bytes_serialization
-from traitlets import Unicode, Float, Int, Bool, validate, TraitError, Instance, List, Bytes
+from traitlets import Unicode, Float, Int, Bool, validate, observe, TraitError, Instance, List, Bytes, Dict
 
+import asyncio
 import numpy as np
+import time
+import weakref
+from functools import partial
 
 from ._frontend import module_name, module_version
+from .commandencoder import encode_commands
+from .glcommands import GLCommands
+from .glresource import GLResourceWidget, GLResourceHandle
+from .imageencoding import IMAGE_ENCODINGS, decode_rows, decode_image
 from .arraybuffer import array_to_buffer
-from .glresource import GLResourceWidget
+from .streaming import ChunkedUpload, buffer_chunks, texture_chunks
+from .uploadcache import UploadCache, MAX_PENDING_MESSAGES
+from .stateoptimizer import optimize_state_changes
 
 @register
-class GLViewer(DOMWidget):
+class GLViewer(DOMWidget, GLCommands):
     """The main widget of the module.
 
     This widget is in charge of creating the canvas, the webgl context and all the opengl resources you will need.
@@ -19,7 +29,8 @@ class GLViewer(DOMWidget):
 
     All OpenGL commands are sent through this widget.
 
-    All the commands you call will be stacked on a commands buffer that will be sent only when you call the render method.
+    All the commands you call will be stacked on a commands buffer that will be sent only when you call the execute_commands method.
+    The commands are the ones of GLCommands, they can also be recorded in a CommandBuffer to be executed many times.
 
     Attributes:
         width (int): the width of the canvas. Defaults to 640.
@@ -33,10 +44,41 @@ class GLViewer(DOMWidget):
         mouse_speed (float): mouse speed (camera rotation speed). Defaults to 1.
         move_speed (float): move speed (camera translation speed). Defaults to 1.
         move_keys (str): the move keys as a string. Forward, Left, Back, Right. Defaults to 'wasd'.
+        camera_sync_interval (float): the camera moves locally in the frontend, the camera traits are synced at most once per interval (in seconds)
+            while the mouse or the move keys are used, and once at the end of the interaction. 0 only syncs at the end. Defaults to 0.2.
         shader_matrix_major (str): the type of matrix (for the ViewProjection for instance) to send to the shader {'row_major' or 'column_major'}. Defaults to 'row_major'.
         sync_image_data (bool): do we store the rendered imaged in python. This will significantly slow the rendering. Defaults to False.
         image_data (bytes): the stored image as bytes. If the sync_image_data is set to True.
+        image_data_interval (float): the minimum time in seconds between two syncs of the image_data, the last frame is always synced. Defaults to 0.
+        image_data_encoding (str): how the image_data is encoded {'raw', 'rows', 'png', 'jpeg', 'webp'}. 'rows' only sends the rows that changed since the previous frame,
+            'png', 'jpeg' and 'webp' are encoded by the browser and need Pillow to be decoded in python. Defaults to 'raw'.
+        image_data_quality (float): the quality of the 'jpeg' and 'webp' encodings, between 0 and 1. Lower is smaller and faster. Defaults to 0.9.
+        async_readback (bool): read the pixels in a pixel pack buffer and wait for a fence, instead of stalling the gpu with a synchronous readPixels. Defaults to False.
         verbose (int): with verbose set to 1, all the commands executed by the frontend will be logged in the console. Defaults to 0.
+        binary_commands (bool): send the commands as a compact binary stream instead of JSON, with the command names and the enums as integer codes.
+            This is much smaller and faster to encode than JSON for large commands buffers, see benchmarks/command_encoding.py. Defaults to False.
+        lightweight_resources (bool): create the resources as GLResourceHandle instead of GLResourceWidget. A handle does not open a comm, its widget is only created when it is displayed. Defaults to False.
+        auto_delete_resources (bool): with lightweight_resources, the viewer only keeps a weak reference on the handles, and deletes the GL object when its handle is garbage collected. Defaults to False.
+        optimize_state_changes (bool): remove the binding commands that are no-ops or replaced before being used before sending the commands,
+            the number of removed commands is counted in send_stats. Defaults to False.
+        profile (bool): measure each frame in the frontend, the results are synced in frame_stats. This slows the rendering a bit. Defaults to False.
+        frame_stats (dict): the measures of the last frame when profile is set to True, synced at most once per second.
+            frame (int) the number of profiled frames, frame_ms (float) the time to replay the commands,
+            decode_ms (float) the time to decode the last message, commands (int) the number of commands replayed,
+            command_ms (dict) the time spent in each command name, gpu_ms (float) the gpu time of the frame if EXT_disjoint_timer_query_webgl2 is supported (None otherwise).
+        send_stats (dict): the counters of what was sent by execute_commands, see reset_send_stats.
+        upload_cache_size (int): the size in bytes of the frontend cache of uploaded buffers. The buffers larger than 4KB are hashed,
+            and the ones the frontend already has are not sent again. The frontend confirms each message that uses the cache,
+            a message with a buffer it does not have (after a page reload, ...) is sent again with its bytes. While 64 messages are not confirmed
+            (the frontend answers after the cell, or no view is displayed) the buffers are sent without the cache. 0 disables the cache. Defaults to 0.
+        extensions (list of str): the webgl extensions supported by the browser, reported by the frontend.
+        compressed_texture_formats (list of str): the compressed internal formats the browser can upload (compressed_tex_image_2d),
+            reported by the frontend from the compressed texture extensions it enabled.
+        render_stats (dict): the counters of the frontend frame scheduler, synced at most once per second. The redraw triggers (messages, camera changes, captures, ...)
+            are coalesced in one replay per animation frame: frames (int) the number of rendered frames, requests (int) the number of redraw triggers,
+            coalesced (int) the triggers merged in an already scheduled frame, dropped (int) the display frames that went by between a trigger and its frame,
+            view_block_uploads and view_block_skips (int) the frames that uploaded the camera matrices or skipped it because they did not change,
+            frame_interval_ms (float) the measured display refresh interval.
     """
     _model_name = Unicode('GLModel').tag(sync=True)
     _model_module = Unicode(module_name).tag(sync=True)
@@ -56,1511 +98,554 @@ class GLViewer(DOMWidget):
     mouse_speed = Float(1).tag(sync=True)
     move_speed = Float(1).tag(sync=True)
     move_keys = Unicode('wasd').tag(sync=True)
+    camera_sync_interval = Float(0.2).tag(sync=True)
     shader_matrix_major = Unicode('row_major').tag(sync=True)
     sync_image_data = Bool(False).tag(sync=True)
+    image_data_interval = Float(0).tag(sync=True)
+    image_data_encoding = Unicode('raw').tag(sync=True)
+    image_data_quality = Float(0.9).tag(sync=True)
+    async_readback = Bool(False).tag(sync=True)
+    upload_cache_size = Int(0).tag(sync=True)
     image_data = Bytes(default_value=None, allow_none=True, read_only=True).tag(
         sync=True, **bytes_serialization
     )
     verbose = Int(0).tag(sync=True)
-
-    
+    profile = Bool(False).tag(sync=True)
+    frame_stats = Dict(read_only=True).tag(sync=True)
+    extensions = List(Unicode(), read_only=True).tag(sync=True)
+    compressed_texture_formats = List(Unicode(), read_only=True).tag(sync=True)
+    render_stats = Dict(read_only=True).tag(sync=True)
+    binary_commands = Bool(False)
+    lightweight_resources = Bool(False)
+    auto_delete_resources = Bool(False)
+    optimize_state_changes = Bool(False)
+
+    _delete_commands = {
+        'texture':'deleteTexture',
+        'shader':'deleteShader',
+        'program':'deleteProgram',
+        'buffer':'deleteBuffer',
+        'vertex_array':'deleteVertexArray',
+        'framebuffer':'deleteFramebuffer',
+    }
 
     def __init__(self, **kwargs):
+        # created before the traits are set, the upload_cache_size observer sets its budget
+        self._upload_cache = UploadCache()
         super().__init__(**kwargs)
         self._resources = []
+        self._free_uids = []
+        self._collected_resources = []
+        self._uniform_locations = {}
+        self.reset_send_stats()
+        self._requests = {}
+        self._request_id = 0
+        self._uploads = {}
+        self._cache_seq = 0
+        self._sent_reads = set()
+        self._cached_messages = {}
+        self.on_msg(self._handle_frontend_msg)
         self._commands = []
         self._buffers = []
+        self._image_out = None
+        self._image_rows = None
+        self._image_decoded = None
+        self._image_source = None
 
 
-    def resource(self, index):
-        """return the resource used by the viewer"""
-        return self._resources[index]
-
-    def resource_count(self):
-        """return the number of resources used by the viewer"""
-        return len(self._resources)
-
-
-    def execute_commands(self, execute_once=False, clear_previous=True):
-        """Send the commands buffer to the webgl frontend.
-
-        When the commands buffer is sent, it will be cleared.
-        You can then start to build a new commands buffer.
-
-        By default the command buffers will stay in memory in the frontend, so it can be reexecuted everytime you need to redraw the scene (camera move for instance)
-        If you set the execute_once to True, it will not be stored in the frontend.
-
-        Args:
-            execute_once (bool, optional): Do we execute this only once. Defaults to False.
-            clear_previous (bool, optional): Do we replace the current commands or just append?. Defaults to False.
-        """
-        self.send({'commands':self._commands, 'only_once':execute_once, 'clear':clear_previous}, buffers=self._buffers)
-        self.clear_commands()
-
-
-    def get_image_data(self):
-        if self.image_data == None:
-            raise Exception('no image data, please activate the sync_image_data flag and render to canvas before using this function')
-
-        return np.flip(np.array(list(bytearray(self.image_data)), dtype=np.uint8).reshape(self.height, self.width, 4), 0)
-
-
-    def clear_commands(self):
-        """Clear the commands buffer without sending it to the frontend.
-        """
-        self._commands = []
-        self._buffers  = []
-
-
-    def viewport(self, x:int, y:int, width:int, height:int):
-        self._commands.append({'cmd':'viewport', 
-            'x':x,
-            'y':y,
-            'width':width,
-            'height':height
-        })
-
-
-    def enable(self, blend=False, cull_face=False, depth_test=False, dither=False, polygon_offset_fill=False, sample_alpha_to_coverage=False, sample_coverage=False, scissor_test=False, stencil_test=False, rasterizer_discard=False):
-        """Append a enable command to the commands buffer
-
-        Args:
-            blend (bool, optional): Activates blending of the computed fragment color values. Defaults to False.
-            cull_face (bool, optional): Activates culling of polygons. Defaults to False.
-            depth_test (bool, optional): Activates depth comparisons and updates to the depth buffer. Defaults to False.
-            dither (bool, optional): Activates dithering of color components before they get written to the color buffer. Defaults to False.
-            polygon_offset_fill (bool, optional): Activates adding an offset to depth values of polygon's fragments. Defaults to False.
-            sample_alpha_to_coverage (bool, optional): Activates the computation of a temporary coverage value determined by the alpha value. Defaults to False.
-            sample_coverage (bool, optional): Activates ANDing the fragment's coverage with the temporary coverage value. Defaults to False.
-            scissor_test (bool, optional): Activates the scissor test that discards fragments that are outside of the scissor rectangle. Defaults to False.
-            stencil_test (bool, optional): Activates stencil testing and updates to the stencil buffer. Defaults to False.
-            rasterizer_discard (bool, optional): Primitives are discarded immediately before the rasterization stage, but after the optional transform feedback stage. Defaults to False.
-        """
-        self._commands.append({'cmd':'enable', 
-        'blend':blend,
-        'cull_face':cull_face,
-        'depth_test':depth_test,
-        'dither':dither,
-        'polygon_offset_fill':polygon_offset_fill,
-        'sample_alpha_to_coverage':sample_alpha_to_coverage,
-        'sample_coverage':sample_coverage,
-        'scissor_test':scissor_test,
-        'stencil_test':stencil_test,
-        'rasterizer_discard':rasterizer_discard
-        })
-
-
-    def disable(self, blend=False, cull_face=False, depth_test=False, dither=False, polygon_offset_fill=False, sample_alpha_to_coverage=False, sample_coverage=False, scissor_test=False, stencil_test=False, rasterizer_discard=False):
-        """Append a disable command to the commands buffer
-
-        Args:
-            blend (bool, optional): Deactivates  blending of the computed fragment color values. Defaults to False.
-            cull_face (bool, optional): Deactivates  culling of polygons. Defaults to False.
-            depth_test (bool, optional): Deactivates  depth comparisons and updates to the depth buffer. Defaults to False.
-            dither (bool, optional): Deactivates  dithering of color components before they get written to the color buffer. Defaults to False.
-            polygon_offset_fill (bool, optional): Deactivates  adding an offset to depth values of polygon's fragments. Defaults to False.
-            sample_alpha_to_coverage (bool, optional): Deactivates  ates the computation of a temporary coverage value determined by the alpha value. Defaults to False.
-            sample_coverage (bool, optional): Deactivates  ANDing the fragment's coverage with the temporary coverage value. Defaults to False.
-            scissor_test (bool, optional): Deactivates  the scissor test that discards fragments that are outside of the scissor rectangle. Defaults to False.
-            stencil_test (bool, optional): Deactivates  stencil testing and updates to the stencil buffer. Defaults to False.
-            rasterizer_discard (bool, optional): Deactivates that primitives are discarded immediately before the rasterization stage, but after the optional transform feedback stage. Defaults to False.
-        """
-        self._commands.append({'cmd':'disable', 
-        'blend':blend,
-        'cull_face':cull_face,
-        'depth_test':depth_test,
-        'dither':dither,
-        'polygon_offset_fill':polygon_offset_fill,
-        'sample_alpha_to_coverage':sample_alpha_to_coverage,
-        'sample_coverage':sample_coverage,
-        'scissor_test':scissor_test,
-        'stencil_test':stencil_test,
-        'rasterizer_discard':rasterizer_discard
-        })
-
-
-    def clear_color(self, r:float, g:float, b:float, a:float):
-        """Append a clearColor command to the commands buffer.
-
-        Args:
-            r (float): red [0, 1]
-            g (float): green [0, 1]
-            b (float): blue [0, 1]
-            a (float): alpha [0, 1]
-        """
-        self._commands.append({
-            'cmd':'clearColor', 
-            'r':float(r), 
-            'g':float(g), 
-            'b':float(b), 
-            'a':float(a)
-        })
-
-
-    def clear(self, color_bit_buffer=True, depth_buffer_bit=True, stencil_buffer_bit=False):
-        """Append a clear command to the commands buffer.
-        
-        Args:
-            color_bit_buffer (bool, optional): clear the depth buffer. Defaults to True.
-            depth_buffer_bit (bool, optional): clear the color buffer. Defaults to True.
-            stencil_buffer_bit (bool, optional): clear the stencil buffer.  Defaults to False.
-        """
-        self._commands.append({
-            'cmd':'clear', 
-            'depth':color_bit_buffer, 
-            'color':depth_buffer_bit, 
-            'stencil':stencil_buffer_bit
-        })
-
-
-    def cull_face(self, mode='BACK'):
-        """Append a cullFace command to the commands buffer
-
-        Polygon culling is disabled by default. To enable or disable culling, use the enable().
-
-        Args:
-            mode ({'FRONT', 'BACK', 'FRONT_AND_BACK'}, optional): specifying whether front- or back-facing polygons are candidates for culling. Defaults to 'BACK'.
-        """
-        if mode not in ['FRONT', 'BACK', 'FRONT_AND_BACK']:
-            raise AttributeError('Invalid mode')
-        self._commands.append({
-            'cmd':'cullFace', 
-            'mode':mode
-        })
-
-
-    def front_face(self, mode='CCW'):
-        """Append a frontFace command to the commands buffer
-
-        Args:
-            mode ({'CW', 'CCW'}, optional): type winding orientation. Defaults to 'CCW'.
-        """
-        if mode not in ['CW', 'CCW']:
-            raise AttributeError('Invalid mode')
-        self.commands.append({
-            'cmd':'frontFace', 
-            'mode':mode
-        })
-
-
-    def depth_func(self, func='LESS'):
-        """Append a depthFunc command to the commands buffer
-
-         specifying the depth comparison function, which sets the conditions under which the pixel will be drawn.
-        
-        Args:
-            func ({'NEVER', 'LESS', 'EQUAL', 'LEQUAL', 'GREATER', 'NOTEQUAL', 'GEQUAL', 'ALWAYS'}, optional): Defaults to 'LESS'.
-        """
-        if func not in ['NEVER', 'LESS', 'EQUAL', 'LEQUAL', 'GREATER', 'NOTEQUAL', 'GEQUAL', 'ALWAYS']:
-            raise AttributeError("Invalid function")
-        self._commands.append({
-            'cmd':'depthFunc', 
-            'func':func
-        })
-
-    def depth_mask(self, flag=True):
-        """Append a depthMask command to the commands buffer.
-
-        Args:
-            flag (bool, optional): specifying whether or not writing into the depth buffer is enabled. Defaults to True.
-        """
-        self._commands.append({
-            'cmd':'depthMask', 
-            'flag':flag
-        })
-
-    def depth_range(self, z_near=0.0, z_far=1.0):
-        """Append a depthRange command to the commands buffer.
-
-        Args:
-            z_near (float, optional): specifying the mapping of the near clipping plane to window or viewport coordinates. Clamped to the range 0 to 1 and must be less than or equal to z_far. Defaults to 0.0.
-            z_far (float, optional): specifying the mapping of the far clipping plane to window or viewport coordinates. Clamped to the range 0 to 1. Defaults to 1.0.
-        """
-        self._commands.append({
-            'cmd':'depthRange', 
-            'z_near':z_near, 
-            'z_far':z_far
-        })
-
-    def blend_color(self, r:float, g:float, b:float, a:float):
-        """Append a blendColor command to the commands buffer.
-
-        Args:
-            r (float): red [0, 1]
-            g (float): green [0, 1]
-            b (float): blue [0, 1]
-            a (float): alpha [0, 1]
-        """
-        self._commands.append({
-            'cmd':'blendColor', 
-            'r':float(r), 
-            'g':float(g), 
-            'b':float(b), 
-            'a':float(a)
-        })
-
-    def blend_equation(self, mode:str):
-        """Append a blendEquation to the command buffer.
-
-        ['FUNC_ADD', 'FUNC_SUBTRACT', 'FUNC_REVERSE_SUBTRACT', 'MIN', 'MAX']
-
-        Args:
-            mode (str): how source and destination colors are combined
-        """
-        if mode not in ['FUNC_ADD', 'FUNC_SUBTRACT', 'FUNC_REVERSE_SUBTRACT', 'MIN', 'MAX']:
-            raise AttributeError("Invalid mode")
-
-        self._commands.append({
-            'cmd':'blendEquation', 
-            'mode' : mode
-        })
-
-    def blend_equation_separate(self, mode_rgb:str, mode_alpha:str):
-        """Append a blendEquationSeparate to the command buffer
-
-        ['FUNC_ADD', 'FUNC_SUBTRACT', 'FUNC_REVERSE_SUBTRACT', 'MIN', 'MAX']
-
-        Args:
-            mode_rgb (str):  how the red, green and blue components of source and destination colors are combined
-            mode_alpha (str): how the alpha component (transparency) of source and destination colors are combined
-        """
-        if mode_rgb not in ['FUNC_ADD', 'FUNC_SUBTRACT', 'FUNC_REVERSE_SUBTRACT', 'MIN', 'MAX']:
-            raise AttributeError("Invalid mode rgb")
-        if mode_alpha not in ['FUNC_ADD', 'FUNC_SUBTRACT', 'FUNC_REVERSE_SUBTRACT', 'MIN', 'MAX']:
-            raise AttributeError("Invalid mode alpha")
-        self._commands.append({
-            'cmd':'blendEquationSeparate', 
-            'mode_rgb' : mode_rgb,
-            'mode_alpha' : mode_alpha
-        })
+    def _create_resource(self, kind:str):
+        """create the python side of a resource, either a widget or a lightweight handle"""
+        if self._free_uids:
+            uid = self._free_uids.pop()
+        else:
+            uid = len(self._resources)
+            self._resources.append(None)
+
+        if self.lightweight_resources:
+            resource = GLResourceHandle(self, uid, kind)
+            if self.auto_delete_resources:
+                self._resources[uid] = weakref.ref(resource, partial(self._collect_resource, uid, kind))
+                return resource
+        else:
+            resource = GLResourceWidget(_context=self, uid=uid)
+        self._resources[uid] = resource
+        return resource
 
-    def blend_func(self, s_factor:str, d_factor:str):
-        """Append a blendFunc to the command buffer
 
-        ['ZERO', 'ONE', 'SRC_COLOR', 'ONE_MINUS_SRC_COLOR', 'DST_COLOR', 'ONE_MINUS_DST_COLOR', 'SRC_ALPHA', 'ONE_MINUS_SRC_ALPHA', 'DST_ALPHA', 'ONE_MINUS_DST_ALPHA', 'CONSTANT_COLOR', 'ONE_MINUS_CONSTANT_COLOR', 'CONSTANT_ALPHA', 'ONE_MINUS_CONSTANT_ALPHA', 'SRC_ALPHA_SATURATE']
+    def _collect_resource(self, uid:int, kind:str, ref):
+        """called when an auto deleted handle is garbage collected"""
+        # the slot can already be released (deleted explicitly) and even reused
+        if self._resources[uid] is ref:
+            self._resources[uid] = None
+            self._collected_resources.append({'cmd':self._delete_commands[kind], 'resource':uid})
 
-        Args:
-            s_factor (str): a multiplier for the source blending factors
-            d_factor (str): a multiplier for the destination blending factors
 
-        Raises:
-            AttributeError: s_factor
-            AttributeError: d_factor
-        """
+    def _release_resource(self, resource, command:str):
+        """release a resource that is being deleted, its delete command is sent once with the collected ones"""
+        uid = resource.uid
+        if self.resource(uid) is not resource:
+            raise AttributeError("Invalid resource, it is not used by this viewer")
 
-        if s_factor not in ['ZERO', 'ONE', 'SRC_COLOR', 'ONE_MINUS_SRC_COLOR', 'DST_COLOR', 'ONE_MINUS_DST_COLOR', 'SRC_ALPHA', 'ONE_MINUS_SRC_ALPHA', 'DST_ALPHA', 'ONE_MINUS_DST_ALPHA', 'CONSTANT_COLOR', 'ONE_MINUS_CONSTANT_COLOR', 'CONSTANT_ALPHA', 'ONE_MINUS_CONSTANT_ALPHA', 'SRC_ALPHA_SATURATE']:
-            raise AttributeError("Invalid s_factor")
-        if d_factor not in ['ZERO', 'ONE', 'SRC_COLOR', 'ONE_MINUS_SRC_COLOR', 'DST_COLOR', 'ONE_MINUS_DST_COLOR', 'SRC_ALPHA', 'ONE_MINUS_SRC_ALPHA', 'DST_ALPHA', 'ONE_MINUS_DST_ALPHA', 'CONSTANT_COLOR', 'ONE_MINUS_CONSTANT_COLOR', 'CONSTANT_ALPHA', 'ONE_MINUS_CONSTANT_ALPHA', 'SRC_ALPHA_SATURATE']:
-            raise AttributeError("Invalid d_factor")
-        self._commands.append({
-            'cmd':'blendFunc', 
-            's_factor' : s_factor,
-            'd_factor' : d_factor
-        })
+        self._resources[uid] = None
+        # the uid can only be reused once the delete command is sent
+        self._collected_resources.append({'cmd':command, 'resource':uid})
 
-    def blend_func_separate(self, src_rgb:str, dst_rgb:str, src_alpha:str, dst_alpha:str):
-        """Append a blendFuncSeparate to the command buffer
+        widget = resource if isinstance(resource, GLResourceWidget) else resource._widget
+        if widget is not None:
+            widget.close()
 
-        ['ZERO', 'ONE', 'SRC_COLOR', 'ONE_MINUS_SRC_COLOR', 'DST_COLOR', 'ONE_MINUS_DST_COLOR', 'SRC_ALPHA', 'ONE_MINUS_SRC_ALPHA', 'DST_ALPHA', 'ONE_MINUS_DST_ALPHA', 'CONSTANT_COLOR', 'ONE_MINUS_CONSTANT_COLOR', 'CONSTANT_ALPHA', 'ONE_MINUS_CONSTANT_ALPHA', 'SRC_ALPHA_SATURATE']
 
-        Args:
-            src_rgb (str): a multiplier for the source blending factors
-            dst_rgb (str): a multiplier for the destination blending factors
-            src_alpha (str): a multiplier for the source blending factors
-            dst_alpa (str): a multiplier for the destination blending factors
-        """
+    def _uniform_location(self, name:str) -> int:
+        """return the id of a uniform name, a new name is declared to the frontend immediately"""
+        location = self._uniform_locations.get(name)
+        if location is None:
+            location = len(self._uniform_locations)
+            self._uniform_locations[name] = location
+            self.send({'uniform_locations':{'first':location, 'names':[name]}})
+        return location
 
-        if src_rgb not in ['ZERO', 'ONE', 'SRC_COLOR', 'ONE_MINUS_SRC_COLOR', 'DST_COLOR', 'ONE_MINUS_DST_COLOR', 'SRC_ALPHA', 'ONE_MINUS_SRC_ALPHA', 'DST_ALPHA', 'ONE_MINUS_DST_ALPHA', 'CONSTANT_COLOR', 'ONE_MINUS_CONSTANT_COLOR', 'CONSTANT_ALPHA', 'ONE_MINUS_CONSTANT_ALPHA', 'SRC_ALPHA_SATURATE']:
-            raise AttributeError("Invalid src_rgb")
-        if dst_rgb not in ['ZERO', 'ONE', 'SRC_COLOR', 'ONE_MINUS_SRC_COLOR', 'DST_COLOR', 'ONE_MINUS_DST_COLOR', 'SRC_ALPHA', 'ONE_MINUS_SRC_ALPHA', 'DST_ALPHA', 'ONE_MINUS_DST_ALPHA', 'CONSTANT_COLOR', 'ONE_MINUS_CONSTANT_COLOR', 'CONSTANT_ALPHA', 'ONE_MINUS_CONSTANT_ALPHA', 'SRC_ALPHA_SATURATE']:
-            raise AttributeError("Invalid dst_rgb")
-        if src_alpha not in ['ZERO', 'ONE', 'SRC_COLOR', 'ONE_MINUS_SRC_COLOR', 'DST_COLOR', 'ONE_MINUS_DST_COLOR', 'SRC_ALPHA', 'ONE_MINUS_SRC_ALPHA', 'DST_ALPHA', 'ONE_MINUS_DST_ALPHA', 'CONSTANT_COLOR', 'ONE_MINUS_CONSTANT_COLOR', 'CONSTANT_ALPHA', 'ONE_MINUS_CONSTANT_ALPHA', 'SRC_ALPHA_SATURATE']:
-            raise AttributeError("Invalid src_alpha")
-        if dst_alpha not in ['ZERO', 'ONE', 'SRC_COLOR', 'ONE_MINUS_SRC_COLOR', 'DST_COLOR', 'ONE_MINUS_DST_COLOR', 'SRC_ALPHA', 'ONE_MINUS_SRC_ALPHA', 'DST_ALPHA', 'ONE_MINUS_DST_ALPHA', 'CONSTANT_COLOR', 'ONE_MINUS_CONSTANT_COLOR', 'CONSTANT_ALPHA', 'ONE_MINUS_CONSTANT_ALPHA', 'SRC_ALPHA_SATURATE']:
-            raise AttributeError("Invalid dst_alpha")
-        self._commands.append({
-            'cmd':'blendFuncSeparate', 
-            'src_rgb' : src_rgb,
-            'dst_rgb' : dst_rgb,
-            'src_alpha':src_alpha,
-            'dst_alpha':dst_alpha
-        })
-
-
-    def create_texture(self) -> GLResourceWidget:
-        """Append a createTexture command to the command list
 
-        Returns:
-            GLResourceWidget: the resource that will hold the texture
-        """
-        uid = len(self._resources)
-        resource = GLResourceWidget(_context=self, uid=uid)
-        self._resources.append(resource)
-        self._commands.append({
-            'cmd':'createTexture', 
-            'resource':uid
-        })
+    def resource(self, index):
+        """return the resource used by the viewer, None if it was deleted"""
+        resource = self._resources[index]
+        if isinstance(resource, weakref.ref):
+            return resource()
         return resource
 
+    def resource_count(self):
+        """return the number of resources used by the viewer"""
+        return sum(1 for index in range(len(self._resources)) if self.resource(index) is not None)
 
-    def bind_texture(self, target:str, texture:GLResourceWidget=None):
-        """Append a bindTexture command to the command list
-
-        Args:
-            target (str): the binding point ["TEXTURE_2D", "TEXTURE_CUBE_MAP", "TEXTURE_3D", "TEXTURE_2D_ARRAY"]
-            texture (GLResourceWidget): the texture resource
-        """
-        if target not in ["TEXTURE_2D", "TEXTURE_CUBE_MAP", "TEXTURE_3D", "TEXTURE_2D_ARRAY"]:
-            raise AttributeError("Invalid target")
-        uid = -1
-        if texture is not None:
-            uid = texture.uid
-        self._commands.append({
-            'cmd':'bindTexture', 
-            'texture':uid, 
-            'target':target
-        })
 
+    def execute_commands(self, execute_once=False, clear_previous=True, split_setup=False, render_pass='default'):
+        """Send the commands buffer to the webgl frontend.
 
-    def active_texture(self, texture:int):
-        """Append an activeTexture command
+        When the commands buffer is sent, it will be cleared.
+        You can then start to build a new commands buffer.
 
-        Args:
-            texture (int): The texture unit to make active. The value is a gl.TEXTURE0 + texture
-        """
-        self._commands.append({
-            'cmd':'activeTexture', 
-            'texture':texture, 
-        })
+        By default the command buffers will stay in memory in the frontend, so it can be reexecuted everytime you need to redraw the scene (camera move for instance)
+        If you set the execute_once to True, it will not be stored in the frontend.
 
+        If you set split_setup to True, the setup commands (create, delete, shader and program building, bufferData, texImage, texStorage, generateMipmap)
+        are executed once and dropped with their data, only the other commands are stored and replayed on redraw.
 
-    def generate_mipmap(self, target:str):
-        """Append a generateMipmap command
+        The stored commands belong to a named render pass, clear_previous only replaces the commands of that pass.
+        On redraw the frontend replays all the enabled passes in order, see set_pass_order, enable_pass and remove_pass.
 
         Args:
-            target (str): the binding point ["TEXTURE_2D", "TEXTURE_CUBE_MAP", "TEXTURE_3D", "TEXTURE_2D_ARRAY"]
+            execute_once (bool, optional): Do we execute this only once. Defaults to False.
+            clear_previous (bool, optional): Do we replace the current commands or just append?. Defaults to False.
+            split_setup (bool, optional): Do we execute the setup commands only once and only keep the draw commands. Defaults to False.
+            render_pass (str, optional): the name of the render pass the commands are stored in. Defaults to 'default'.
         """
-        if target not in ["TEXTURE_2D", "TEXTURE_CUBE_MAP", "TEXTURE_3D", "TEXTURE_2D_ARRAY"]:
-            raise AttributeError("Invalid target")
-        self._commands.append({
-            'cmd':'generateMipmap',  
-            'target':target
-        })
-
-
-    def tex_image_2d(self, target:str, level:int, internal_format:str, width:int, height:int, border:int, format:str, data_type:str, pixel:np.array):
-        """Append a texImage2D command
-
-        target = ['TEXTURE_2D', 'TEXTURE_CUBE_MAP_POSITIVE_X', 'TEXTURE_CUBE_MAP_NEGATIVE_X', 'TEXTURE_CUBE_MAP_POSITIVE_Y', 'TEXTURE_CUBE_MAP_NEGATIVE_Y', 'TEXTURE_CUBE_MAP_POSITIVE_Z', 'TEXTURE_CUBE_MAP_NEGATIVE_Z']
-        
-        internal_format = ['RGBA', 'RGB', 'LUMINANCE_ALPHA', 'LUMINANCE', 'ALPHA',
-        'R8', 'R8_SNORM', 'RG8', 'RG8_SNORM', 'RGB8', 'RGB8_SNORM', 'RGB565', 'RGBA4', 'RGB5_A1', 'RGBA8', 'RGBA8_SNORM', 'RGB10_A2', 'RGB10_A2UI', 'SRGB8', 'SRGB8_ALPHA8',
-        'R16F', 'RG16F', 'RGB16F', 'RGBA16F', 'R32F', 'RG32F', 'RGB32F', 'RGBA32F', 'R11F_G11F_B10F', 'RGB9_E5',
-        'R8I', 'R8UI', 'R16I', 'R16UI', 'R32I', 'R32UI', 'RG8I', 'RG8UI', 'RG16I', 'RG16UI', 'RG32I', 'RG32UI', 
-        'RGB8I', 'RGB8UI', 'RGB16I', 'RGB16UI', 'RGB32I', 'RGB32UI', 'RGBA8I', 'RGBA8UI', 'RGBA16I', 'RGBA16UI', 'RGBA32I', 'RGBA32UI',
-        'DEPTH_COMPONENT24', 'DEPTH_COMPONENT32F', 'DEPTH32F_STENCIL8', 'DEPTH24_STENCIL8']
-
-        format = ['RGB', 'RGBA', 'LUMINANCE_ALPHA', 'LUMINANCE', 'ALPHA', 'RED', 'RED_INTEGER', 'RG', 'RG_INTEGER', 'RGB', 'RGB_INTEGER', 'RGBA_INTEGER', 'DEPTH_COMPONENT']
-
-        data_type = ['UNSIGNED_BYTE', 'UNSIGNED_SHORT_5_6_5', 'UNSIGNED_SHORT_4_4_4_4', 'UNSIGNED_SHORT_5_5_5_1', 'BYTE', 'UNSIGNED_SHORT', 'SHORT', 'UNSIGNED_INT', 'INT', 'HALF_FLOAT', 'FLOAT', 'UNSIGNED_INT_2_10_10_10_REV', 'UNSIGNED_INT_10F_11F_11F_REV', 'UNSIGNED_INT_5_9_9_9_REV', 'UNSIGNED_INT_24_8', 'FLOAT_32_UNSIGNED_INT_24_8_REV']
-
-        link between internal_format, format and type;
-        https://registry.khronos.org/webgl/specs/latest/2.0/#TEXTURE_TYPES_FORMATS_FROM_DOM_ELEMENTS_TABLE
+        self._submit_commands(self._commands, self._buffers, execute_once, clear_previous, split_setup, render_pass)
+        self.clear_commands()
 
-        Args:
-            target (str): the binding point (target) of the active texture
-            level (int): the level of detail. Level 0 is the base image level and level n is the n-th mipmap reduction level.
-            internal_format (str): the color components in the texture
-            width (int): the width of the texture.
-            height (int): the height of the texture.
-            border (int): specifying the width of the border. Must be 0.
-            format (str):  the format of the texel data
-            data_type (str): the data type of the texel data
-            pixel (np.array): the buffer
-        """
-        if target not in ['TEXTURE_2D', 'TEXTURE_CUBE_MAP_POSITIVE_X', 'TEXTURE_CUBE_MAP_NEGATIVE_X', 'TEXTURE_CUBE_MAP_POSITIVE_Y', 'TEXTURE_CUBE_MAP_NEGATIVE_Y', 'TEXTURE_CUBE_MAP_POSITIVE_Z', 'TEXTURE_CUBE_MAP_NEGATIVE_Z']:
-            raise AttributeError("Invalid target")
 
-        if internal_format not in [
-            'RGBA', 'RGB', 'LUMINANCE_ALPHA', 'LUMINANCE', 'ALPHA',
-            'R8', 'R8_SNORM', 'RG8', 'RG8_SNORM', 'RGB8', 'RGB8_SNORM', 'RGB565', 'RGBA4', 'RGB5_A1', 'RGBA8', 'RGBA8_SNORM', 'RGB10_A2', 'RGB10_A2UI', 'SRGB8', 'SRGB8_ALPHA8',
-            'R16F', 'RG16F', 'RGB16F', 'RGBA16F', 'R32F', 'RG32F', 'RGB32F', 'RGBA32F', 'R11F_G11F_B10F', 'RGB9_E5',
-            'R8I', 'R8UI', 'R16I', 'R16UI', 'R32I', 'R32UI', 'RG8I', 'RG8UI', 'RG16I', 'RG16UI', 'RG32I', 'RG32UI', 
-            'RGB8I', 'RGB8UI', 'RGB16I', 'RGB16UI', 'RGB32I', 'RGB32UI', 'RGBA8I', 'RGBA8UI', 'RGBA16I', 'RGBA16UI', 'RGBA32I', 'RGBA32UI',
-            'DEPTH_COMPONENT16', 'DEPTH_COMPONENT24', 'DEPTH_COMPONENT32F', 'DEPTH32F_STENCIL8', 'DEPTH24_STENCIL8']:
-            raise AttributeError("Invalid internal_format")
-
-        if format not in ['RGB', 'RGBA', 'LUMINANCE_ALPHA', 'LUMINANCE', 'ALPHA', 'RED', 'RED_INTEGER', 'RG', 'RG_INTEGER', 'RGB', 'RGB_INTEGER', 'RGBA_INTEGER', 'DEPTH_COMPONENT']:
-            raise AttributeError("Invalid format")
-
-        if data_type not in ['UNSIGNED_BYTE', 'UNSIGNED_SHORT_5_6_5', 'UNSIGNED_SHORT_4_4_4_4', 'UNSIGNED_SHORT_5_5_5_1', 'BYTE', 'UNSIGNED_SHORT', 'SHORT', 'UNSIGNED_INT', 'INT', 'HALF_FLOAT', 'FLOAT', 'UNSIGNED_INT_2_10_10_10_REV', 'UNSIGNED_INT_10F_11F_11F_REV', 'UNSIGNED_INT_5_9_9_9_REV', 'UNSIGNED_INT_24_8', 'FLOAT_32_UNSIGNED_INT_24_8_REV']:
-            raise AttributeError("Invalid data_type")
-
-        if pixel is not None:
-            meta_data = {}
-            buffer = []
-            meta_data, buffer = array_to_buffer(pixel)
-            meta_data['index'] = len(self._buffers)
-            self._buffers.append(buffer)
-            self._commands.append({
-                'cmd':'texImage2D', 
-                'target':target,
-                'level': level,
-                'internal_format':internal_format, 
-                'width':width, 
-                'height':height, 
-                'border':border,
-                'format':format,
-                'data_type':data_type,
-                'buffer_metadata':meta_data
-            })
+    def _submit_commands(self, commands, buffers, execute_once, clear_previous, split_setup, render_pass):
+        """send a commands buffer, then the pending deletions, and free their uids"""
+        start = time.perf_counter()
+        # the request of a readPixels is answered once, a replayed command would answer a dead request
+        reads = [command['request'] for command in commands if command['cmd'] == 'readPixels']
+        if reads and not execute_once:
+            raise Exception("read_pixels can only be sent with execute_once=True")
+        for request in reads:
+            if request in self._sent_reads or request not in self._requests:
+                raise Exception("read_pixels was already sent, record it again to read the pixels again")
+        self._sent_reads.update(reads)
+
+        if self.optimize_state_changes:
+            optimize_start = time.perf_counter()
+            commands, removed = optimize_state_changes(commands, split_setup)
+            self.send_stats['removed_commands'] += removed
+            self.send_stats['optimize_time'] += time.perf_counter() - optimize_start
+        self._send_commands(commands, buffers, execute_once, clear_previous, split_setup, render_pass)
+
+        if self._collected_resources:
+            # the deleted and garbage collected resources, after the commands that can still use them
+            # they are executed once, and their uids can only be reused once the deletes are sent
+            collected = self._collected_resources
+            self._collected_resources = []
+            self._send_commands(collected, [], True, False)
+            self._free_uids.extend([command['resource'] for command in collected])
+        self.send_stats['submit_time'] += time.perf_counter() - start
+
+
+    def _send_commands(self, commands, buffers, execute_once, clear_previous, split_setup=False, render_pass='default', ack=None, cache=True, resend=None):
+        """send a list of commands and its buffers to the frontend, with ack the frontend answers once the commands are executed.
+        With cache False the buffers are always sent and not added to the upload cache, resend is the id of a message the frontend could not execute."""
+        start = time.perf_counter()
+        stats = self.send_stats
+        cache_seq = None
+        if cache and self.upload_cache_size > 0 and buffers and len(self._cached_messages) < MAX_PENDING_MESSAGES:
+            # past MAX_PENDING_MESSAGES unconfirmed messages, the buffers are sent without the cache and nothing is kept
+            original = ([dict(command) for command in commands], list(buffers), execute_once, clear_previous, split_setup, render_pass, ack)
+            commands, buffers, hits, saved = self._upload_cache.filter(commands, buffers)
+            stats['cache_hits'] += hits
+            stats['cache_bytes'] += saved
+            if hits:
+                # kept until the frontend confirms it has the cached buffers, it is sent again with the bytes otherwise
+                self._cache_seq += 1
+                cache_seq = self._cache_seq
+                self._cached_messages[cache_seq] = original
+
+        if self.binary_commands:
+            keys, names, stream = encode_commands(commands)
+            buffers = buffers + [stream]
+            encode_time = time.perf_counter() - start
+            message = {
+                'binary_commands':{'keys':keys, 'names':names, 'index':len(buffers) - 1},
+                'only_once':execute_once,
+                'clear':clear_previous,
+                'split_setup':split_setup,
+                'pass':render_pass
+            }
         else:
-            self._commands.append({
-                'cmd':'texImage2D', 
-                'target':target,
-                'level': level,
-                'internal_format':internal_format, 
-                'width':width, 
-                'height':height, 
-                'border':border,
-                'format':format,
-                'data_type':data_type,
-            })
+            encode_time = 0.0
+            message = {'commands':commands, 'only_once':execute_once, 'clear':clear_previous, 'split_setup':split_setup, 'pass':render_pass}
+        if ack is not None:
+            message['ack'] = ack
+        if cache_seq is not None:
+            message['cache_seq'] = cache_seq
+        if resend is not None:
+            message['resend'] = resend
+        self.send(message, buffers=buffers)
 
+        stats['messages'] += 1
+        stats['commands'] += len(commands)
+        stats['buffers'] += len(buffers)
+        stats['bytes'] += sum(memoryview(buffer).nbytes for buffer in buffers)
+        stats['encode_time'] += encode_time
+        stats['send_time'] += time.perf_counter() - start
 
-    def tex_storage_2d(self, target:str, levels:int, internal_format:str, width:int, height:int):
-        """append a texStorage2D command
 
-        internal format : ["R8", "R16F", "R32F", "R8UI", "RG8", "RG16F", "RG32F", "RG8UI", "RGB8", "SRGB8", "RGB565", "R11F_G11F_B10F", "RGB9_E5", "RGB16F", "RGB32F", "RGB8UI", "RGBA8", "SRGB8_ALPHA8", "RGB5_A1", "RGBA4", "RGBA16F", "RGBA32F", "RGBA8UI",
-            'DEPTH_COMPONENT16', 'DEPTH_COMPONENT24', 'DEPTH_COMPONENT32F', 'DEPTH32F_STENCIL8', 'DEPTH24_STENCIL8']
+    def reset_send_stats(self):
+        """Reset the counters of what was sent to the frontend.
 
-        Args:
-            target (str): 'TEXTURE_2D', 'TEXTURE_CUBE_MAP'
-            levels (int): the number of mipmap
-            internal_format (str): the internal format
-            width (int): the width of the texture
-            height (int): the heifht of the texture
-
-        Raises:
-            AttributeError: _description_
-            AttributeError: _description_
+        send_stats holds the number of messages, commands and buffers sent, the bytes of the buffers,
+        the time spent encoding the binary commands and the total time spent sending (encoding included) in seconds,
+        the number of buffers found in the upload cache and the bytes that were not sent because of it,
+        the number of redundant binding commands removed by optimize_state_changes and the time spent removing them,
+        and the total time spent in python by execute_commands (checks, optimization, upload cache, encoding and sending) in seconds.
+        Compare submit_time with the frame_ms of frame_stats to see which side is the bottleneck.
         """
-        if target not in ['TEXTURE_2D', 'TEXTURE_CUBE_MAP']:
-            raise AttributeError("Invalid target")
-        if internal_format not in ["R8", "R16F", "R32F", "R8UI", "RG8", "RG16F", "RG32F", "RG8UI", "RGB8", "SRGB8", "RGB565", "R11F_G11F_B10F", "RGB9_E5", "RGB16F", "RGB32F", "RGB8UI", "RGBA8", "SRGB8_ALPHA8", "RGB5_A1", "RGBA4", "RGBA16F", "RGBA32F", "RGBA8UI",
-            'DEPTH_COMPONENT16', 'DEPTH_COMPONENT24', 'DEPTH_COMPONENT32F', 'DEPTH32F_STENCIL8', 'DEPTH24_STENCIL8']:
-            raise AttributeError("Invalid internal_format")
-
-        self._commands.append({
-            'cmd':'texStorage2D', 
-            'target':target,
-            'levels':levels,
-            'internal_format':internal_format,
-            'width':width,
-            'height':height
-        })
-
-    def tex_image_3d(self, target:str, level:int, internal_format:str, width:int, height:int, depth:int, border:int, format:str, data_type:str, pixel:np.array):
-        """Append a texImage3D command
-
-        target = ['TEXTURE_3D', 'TEXTURE_2D_ARRAY']
-        
-        internal_format = ['RGBA', 'RGB', 'LUMINANCE_ALPHA', 'LUMINANCE', 'ALPHA',
-        'R8', 'R16F', 'R32F', 'R8UI', 'RG8', 'RG16F', 'RG32F', 'RGUI', 'RGB8', 'SRGB8', 'RGB565', 'R11F_G11F_B10F',
-        'RGB9_E5', 'RGB16F', 'RGB32F', 'RGB8UI', 'RGBA8', 'SRGB8_ALPHA8', 'RGB5_A1', 'RGBA4444', 'RGBA16F', 'RGBA32F', 'RGBA8UI']
+        self.send_stats = {
+            'messages':0,
+            'commands':0,
+            'buffers':0,
+            'bytes':0,
+            'encode_time':0.0,
+            'send_time':0.0,
+            'cache_hits':0,
+            'cache_bytes':0,
+            'removed_commands':0,
+            'optimize_time':0.0,
+            'submit_time':0.0,
+        }
 
-        format = ['RGB', 'RGBA', 'LUMINANCE_ALPHA', 'LUMINANCE', 'ALPHA', 'RED', 'RED_INTEGER', 'RG', 'RG_INTEGER', 'RGB', 'RGB_INTEGER', 'RGBA_INTEGER']
 
-        data_type = ['UNSIGNED_BYTE', 'UNSIGNED_SHORT_5_6_5', 'UNSIGNED_SHORT_4_4_4_4', 'UNSIGNED_SHORT_5_5_5_1', 'BYTE', 'UNSIGNED_SHORT', 'SHORT', 'UNSIGNED_INT', 'INT', 'HALF_FLOAT', 'FLOAT', 'UNSIGNED_INT_2_10_10_10_REV', 'UNSIGNED_INT_10F_11F_11F_REV', 'UNSIGNED_INT_5_9_9_9_REV', 'UNSIGNED_INT_24_8', 'FLOAT_32_UNSIGNED_INT_24_8_REV']
+    def set_pass_order(self, names):
+        """Set the order in which the render passes are replayed.
 
-        link between internal_format, format and type;
-        https://registry.khronos.org/webgl/specs/latest/2.0/#TEXTURE_TYPES_FORMATS_FROM_DOM_ELEMENTS_TABLE
+        The passes that are not in the list are replayed after, in their current order.
+        This is sent to the frontend immediately, it is not added to the commands buffer.
 
         Args:
-            target (str): the binding point (target) of the active texture
-            level (int): the level of detail. Level 0 is the base image level and level n is the n-th mipmap reduction level.
-            internal_format (str): the color components in the texture
-            width (int): the width of the texture.
-            height (int): the height of the texture.
-            depth (int): the depth of the texture.
-            border (int): specifying the width of the border. Must be 0.
-            format (str):  the format of the texel data
-            data_type (str): the data type of the texel data
-            pixel (np.array): the buffer
+            names (list of str): the names of the render passes
         """
-        if target not in ['TEXTURE_3D', 'TEXTURE_2D_ARRAY']:
-            raise AttributeError("Invalid target")
+        self.send({'pass_control':{'order':list(names)}})
 
-        if internal_format not in ['RGBA', 'RGB', 'LUMINANCE_ALPHA', 'LUMINANCE', 'ALPHA',
-            'R8', 'R16F', 'R32F', 'R8UI', 'RG8', 'RG16F', 'RG32F', 'RGUI', 'RGB8', 'SRGB8', 'RGB565', 'R11F_G11F_B10F',
-            'RGB9_E5', 'RGB16F', 'RGB32F', 'RGB8UI', 'RGBA8', 'SRGB8_ALPHA8', 'RGB5_A1', 'RGBA4444', 'RGBA16F', 'RGBA32F', 'RGBA8UI']:
-            raise AttributeError("Invalid internal_format")
-
-        if format not in ['RGB', 'RGBA', 'LUMINANCE_ALPHA', 'LUMINANCE', 'ALPHA', 'RED', 'RED_INTEGER', 'RG', 'RG_INTEGER', 'RGB', 'RGB_INTEGER', 'RGBA_INTEGER']:
-            raise AttributeError("Invalid format")
-
-        if data_type not in ['UNSIGNED_BYTE', 'UNSIGNED_SHORT_5_6_5', 'UNSIGNED_SHORT_4_4_4_4', 'UNSIGNED_SHORT_5_5_5_1', 'BYTE', 'UNSIGNED_SHORT', 'SHORT', 'UNSIGNED_INT', 'INT', 'HALF_FLOAT', 'FLOAT', 'UNSIGNED_INT_2_10_10_10_REV', 'UNSIGNED_INT_10F_11F_11F_REV', 'UNSIGNED_INT_5_9_9_9_REV', 'UNSIGNED_INT_24_8', 'FLOAT_32_UNSIGNED_INT_24_8_REV']:
-            raise AttributeError("Invalid data_type")
-
-        if pixel is not None:
-            meta_data = {}
-            buffer = []
-            meta_data, buffer = array_to_buffer(pixel)
-            meta_data['index'] = len(self._buffers)
-            self._buffers.append(buffer)
-            self._commands.append({
-                'cmd':'texImage3D', 
-                'target':target,
-                'level': level,
-                'internal_format':internal_format, 
-                'width':width, 
-                'height':height, 
-                'border':border,
-                'depth':depth,
-                'format':format,
-                'data_type':data_type,
-                'buffer_metadata':meta_data
-            })
-        else:
-            self._commands.append({
-                'cmd':'texImage3D', 
-                'target':target,
-                'level': level,
-                'internal_format':internal_format, 
-                'width':width, 
-                'height':height, 
-                'border':border,
-                'depth':depth,
-                'format':format,
-                'data_type':data_type,
-            })
 
+    def enable_pass(self, name:str, enabled=True):
+        """Enable or disable a render pass, a disabled pass keeps its commands but is not replayed.
 
-    def tex_storage_3d(self, target:str, levels:int, internal_format:str, width:int, height:int, depth:int):
-        """Append a texStorage3D command
+        This is sent to the frontend immediately, it is not added to the commands buffer.
 
         Args:
-            target (str): 'TEXTURE_3D', 'TEXTURE_2D_ARRAY'
-            levels (int): the number of mipmap
-            internal_format (str): the internal format
-            width (int): the width of the texture
-            height (int): the heifht of the texture
-
-        Raises:
-            AttributeError: _description_
-            AttributeError: _description_
+            name (str): the name of the render pass
+            enabled (bool, optional): do we replay the pass. Defaults to True.
         """
-        if target not in ['TEXTURE_3D', 'TEXTURE_2D_ARRAY']:
-            raise AttributeError("Invalid target")
-        if internal_format not in ["R8", "R16F", "R32F", "R8UI", "RG8", "RG16F", "RG32F", "RG8UI", "RGB8", "SRGB8", "RGB565", "R11F_G11F_B10F", "RGB9_E5", "RGB16F", "RGB32F", "RGB8UI", "RGBA8", "SRGB8_ALPHA8", "RGB5_A1", "RGBA4", "RGBA16F", "RGBA32F", "RGBA8UI"]:
-            raise AttributeError("Invalid internal_format")
-
-        self._commands.append({
-            'cmd':'texStorage3D', 
-            'target':target,
-            'levels':levels,
-            'internal_format':internal_format,
-            'width':width,
-            'height':height,
-            'depth':depth
-        })
+        self.send({'pass_control':{'enabled':{name:enabled}}})
 
 
-    def tex_parameter(self, target:str, pname:str, param):
-        """Append a texParameteri or texParameterf to the command list
+    def remove_pass(self, name:str):
+        """Remove a render pass and its commands from the frontend.
 
-        pname = ["TEXTURE_MAG_FILTER", "TEXTURE_MIN_FILTER", "TEXTURE_WRAP_S", "TEXTURE_WRAP_T", 
-            'TEXTURE_BASE_LEVEL', 'TEXTURE_COMPARE_FUNC', 'TEXTURE_COMPARE_MODE', 'TEXTURE_MAX_LEVEL', 'TEXTURE_MAX_LOD', 'TEXTURE_MIN_LOD', 'TEXTURE_WRAP_R']
-
-        param = int or float or ['LINEAR', 'NEAREST', 'NEAREST_MIPMAP_NEAREST', 'LINEAR_MIPMAP_NEAREST', 'NEAREST_MIPMAP_LINEAR', 'LINEAR_MIPMAP_LINEAR',
-            'REPEAT', 'CLAMP_TO_EDGE', 'MIRRORED_REPEAT', 
-            'LEQUAL', 'GEQUAL', 'LESS', 'GREATER', 'EQUAL', 'NOTEQUAL', 'ALWAYS', 'NEVER',
-            'NONE', 'COMPARE_REF_TO_TEXTURE']
+        This is sent to the frontend immediately, it is not added to the commands buffer.
 
         Args:
-            target (str): the binding point ["TEXTURE_2D", "TEXTURE_CUBE_MAP", "TEXTURE_3D", "TEXTURE_2D_ARRAY"]
-            pname(str): the texture parameter to set.
-            param(str | int | float): the value for the specified parameter.
+            name (str): the name of the render pass
         """
-        if target not in ["TEXTURE_2D", "TEXTURE_CUBE_MAP", "TEXTURE_3D", "TEXTURE_2D_ARRAY"]:
-            raise AttributeError("Invalid target")
-        
-        if pname not in ["TEXTURE_MAG_FILTER", "TEXTURE_MIN_FILTER", "TEXTURE_WRAP_S", "TEXTURE_WRAP_T", 
-            'TEXTURE_BASE_LEVEL', 'TEXTURE_COMPARE_FUNC', 'TEXTURE_COMPARE_MODE', 'TEXTURE_MAX_LEVEL', 'TEXTURE_MAX_LOD', 'TEXTURE_MIN_LOD', 'TEXTURE_WRAP_R']:
-            raise AttributeError("Invalid pname")
-
-        if isinstance(param, int):
-            self._commands.append({
-                'cmd':'texParameteri', 
-                'target':target,
-                'pname':pname,
-                'param':param
-            })
-        elif isinstance(param, float):
-            self._commands.append({
-                'cmd':'texParameterf', 
-                'target':target,
-                'pname':pname,
-                'param':param
-            })
-        else:
-            if param not in ['LINEAR', 'NEAREST', 'NEAREST_MIPMAP_NEAREST', 'LINEAR_MIPMAP_NEAREST', 'NEAREST_MIPMAP_LINEAR', 'LINEAR_MIPMAP_LINEAR',
-                'REPEAT', 'CLAMP_TO_EDGE', 'MIRRORED_REPEAT', 
-                'LEQUAL', 'GEQUAL', 'LESS', 'GREATER', 'EQUAL', 'NOTEQUAL', 'ALWAYS', 'NEVER',
-                'NONE', 'COMPARE_REF_TO_TEXTURE']:
-                raise AttributeError("Invalid param")
-            self._commands.append({
-                'cmd':'texParameter_str', 
-                'target':target,
-                'pname':pname,
-                'param':param
-            })
+        self.send({'pass_control':{'remove':[name]}})
 
 
-    def pixel_store_i(self, pname:str, param):
-        """Append a pixelStorei command
-        """
-        if pname not in ["PACK_ALIGNMENT", "UNPACK_ALIGNMENT", "UNPACK_FLIP_Y_WEBGL", "UNPACK_PREMULTIPLY_ALPHA_WEBGL", "UNPACK_COLORSPACE_CONVERSION_WEBGL", "PACK_ROW_LENGTH", "PACK_SKIP_PIXELS", "PACK_SKIP_ROWS", "UNPACK_ROW_LENGTH", "UNPACK_IMAGE_HEIGHT", "UNPACK_SKIP_PIXELS", "UNPACK_SKIP_ROWS", "UNPACK_SKIP_IMAGES"]:
-            raise AttributeError("Invalid pname")
+    @validate('image_data_encoding')
+    def _validate_image_data_encoding(self, proposal):
+        if proposal['value'] not in IMAGE_ENCODINGS:
+            raise TraitError(f"Invalid image_data_encoding, it must be one of {IMAGE_ENCODINGS}")
+        return proposal['value']
 
-        if pname == "UNPACK_COLORSPACE_CONVERSION_WEBGL" and param not in ["BROWSER_DEFAULT_WEBGL", "NONE"]:
-            raise AttributeError("Invalid param")
 
-        self._commands.append({
-            'cmd':'pixelStorei', 
-            'pname':target,
-            'param':param,
-        })
+    @observe('upload_cache_size')
+    def _upload_cache_size_changed(self, change):
+        # the frontend applies the same budget when it receives the change
+        self._upload_cache.set_budget(change['new'])
 
 
-    def create_shader(self, shadertype:str) -> GLResourceWidget:
-        """Append a createShader command to the command list
+    @observe('image_data')
+    def _image_data_changed(self, change):
+        # the rows encoded frames only hold the changes, they must all be applied in order
+        if change['new'] is not None and self.image_data_encoding == 'rows':
+            self._image_rows = decode_rows(change['new'], self._image_rows)
 
-        Args:
-            shadertype (str): type of shader ["VERTEX_SHADER" or "FRAGMENT_SHADER"]
 
-        Returns:
-            GLResourceWidget: the resource that will hold the shader
-        """
-        if shadertype not in ["VERTEX_SHADER", "FRAGMENT_SHADER"]:
-            raise AttributeError("Invalid type")
-
-        uid = len(self._resources)
-        resource = GLResourceWidget(_context=self, uid=uid)
-        self._resources.append(resource)
-        self._commands.append({
-            'cmd':'createShader', 
-            'type':shadertype, 
-            'resource':uid
-        })
-        return resource
+    def _decoded_image_data(self) -> np.ndarray:
+        """return the last image_data decoded, the first row is the top of the image"""
+        encoding = self.image_data_encoding
+        if encoding == 'raw':
+            return np.frombuffer(self.image_data, dtype=np.uint8).reshape(self.height, self.width, 4)[::-1]
+        if encoding == 'rows':
+            if self._image_rows is None:
+                raise Exception('no image data decoded with the rows encoding, please render to canvas after setting the image_data_encoding')
+            return self._image_rows[::-1]
+        if self._image_source is not self.image_data:
+            self._image_decoded = decode_image(self.image_data)
+            self._image_source = self.image_data
+        return self._image_decoded
 
 
-    def shader_source(self, shader:GLResourceWidget, source:str):
-        """Append a shaderSource command to the buffer.
-        Sets the source code for a shader object.
-
-        Args:
-            shader (GLResourceWidget): a resource with a shader.
-            source (str): A string of GLSL code that defines the shader.
-        """
-        self._commands.append({
-            'cmd':'shaderSource', 
-            'shader':shader.uid, 
-            'source':source
-        })
+    def get_image_data(self, out:np.ndarray=None, cached=False) -> np.ndarray:
+        """Get the last rendered image as a numpy array.
 
+        By default this returns a read only view on the synced bytes, flipped so the first row is the top of the image.
+        No copy is made, the view keeps the immutable image_data bytes alive, so it stays valid and keeps showing
+        the frame it was taken from when the next images are synced.
+        With the 'rows' image_data_encoding it is a view on an array updated in place by each frame, so it shows the later frames too,
+        use out or cached to keep a frame. With the 'png', 'jpeg' and 'webp' encodings the image is decoded once for each frame.
 
-    def compile_shader(self, shader:GLResourceWidget):
-        """
-        Append a compileShader command to the command buffer.
-        
         Args:
-            shader (GLResourceWidget): a resource with a shader.
-        """
-        self._commands.append({
-            'cmd':'compileShader', 
-            'shader':shader.uid
-        })
-
-
-    def create_program(self) -> GLResourceWidget:
-        """Append a createProgram command to the command list
+            out (np.ndarray, optional): a (height, width, 4) uint8 array to copy the image into. Defaults to None.
+            cached (bool, optional): copy the image into an array owned by the viewer and reused between calls. Defaults to False.
 
         Returns:
-            GLResourceWidget: the resource that will hold the program
+            np.ndarray: the (height, width, 4) uint8 image
         """
-        uid = len(self._resources)
-        resource = GLResourceWidget(_context=self, uid=uid)
-        self._resources.append(resource)
-        self._commands.append({
-            'cmd':'createProgram', 
-            'resource':uid
-        })
-        return resource
-
-
-    def create_program_ext(self, vertex_source:str, fargment_source:str, attribute_location:{}=None, auto_execute=True) -> GLResourceWidget:
-        """Extended function to quickly create a program
-
-            This will build the command buffer with all the needed commands for you.
-            It creates the shaders, compiles them, creates the program, and links it.
-
-            And if the auto_execute is on, it will send the command buffer to the frontend.
-
-        Args:
-            vertex_source (str): the vertex source code
-            fargment_source (str): the shader source code
-            attribute_location( {str:int, ..}): the force attribute location if we don't want to use the default location.
-            auto_execute (bool): do we execute all the commands automatically?
-
-        Returns:
-            GLResourceWidget: the resource that hold the program
-        """
-        vertex_shader = self.create_shader('VERTEX_SHADER')
-        self.shader_source(vertex_shader, vertex_source)
-        self.compile_shader(vertex_shader)
-        fragment_shader = self.create_shader('FRAGMENT_SHADER')
-        self.shader_source(fragment_shader, fargment_source)
-        self.compile_shader(fragment_shader)
-        program = self.create_program()
-        self.attach_shader(program, vertex_shader)
-        self.attach_shader(program, fragment_shader)
-        if attribute_location is not None:
-            for key, value in attribute_location.items():
-                self.bind_attrib_location(program, value, key)
-
-        self.link_program(program)
-        self.use_program(None)
-
-        if auto_execute:
-            self.execute_commands(execute_once=True)
-
-        return program
-
-
-    def attach_shader(self, program:GLResourceWidget, shader:GLResourceWidget):
-        """Append a attachShader command to the command buffer
-
-        Args:
-            program (GLResourceWidget): the program
-            shader (GLResourceWidget): the shader
-
-        """
-        self._commands.append({'cmd':'attachShader', 'program':program.uid, 'shader':shader.uid})
-
-
-    def bind_attrib_location(self, program:GLResourceWidget, index, name):
-        """Append a bindAttribLocation command to the command buffer.
-
-        Args:
-            program (int): The WebGL program object.
-            index (int): The index of the attribute variable to assign to the bound location.
-            name (str): The name of the attribute variable.
-        """
-        self._commands.append({
-            'cmd':'bindAttribLocation', 
-            'program':program.uid, 
-            'index':index, 
-            'name':name
-        })
-
-
-    def link_program(self, program:GLResourceWidget):
-        """Append a linkProgram command to the command buffer
-
-        Args:
-            program (GLResourceWidget): the program to link
-        """
-        self._commands.append({'cmd':'linkProgram', 'program':program.uid})
-
+        if self.image_data is None:
+            raise Exception('no image data, please activate the sync_image_data flag and render to canvas before using this function')
 
-    def use_program(self, program:GLResourceWidget=None):
-        """Append a useProgram command to the commands buffer.
+        image = self._decoded_image_data()
 
-        Args:
-            program (GLResourceWidget): the program to use. Default to None.
-        """
-        uid = -1
-        if (program is not None) :
-            uid = program.uid
-        self._commands.append({
-            'cmd':'useProgram', 
-            'program':uid
-        })
+        if out is None and cached:
+            if self._image_out is None or self._image_out.shape != image.shape:
+                self._image_out = np.empty(image.shape, dtype=np.uint8)
+            out = self._image_out
 
+        if out is not None:
+            np.copyto(out, image)
+            return out
+        return image
 
-    def uniform(self, name:str, array:np.array):
-        """Append a uniform command to the commands buffer.
 
-        Args:
-            name (str): the name of the uniform
-            array (np.array): the numpy array with the data. Even if you send one value it must be an array.
-        """
-        meta_data, buffer = array_to_buffer(array)
-        meta_data['index'] = len(self._buffers)
-        self._buffers.append(buffer)
-        self._commands.append({
-            'cmd': 'uniform',
-            'name': name,
-            'buffer_metadata':meta_data
-        })
+    def request_frame(self):
+        """Ask the frontend to redraw and to sync the image_data once, even if sync_image_data is False.
 
-
-    def uniform_matrix(self, name:str, array:np.array):
-        """Append a uniformMatrix command to the commands buffer.
-
-        Args:
-            name (str): the name of the uniform
-            array (np.array): the matrix(matrices) to send. It must be a np.array(dtype=np.float32)
-        """
-        meta_data, buffer = array_to_buffer(array)
-        meta_data['index'] = len(self._buffers)
-        self._buffers.append(buffer)
-        self._commands.append({
-            'cmd': 'uniformMatrix',
-            'name': name,
-            'buffer_metadata':meta_data
-        })
-
-
-    def uniform_block_binding(self, program:GLResourceWidget, uniform_block_name:str, uniform_block_binding:int):
-        """Append a uniformBlockBinding command
+        This is sent to the frontend immediately, it is not added to the commands buffer.
         """
-        self._commands.append({
-            'cmd': 'uniformBlockBinding',
-            'program': program.uid,
-            'uniform_block_name':uniform_block_name,
-            'uniform_block_binding':uniform_block_binding
-        })
+        self.send({'request_frame':True})
 
 
-    def create_buffer(self) -> GLResourceWidget:
-        """Append a createBuffer command to the command list
+    def capture(self, encoding='raw', quality:float=None) -> asyncio.Future:
+        """Ask the frontend to redraw and to send the rendered image back as a binary message.
 
-        Returns:
-            GLResourceWidget: a resource that (will) hold the buffer after you call 'execute'
-        """
-        uid = len(self._resources)
-        resource = GLResourceWidget(_context=self, uid=uid)
-        self._resources.append(resource)
-        self._commands.append({
-            'cmd':'createBuffer', 
-            'resource':uid
-        })
-        return resource
-
-
-    def create_buffer_ext(self, target='ARRAY_BUFFER', src_data=None, usage='STATIC_DRAW', auto_execute=True) -> GLResourceWidget:
-        """Extended create buffer command
+        The image is not stored in the image_data trait.
+        The 'png', 'jpeg' and 'webp' encodings are smaller to transfer, they need Pillow to be decoded.
+        The kernel only processes the reply once the current cell is done, so await the result in another cell.
 
-        This build the command list with the create, bind, and buffer_data.
-        at the end it unbind the buffer.
-        If autoexecute is set it will send the command buffer to the frontend.
+        Example:
+            >>> frame = w.capture()
+            >>> # in the next cell
+            >>> image = await frame
 
         Args:
-            target (str, optional): _description_. Defaults to 'ARRAY_BUFFER'.
-            src_data (np.array, optional): the data to send. Defaults to None.
-            usage (str, optional): _description_. Defaults to 'STATIC_DRAW'.
-            auto_execute(bool, optional): do we execute the commands. Defaults to True
+            encoding ({'raw', 'png', 'jpeg', 'webp'}, optional): how the image is encoded for the transfer. Defaults to 'raw'.
+            quality (float, optional): the quality of the 'jpeg' and 'webp' encodings, between 0 and 1. Defaults to image_data_quality.
 
         Returns:
-            GLResourceWidget: the resource for the buffer
+            asyncio.Future: a future resolved with the (height, width, 4) uint8 image, the first row is the top of the image
         """
-        buffer = self.create_buffer()
-        self.bind_buffer(target, buffer)
-        self.buffer_data(target, src_data, usage, update_info=True)
-        self.bind_buffer(target, None)
+        if encoding not in ['raw', 'png', 'jpeg', 'webp']:
+            raise AttributeError("Invalid encoding")
+        request, future = self._create_request()
+        self.send({'capture':request, 'encoding':encoding, 'quality':self.image_data_quality if quality is None else quality})
+        return future
 
-        if auto_execute:
-            self.execute_commands(execute_once=True)
 
-        return buffer
+    def request_camera(self) -> asyncio.Future:
+        """Ask the frontend for its current camera, without waiting for the next camera sync.
 
+        The camera traits are also synced by the frontend before it answers.
+        The kernel only processes the reply once the current cell is done, so await the result in another cell.
 
-    def create_uniform_buffer_ext(self, program:GLResourceWidget, block_name:str, usage='STATIC_DRAW', auto_execute=True) -> GLResourceWidget:
-        """create a uniform buffer
-
-        We have to use this funciton to create a uniform buffer because the type of data passed to the buffer
-        is out of sync with the front end.
-
-        Args:
-            program (GLResourceWidget,): the program where the block is found.
-            block_name (str): the name of the block. Defaults to None.
-            usage (str, optional): _description_. Defaults to 'STATIC_DRAW'.
-            auto_execute(bool, optional): do we execute the commands. Defaults to True
+        Example:
+            >>> camera = w.request_camera()
+            >>> # in the next cell
+            >>> (await camera)['camera_pos']
 
         Returns:
-            GLResourceWidget: the resource for the buffer
-        """
-        uid = len(self._resources)
-        resource = GLResourceWidget(_context=self, uid=uid)
-        self._resources.append(resource)
-        self._commands.append({
-            'cmd':'createUniformBuffer', 
-            'program':program.uid, 
-            'block_name':block_name,
-            'usage':usage,
-            'buffer':uid
-        })
-        if auto_execute:
-            self.execute_commands(execute_once=True)
-
-        return resource
-
-
-    def bind_buffer(self, target: str="ARRAY_BUFFER", buffer: GLResourceWidget=None):
-        """Append a bindBuffer command to the command list
-
-            This function binds a given WebGLBuffer to a target. The target must be one of the following strings:
-
-            "ARRAY_BUFFER"
-            "ELEMENT_ARRAY_BUFFER"
-            "COPY_READ_BUFFER"
-            "COPY_WRITE_BUFFER"
-            "PIXEL_PACK_BUFFER"
-            "PIXEL_UNPACK_BUFFER"
-            "TRANSFORM_FEEDBACK_BUFFER"
-            "UNIFORM_BUFFER"
-
-        Args:
-            target (str): the target string. Defaults to "ARRAY_BUFFER"
-            buffer (GLResourceWidget): resource that hold the buffer. Defaults to None
-
-        Raises:
-            AttributeError: string not matching the values
+            asyncio.Future: a future resolved with a dict with the camera_pos, camera_yaw and camera_pitch
         """
-        if target not in ["ARRAY_BUFFER", "ELEMENT_ARRAY_BUFFER", "COPY_READ_BUFFER", "COPY_WRITE_BUFFER", "PIXEL_PACK_BUFFER", "PIXEL_UNPACK_BUFFER", "TRANSFORM_FEEDBACK_BUFFER", "UNIFORM_BUFFER"]:
-            raise AttributeError("Invalid target")
+        request, future = self._create_request()
+        self.send({'request_camera':request})
+        return future
 
-        uid = -1
-        if (buffer is not None):
-            uid = buffer.uid
-        self._commands.append({
-            'cmd':'bindBuffer', 
-            'target':target, 
-            'buffer':uid
-        })
 
+    def _create_request(self):
+        """return a new request id and the future resolved when the frontend answers it"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._request_id += 1
+        self._requests[self._request_id] = future
+        return self._request_id, future
 
-    def bind_buffer_base(self, target:str, index:int, buffer:GLResourceWidget=None):
-        """Append a bindBufferBase command
-        """
-        if target not in ["TRANSFORM_FEEDBACK_BUFFER", "UNIFORM_BUFFER"]:
-            raise AttributeError("Invalid target")
 
-        uid = -1
-        if (buffer is not None):
-            uid = buffer.uid
-        self._commands.append({
-            'cmd':'bindBufferBase', 
-            'target':target, 
-            'index':index,
-            'buffer':uid
-        })
+    def _resolve_request(self, request:int, result):
+        """resolve the future of a request, a request is only answered once"""
+        future = self._requests.pop(request, None)
+        if future is not None and not future.done():
+            future.set_result(result)
 
 
-    def buffer_data(self, target='ARRAY_BUFFER', src_data=None, usage='STATIC_DRAW', update_info=False):
-        """Append a bufferData command to the command list
+    def stream_buffer_data(self, buffer, src_data:np.ndarray, target='ARRAY_BUFFER', usage='STATIC_DRAW', chunk_size:int=4194304, window:int=4, progress=None) -> ChunkedUpload:
+        """Allocate the data store of a buffer and stream the data in chunks, instead of sending it in one large message.
 
-        Args:
-            target (str, optional): _description_. Defaults to 'ARRAY_BUFFER'.
-            src_data (np.array, optional): the data to send. Defaults to None. 
-            usage (str, optional): _description_. Defaults to 'STATIC_DRAW'.
-            update_info(bool, optional): do we update the buffer info that are displayed in the widget. Defaults to False
-
-        Raises:
-            AttributeError: _description_
-            AttributeError: _description_
-        """
-        if target not in ["ARRAY_BUFFER", "ELEMENT_ARRAY_BUFFER", "COPY_READ_BUFFER", "COPY_WRITE_BUFFER", "TRANSFORM_FEEDBACK_BUFFER", "UNIFORM_BUFFER"]:
-            raise AttributeError("Invalid target")
-        if usage not in ["STATIC_DRAW", "DYNAMIC_DRAW", "STREAM_DRAW", "STATIC_READ", "DYNAMIC_READ", "STREAM_READ", "STATIC_COPY", "DYNAMIC_COPY", "STREAM_COPY"]:
-            raise AttributeError("Invalid usage")
-
-        if isinstance(src_data, str) and target != "UNIFORM_BUFFER":
-            raise AttributeError("src_data can be a string only if we are passing a UNIFORM_BUFFER")
-
-        meta_data = {}
-        buffer = []
-        if (src_data is not None):
-            meta_data, buffer = array_to_buffer(src_data)
-            meta_data['index'] = len(self._buffers)
-            self._buffers.append(buffer)
-            self._commands.append({
-                'cmd':'bufferData', 
-                'target':target, 
-                'usage':usage, 
-                'update_info':update_info, 
-                'buffer_metadata':meta_data
-            })
-        else:
-            self._commands.append({
-                'cmd':'bufferData', 
-                'target':target, 
-                'usage':usage, 
-                'update_info':update_info
-            })
+        The pending commands are executed first, then the allocation is sent.
+        The allocation and the chunks go through the COPY_WRITE_BUFFER binding point, so the bound buffers
+        (and the element buffer of the bound vertex array) do not change.
+        The chunks are written with bufferSubData, only window chunks are sent before the frontend acknowledges them.
+        They are never added to the upload cache.
+        The kernel only processes the acknowledgements once the current cell is done, await upload.future in another cell.
 
-    def buffer_sub_data(self, target='ARRAY_BUFFER', dst_byte_offset=0, src_data=None, src_offset=0):
-        """Append a BufferSubData to the command list
+        Example:
+            >>> volume = w.create_buffer()
+            >>> upload = w.stream_buffer_data(volume, data, progress=lambda done, total: print(f'{done}/{total}'))
+            >>> # in the next cell
+            >>> await upload.future
 
-            target values : ["ARRAY_BUFFER", "ELEMENT_ARRAY_BUFFER", "COPY_READ_BUFFER", "COPY_WRITE_BUFFER", "TRANSFORM_FEEDBACK_BUFFER", "UNIFORM_BUFFER"]
         Args:
-            target (str, optional): specifying the binding point (target). Defaults to 'ARRAY_BUFFER'.
-            dst_byte_offset (int | str, optional): specifying an offset in bytes where the data replacement will start. in the case of UNIFORM_BUFFER, it can be a string with name of the uniform. Defaults to 0.
-            src_data (np.array, optional): the array that will be copied into the data store. Defaults to None.
-            src_offset (int, optional): specifying the element index offset where to start reading the buffer. Defaults to 0.
+            buffer (GLResourceWidget): the buffer to fill
+            src_data (np.ndarray): the data
+            target (str, optional): the kind of buffer, 'ELEMENT_ARRAY_BUFFER' for indices. Defaults to 'ARRAY_BUFFER'.
+            usage (str, optional): the usage of the buffer. Defaults to 'STATIC_DRAW'.
+            chunk_size (int, optional): the size in bytes of a chunk. Defaults to 4MB.
+            window (int, optional): the number of chunks sent before waiting for the acknowledgements. Defaults to 4.
+            progress (function, optional): called with (uploaded bytes, total bytes) each time a chunk is acknowledged. Defaults to None.
 
-        Raises:
-            AttributeError: _description_
+        Returns:
+            ChunkedUpload: the upload, its future is resolved once all the data is in the buffer
         """
+        if chunk_size <= 0:
+            raise AttributeError("Invalid chunk_size")
         if target not in ["ARRAY_BUFFER", "ELEMENT_ARRAY_BUFFER", "COPY_READ_BUFFER", "COPY_WRITE_BUFFER", "TRANSFORM_FEEDBACK_BUFFER", "UNIFORM_BUFFER"]:
             raise AttributeError("Invalid target")
+        _, data = array_to_buffer(src_data)
+        total = data.nbytes
 
-        meta_data = {}
-        buffer = []
-
-        command = 'bufferSubData'
-        if (isinstance(dst_byte_offset, str)):
-            command = 'bufferSubDataStr'
-
-        if (src_data is not None):
-            meta_data, buffer = array_to_buffer(src_data)
-            meta_data['index'] = len(self._buffers)
-            self._buffers.append(buffer)
-            self._commands.append({
-                'cmd':command, 
-                'target':target, 
-                'dst_byte_offset':dst_byte_offset, 
-                'src_offset':src_offset, 
-                'buffer_metadata':meta_data
-            })
-        else:
-            self._commands.append({
-                'cmd':command, 
-                'target':target, 
-                'dst_byte_offset':dst_byte_offset, 
-                'src_offset':src_offset, 
-            })
-
-    def create_vertex_array(self) -> GLResourceWidget:
-        """Append a createVertexArray command to the command list
-
-        Returns:
-            GLResourceWidget: a resource that (will) hold the vao after you call 'execute'
-        """
-        uid = len(self._resources)
-        resource = GLResourceWidget(_context=self, uid=uid)
-        self._resources.append(resource)
-        self._commands.append({
-            'cmd':'createVertexArray', 
-            'resource':uid
-        })
-        return resource
+        # binding an index buffer to ELEMENT_ARRAY_BUFFER would replace the one of the bound vertex array
+        self.bind_buffer('COPY_WRITE_BUFFER', buffer)
+        self.buffer_data('COPY_WRITE_BUFFER', usage=usage, update_info=True, size=total)
+        self.bind_buffer('COPY_WRITE_BUFFER', None)
+        self.execute_commands(execute_once=True)
 
+        return self._start_upload(buffer_chunks(self, buffer, src_data, 0, chunk_size), total, window, progress)
 
-    def create_vertex_array_ext(self, program:GLResourceWidget, bindings, indices=None, auto_execute=True) -> GLResourceWidget:
-        """extended vertex array function
 
-        This creates the vertex array and link all the attributes using the bindings.
-        
-        The bindings are a list of tuples with
-        * [(buffer, "3f32 3f32", "in_vertex", "in_normal"), ...]
-        * or [(buffer, "3f32 3f32", 0, 1), ...]
-        * or [(buffer, "1mat4:1", "in_world"), ...]
-        * the buffer is a buffer resource
-        * supported type for buffer definitions : [1, 2, 3, 4][i8, i16, i32, u8, u16, u32, f16, f32, mat4](:[1,2,...])
-        * the optional ':' is used to set the vertexAttribDivisor on that attribute.
-
-        Args:
-            program (GLResourceWidget): the program to use
-            bindings (List of tuple): [(buffer, "3f32 3f32", "in_vertex", "in_normal"), ...]"
-            indices (np.array(dtype=u8 or dtype=u16)): the indices buffer to create. Defaults to None.
-            auto_execute (bool) : do we execute the commands ?. Defaults to True.
-        """
-        attributePointers = []
-        for binding in bindings:
-            buffer = binding[0]
-            descriptions = binding[1]
-
-            stride = 0
-            pointer = {'buffer':buffer, 'pointers':[], 'stride':0}
-            attributePointers.append(pointer)
-
-            for desciption_index, description_string in enumerate(descriptions.split()):
-                size = description_string[0]
-                attribstrings = description_string[1:].split(':')
-                attribtype = attribstrings[0]
-                attribdivisor = 0
-                if len(attribstrings) == 2:
-                    attribdivisor = int(attribstrings[1])
-                name = binding[2 + desciption_index]
-
-                if size not in ['1', '2', '3', '4']:
-                    raise AttributeError("Invalid attribute size")
-                if attribtype not in ['i8', 'i16', 'i32', 'u8', 'u16', 'u32', 'f16', 'f32', 'mat4']:
-                    raise AttributeError("Invalid attribute type")
-
-                def _add(stride, size, attribtype, index_offset):
-                    isize = int(size)
-                    attribsize = {'i8':1, 'i16':2, 'i32':4, 'u8':1, 'u16':2, 'u32':4, 'f16':2, 'f32':4}[attribtype]
-                    attribgltype = {'i8':'BYTE', 'i16':'SHORT', 'i32':'INT', 'u8':'UNSIGNED_BYTE', 'u16':'UNSIGNED_SHORT', 'u32':'UNSIGNED_INT', 'f16':'HALF_FLOAT', 'f32':'FLOAT'}[attribtype]
-                    pointer['pointers'].append((name, isize, attribgltype, stride, index_offset, attribdivisor))
-                    return stride + attribsize * isize
-                
-                if attribtype == 'mat4':
-                    stride = _add(stride, '4', 'f32', 0)
-                    stride = _add(stride, '4', 'f32', 1)
-                    stride = _add(stride, '4', 'f32', 2)
-                    stride = _add(stride, '4', 'f32', 3)
-                else:
-                    stride = _add(stride, size, attribtype, 0)
-
-            pointer['stride'] = stride
-
-        # create the vertex array
-        vao = self.create_vertex_array()
-        self.bind_vertex_array(vao)
-        self.use_program(program)
-
-        # bind the attributes
-        for attrib in attributePointers:
-            self.bind_buffer('ARRAY_BUFFER', attrib['buffer'])
-
-            for pointer in attrib['pointers']:
-                self.enable_vertex_attrib_array(pointer[0], pointer[4])
-                self.vertex_attrib_pointer(pointer[0], pointer[1], pointer[2], False, attrib['stride'], pointer[3], pointer[4])
-                if (pointer[5] > 0):
-                    self.vertex_attrib_divisor(pointer[0], pointer[5], pointer[4])
-        self.bind_buffer('ARRAY_BUFFER', None)
-
-        # check if we need to create indices buffer
-        if indices is not None:
-            buffer = self.create_buffer()
-            self.bind_buffer('ELEMENT_ARRAY_BUFFER', buffer)
-            self.buffer_data('ELEMENT_ARRAY_BUFFER', indices, 'STATIC_DRAW', update_info=True)
-
-        self.bind_vertex_array(None)
-        self.use_program(None)
-
-        if auto_execute:
-            self.execute_commands(execute_once=True)
-
-        return vao
-        
-            
-    def bind_vertex_array(self, vertex_array:GLResourceWidget=None):
-        """Append a bindVertexArray command to the commands buffer.
-
-        Args:
-            vertex_array (GLResourceWidget): the vertex array to bind. Defaults to None.
-        """
-        uid = -1
-        if vertex_array :
-            uid = vertex_array.uid
-        self._commands.append({
-            'cmd':'bindVertexArray', 
-            'vertex_array':uid
-        })
-
-
-    def vertex_attrib_pointer(self, index, size: int, attribtype: str, normalized: bool, stride: int, offset: int, index_offset: int =0):
-        """Append a vertexAttribPointer command to the command buffer.
-        
-        Args:
-            index (int or str): The index of the generic vertex attribute to be modified or the name of the attribute to find in the shader.
-            size (int): Specifies the number of components per generic vertex attribute. Must be 1, 2, 3, 4.
-            attribtype (str): Specifies the data type of each component in the array.
-                Can be one of "BYTE", "UNSIGNED_BYTE", "SHORT", "UNSIGNED_SHORT", "FLOAT", "HALF_FLOAT", "INT", "UNSIGNED_INT".
-            normalized (bool): Specifies whether integer data values should be normalized when being casted to a float.
-            stride (int): Specifies the byte offset between consecutive generic vertex attributes.
-            offset (int): Specifies a offset, in bytes, of the first component in the vertex attribute array.
-            index_offset (int): add an offset to the index (location) found.
-        """
-        if size < 1 or size > 4:
-            raise AttributeError("Invalid size")
-        if attribtype not in ["BYTE", "UNSIGNED_BYTE", "SHORT", "UNSIGNED_SHORT", "FLOAT", "HALF_FLOAT", "INT", "UNSIGNED_INT"]:
-            raise AttributeError("Invalid attribtype")
-        self._commands.append({
-            'cmd': 'vertexAttribPointer', 
-            'index': index, 
-            'size': size, 
-            'type': attribtype, 
-            'normalized': normalized, 
-            'stride': stride, 
-            'offset': offset,
-            'index_offset': index_offset
-        })
-
-
-    def vertex_attrib_i_pointer(self, index, size: int, attribtype: str, stride: int, offset: int, index_offset: int =0):
-        """Append a vertexAttribIPointer command to the command buffer.
-        
-        Args:
-            index (int or str): The index of the generic vertex attribute to be modified or the name of the attribute to find in the shader.
-            size (int): Specifies the number of components per generic vertex attribute. Must be 1, 2, 3, 4.
-            attribtype (str): Specifies the data type of each component in the array.
-                Can be one of "BYTE", "UNSIGNED_BYTE", "SHORT", "UNSIGNED_SHORT", "INT", "UNSIGNED_INT".
-            stride (int): Specifies the byte offset between consecutive generic vertex attributes.
-            offset (int): Specifies a offset, in bytes, of the first component in the vertex attribute array.
-            index_offset (int): add an offset to the index (location) found.
-        """
-        if attribtype not in ["BYTE", "UNSIGNED_BYTE", "SHORT", "UNSIGNED_SHORT", "INT", "UNSIGNED_INT"]:
-            raise AttributeError("Invalid attribtype")
-        self._commands.append({
-            'cmd': 'vertexAttribIPointer', 
-            'index': index, 
-            'size': size, 
-            'type': attribtype, 
-            'stride': stride, 
-            'offset': offset,
-            'index_offset': index_offset
-        })
-
-
-    def enable_vertex_attrib_array(self, index, index_offset: int =0):
-        """Append an enableVertexAttribArray command to the command buffer.
-
-        Args:
-            index (int or str): Specifies the index of the generic vertex attribute to be enabled or the name of the attribute to find in the shader.
-            index_offset (int): add an offset to the index (location) found.
-        """
-        self._commands.append({
-            'cmd': 'enableVertexAttribArray',
-            'index': index,
-            'index_offset': index_offset
-        })
-
-
-    def disable_vertex_attrib_array(self, index, index_offset: int =0):
-        """Append an disableVertexAttribArray command to the command buffer.
-
-        Args:
-            index (int or str): Specifies the index of the generic vertex attribute to be enabled or the name of the attribute to find in the shader.
-            index_offset (int): add an offset to the index (location) found.
-        """
-        self._commands.append({
-            'cmd': 'disableVertexAttribArray',
-            'index': index,
-            'index_offset': index_offset
-        })
-
-    
-    def vertex_attrib_divisor(self, index, divisor: int, index_offset: int =0):
-        """Append an vertexAttribDivisor command to the command buffer.
-
-            modifies the rate at which generic vertex attributes advance when rendering multiple instances of primitives with gl.drawArraysInstanced() and gl.drawElementsInstanced().
-        Args:
-            index (int or str): Specifies the index of the generic vertex attribute to be enabled or the name of the attribute to find in the shader.
-            divisor(int): specifying the number of instances that will pass between updates of the generic attribute.
-            index_offset (int): add an offset to the index (location) found.
-        """
-        self._commands.append({
-            'cmd': 'vertexAttribDivisor',
-            'index': index,
-            'divisor': divisor,
-            'index_offset': index_offset
-        })
-
-
-    def vertex_attrib_fv(self, index, value: np.array, index_offset: int =0):
-        """Append an vertexAttrib[1234]fv command to the command buffer.
-
-            the type of vertexAttrib function to call will be decided from the shape of the array.
-        Args:
-            index (int or str): Specifies the index of the generic vertex attribute or the name of the attribute to find in the shader.
-            value(np.array(dtype=np.float32)): values to push.
-            index_offset (int): add an offset to the index (location) found.
-        """
-        meta_data, buffer = array_to_buffer(value)
-        meta_data['index'] = len(self._buffers)
-        self._buffers.append(buffer)
-        self._commands.append({
-            'cmd': 'vertexAttrib[1234]fv',
-            'index': index,
-            'buffer_metadata':meta_data,
-            'index_offset': index_offset
-        })
+    def stream_tex_sub_image(self, texture, target:str, src_data:np.ndarray, format:str, data_type:str, level:int=0, xoffset:int=0, yoffset:int=0, zoffset:int=0, chunk_size:int=4194304, window:int=4, progress=None) -> ChunkedUpload:
+        """Stream texels in an allocated texture (tex_storage_2d, tex_storage_3d, ...) in chunks of rows or layers.
 
+        The pending commands are executed first.
+        Each chunk is a texSubImage2D or texSubImage3D, only window chunks are sent before the frontend acknowledges them.
+        The kernel only processes the acknowledgements once the current cell is done, await upload.future in another cell.
 
-    def vertex_attrib_i4_fv(self, index, value: np.array, index_offset: int =0):
-        """Append an vertexAttribI4[u]iv command to the command buffer.
+        Example:
+            >>> volume = w.create_texture()
+            >>> w.bind_texture('TEXTURE_3D', volume)
+            >>> w.tex_storage_3d('TEXTURE_3D', 1, 'R8', 256, 256, 256)
+            >>> upload = w.stream_tex_sub_image(volume, 'TEXTURE_3D', voxels, 'RED', 'UNSIGNED_BYTE')
 
-            the type of vertexAttrib function to call will be decided from the type of the array.
         Args:
-            index (int or str): Specifies the index of the generic vertex attribute or the name of the attribute to find in the shader.
-            value(np.array(dtype=np.uint32 or dtype=np.int32)): values to push.
-            index_offset (int): add an offset to the index (location) found.
-        """
-        meta_data, buffer = array_to_buffer(value)
-        meta_data['index'] = len(self._buffers)
-        self._buffers.append(buffer)
-        self._commands.append({
-            'cmd': 'vertexAttribI4[u]iv',
-            'index': index,
-            'buffer_metadata':meta_data,
-            'index_offset': index_offset
-        })
-
-
-    def draw_arrays(self, mode:str, first:int, count:int):
-        """Append a drawArrays command to the commands buffer
-
-        Args:
-            mode ({'POINTS', 'LINE_STRIP', 'LINE_LOOP', 'LINES', 'TRIANGLE_STRIP', 'TRIANGLE_FAN', 'TRIANGLES'}): type of drawing operation.
-            first (int): the starting index in the array of vector points.
-            count (int): the number of indices to be rendered.
-        """
-        if mode not in ['POINTS', 'LINE_STRIP', 'LINE_LOOP', 'LINES', 'TRIANGLE_STRIP', 'TRIANGLE_FAN', 'TRIANGLES']:
-            raise AttributeError("Invalid mode")
-        self._commands.append({
-            'cmd':'drawArrays', 
-            'mode':mode, 
-            'first':first, 
-            'count':count
-        })
-
-    
-    def draw_arrays_instanced(self, mode:str, first:int, count:int, instance_count:int):
-        """Append a drawArraysInstanced command to the commands buffer
-
-        Args:
-            mode ({'POINTS', 'LINE_STRIP', 'LINE_LOOP', 'LINES', 'TRIANGLE_STRIP', 'TRIANGLE_FAN', 'TRIANGLES'}): type of drawing operation.
-            first (int): the starting index in the array of vector points.
-            count (int): the number of indices to be rendered.
-            instance_count(int): the number of instances fo the range of elements to execute.
-        """
-        if mode not in ['POINTS', 'LINE_STRIP', 'LINE_LOOP', 'LINES', 'TRIANGLE_STRIP', 'TRIANGLE_FAN', 'TRIANGLES']:
-            raise AttributeError("Invalid mode")
-        self._commands.append({
-            'cmd':'drawArraysInstanced', 
-            'mode':mode, 
-            'first':first, 
-            'count':count,
-            'instance_count':instance_count
-        })
-
-
-    def draw_elements(self, mode:str, count:int, bytetype:str, offset:int):
-        """Append a drawElements command to the commands buffer
-
-        Args:
-            mode ({'POINTS', 'LINE_STRIP', 'LINE_LOOP', 'LINES', 'TRIANGLE_STRIP', 'TRIANGLE_FAN', 'TRIANGLES'}): type of drawing operation.
-            count (int): specifying the number of elements of the bound element array buffer to be rendered.
-            bytetype ({'UNSIGNED_BYTE', 'UNSIGNED_SHORT'}): type of data in the index buffer.
-            offset (int): a byte offset in the element array buffer. Must be a valid multiple of the size of the given type.
-        """
-        if mode not in ['POINTS', 'LINE_STRIP', 'LINE_LOOP', 'LINES', 'TRIANGLE_STRIP', 'TRIANGLE_FAN', 'TRIANGLES']:
-            raise AttributeError("Invalid mode")
-        if bytetype not in ['UNSIGNED_BYTE', 'UNSIGNED_SHORT']:
-            raise AttributeError("Invalid type")
-        self._commands.append({
-            'cmd':'drawElements', 
-            'mode':mode, 
-            'count':count, 
-            'type':bytetype, 
-            'offset':offset
-        })
-
-    
-    def draw_elements_instanced(self, mode:str, count:int, bytetype:str, offset:int, instance_count:int):
-        """Append a drawElementsInstanced command to the commands buffer
-
-        Args:
-            mode ({'POINTS', 'LINE_STRIP', 'LINE_LOOP', 'LINES', 'TRIANGLE_STRIP', 'TRIANGLE_FAN', 'TRIANGLES'}): type of drawing operation.
-            count (int): specifying the number of elements of the bound element array buffer to be rendered.
-            bytetype ({'UNSIGNED_BYTE', 'UNSIGNED_SHORT'}): type of data in the index buffer.
-            offset (int): a byte offset in the element array buffer. Must be a valid multiple of the size of the given type.
-            instance_count (int): the number of instances of the set of elements to execute.
-        """
-        if mode not in ['POINTS', 'LINE_STRIP', 'LINE_LOOP', 'LINES', 'TRIANGLE_STRIP', 'TRIANGLE_FAN', 'TRIANGLES']:
-            raise AttributeError("Invalid mode")
-        if bytetype not in ['UNSIGNED_BYTE', 'UNSIGNED_SHORT']:
-            raise AttributeError("Invalid type")
-        self._commands.append({
-            'cmd':'drawElementsInstanced', 
-            'mode':mode, 
-            'count':count, 
-            'type':bytetype, 
-            'offset':offset,
-            'instance_count':instance_count
-        })
-            
-
-    def create_framebuffer(self) -> GLResourceWidget:
-        """Append a createFramebuffer command to the command list
+            texture (GLResourceWidget): the texture to fill
+            target (str): the target of the region ('TEXTURE_2D', 'TEXTURE_CUBE_MAP_POSITIVE_X', ..., 'TEXTURE_3D', 'TEXTURE_2D_ARRAY')
+            src_data (np.ndarray): the texels, (height, width, ...) for a 2d target or (depth, height, width, ...) for a 3d target
+            format (str): the format of the texel data
+            data_type (str): the data type of the texel data
+            level (int, optional): the level of detail to write. Defaults to 0.
+            xoffset (int, optional): the first column of the region. Defaults to 0.
+            yoffset (int, optional): the first row of the region. Defaults to 0.
+            zoffset (int, optional): the first layer of the region, for a 3d target. Defaults to 0.
+            chunk_size (int, optional): the size in bytes of a chunk. Defaults to 4MB.
+            window (int, optional): the number of chunks sent before waiting for the acknowledgements. Defaults to 4.
+            progress (function, optional): called with (uploaded bytes, total bytes) each time a chunk is acknowledged. Defaults to None.
 
         Returns:
-            GLResourceWidget: the resource that will hold the framebuffer
-        """
-        uid = len(self._resources)
-        resource = GLResourceWidget(_context=self, uid=uid)
-        self._resources.append(resource)
-        self._commands.append({
-            'cmd':'createFramebuffer', 
-            'resource':uid
-        })
-        return resource
-
-
-    def bind_framebuffer(self, target:str, framebuffer:GLResourceWidget=None):
-        """Append a bindFramebuffer command
-
-        Args:
-            target (str): the binding point (target) ["FRAMEBUFFER", "DRAW_FRAMEBUFFER", "READ_FRAMEBUFFER"]
-            framebuffer (GLResourceWidget): the framebuffer
-        """
-        if target not in ["FRAMEBUFFER", "DRAW_FRAMEBUFFER", "READ_FRAMEBUFFER"]:
-            raise AttributeError("Invalid target")
-        uid = -1
-        if framebuffer is not None:
-            uid = framebuffer.uid
-        self._commands.append({
-            'cmd':'bindFramebuffer', 
-            'target':target,
-            'framebuffer':uid
-        })
-
-
-    def framebuffer_texture_2d(self, target:str, attachement:str, textarget:str, texture:GLResourceWidget, level:int):
-        """Append a framebufferTexture2D command
+            ChunkedUpload: the upload, its future is resolved once all the texels are in the texture
+        """
+        if chunk_size <= 0:
+            raise AttributeError("Invalid chunk_size")
+        _, data = array_to_buffer(src_data)
+        self.execute_commands(execute_once=True)
+        chunks = texture_chunks(self, texture, target, src_data, format, data_type, level, xoffset, yoffset, zoffset, chunk_size)
+        return self._start_upload(chunks, data.nbytes, window, progress)
+
+
+    def _start_upload(self, chunks, total:int, window:int, progress) -> ChunkedUpload:
+        """create and start a chunked upload"""
+        request, future = self._create_request()
+        upload = ChunkedUpload(self, request, future, chunks, total, window, progress)
+        self._uploads[request] = upload
+        future.add_done_callback(lambda _: self._uploads.pop(request, None))
+        upload.start()
+        return upload
+
+
+    def _handle_frontend_msg(self, widget, content, buffers):
+        """handle the custom messages sent by the frontend"""
+        if 'ack' in content:
+            upload = self._uploads.get(content['ack'])
+            if upload is not None:
+                upload._acknowledged()
+        elif 'upload_cache_hit' in content:
+            self._cached_messages.pop(content['upload_cache_hit'], None)
+        elif 'upload_cache_miss' in content:
+            # the frontend cache is not what python thinks (reloaded page, new frontend model, ...)
+            # forget the mirror and send the message again with all its bytes
+            self._upload_cache = UploadCache(self.upload_cache_size)
+            original = self._cached_messages.pop(content['upload_cache_miss'], None)
+            if original is not None:
+                self._send_commands(*original, cache=False, resend=content['upload_cache_miss'])
+        elif 'capture' in content:
+            if content.get('encoding', 'raw') == 'raw':
+                image = np.frombuffer(buffers[0], dtype=np.uint8).reshape(content['height'], content['width'], 4)[::-1]
+            else:
+                image = decode_image(buffers[0])
+            self._resolve_request(content['capture'], image)
+        elif 'read_pixels' in content:
+            dtype = np.float16 if content['type'] == 'HALF_FLOAT' else np.dtype(content['dtype'])
+            pixels = np.frombuffer(buffers[0], dtype=dtype).reshape(content['shape'])
+            self._sent_reads.discard(content['read_pixels'])
+            self._resolve_request(content['read_pixels'], pixels)
+        elif 'camera' in content:
+            self._resolve_request(content['camera'], {
+                'camera_pos':content['camera_pos'],
+                'camera_yaw':content['camera_yaw'],
+                'camera_pitch':content['camera_pitch'],
+            })
 
-        Args:
-            target (str): the binding point (target). ["FRAMEBUFFER", "DRAW_FRAMEBUFFER", "READ_FRAMEBUFFER"]
-            attachement (str):  the attachment point for the texture. ["COLOR_ATTACHMENT0", "DEPTH_ATTACHMENT", "STENCIL_ATTACHMENT", 'DEPTH_STENCIL_ATTACHMENT', 'COLOR_ATTACHMENT1', 'COLOR_ATTACHMENT2', 'COLOR_ATTACHMENT3', 'COLOR_ATTACHMENT4', 'COLOR_ATTACHMENT5', 'COLOR_ATTACHMENT6', 'COLOR_ATTACHMENT7', 'COLOR_ATTACHMENT8', 'COLOR_ATTACHMENT9', 'COLOR_ATTACHMENT10', 'COLOR_ATTACHMENT11', 'COLOR_ATTACHMENT12', 'COLOR_ATTACHMENT13', 'COLOR_ATTACHMENT14', 'COLOR_ATTACHMENT15']:
-            textarget (str): the texture target. ['TEXTURE_2D', 'TEXTURE_CUBE_MAP_POSITIVE_X', 'TEXTURE_CUBE_MAP_NEGATIVE_X', 'TEXTURE_CUBE_MAP_POSITIVE_Y', 'TEXTURE_CUBE_MAP_NEGATIVE_Y', 'TEXTURE_CUBE_MAP_POSITIVE_Z', 'TEXTURE_CUBE_MAP_NEGATIVE_Z']
-            texture (GLResourceWidget): the texture.
-            level (int): the mipmap level of the texture image to be attached. Must be 0.
-        """
-        if target not in ["FRAMEBUFFER", "DRAW_FRAMEBUFFER", "READ_FRAMEBUFFER"]:
-            raise AttributeError("Invalid target")
 
-        if attachement not in ["COLOR_ATTACHMENT0", "DEPTH_ATTACHMENT", "STENCIL_ATTACHMENT", 
-            'DEPTH_STENCIL_ATTACHMENT', 'COLOR_ATTACHMENT1', 'COLOR_ATTACHMENT2', 'COLOR_ATTACHMENT3', 'COLOR_ATTACHMENT4', 'COLOR_ATTACHMENT5', 'COLOR_ATTACHMENT6', 'COLOR_ATTACHMENT7', 'COLOR_ATTACHMENT8', 'COLOR_ATTACHMENT9', 'COLOR_ATTACHMENT10', 'COLOR_ATTACHMENT11', 'COLOR_ATTACHMENT12', 'COLOR_ATTACHMENT13', 'COLOR_ATTACHMENT14', 'COLOR_ATTACHMENT15']:
-            raise AttributeError("Invalid attachement")
-
-        if textarget not in ['TEXTURE_2D', 'TEXTURE_CUBE_MAP_POSITIVE_X', 'TEXTURE_CUBE_MAP_NEGATIVE_X', 'TEXTURE_CUBE_MAP_POSITIVE_Y', 'TEXTURE_CUBE_MAP_NEGATIVE_Y', 'TEXTURE_CUBE_MAP_POSITIVE_Z', 'TEXTURE_CUBE_MAP_NEGATIVE_Z']:
-            raise AttributeError("Invalid textarget")
-
-        self._commands.append({
-            'cmd':'framebufferTexture2D', 
-            'target':target,
-            'attachement':attachement,
-            'textarget':textarget,
-            'texture':texture.uid,
-            'level':level
-        })
-
-    
-    def draw_buffers(self, buffers):
-        """Append a drawBuffers command
+    def clear_commands(self):
+        """Clear the commands buffer without sending it to the frontend.
         """
-        for buf in buffers:
-            if buf not in ["NONE", "BACK", "COLOR_ATTACHMENT0", 'COLOR_ATTACHMENT1', 'COLOR_ATTACHMENT2', 'COLOR_ATTACHMENT3', 'COLOR_ATTACHMENT4', 'COLOR_ATTACHMENT5', 'COLOR_ATTACHMENT6', 'COLOR_ATTACHMENT7', 'COLOR_ATTACHMENT8', 'COLOR_ATTACHMENT9', 'COLOR_ATTACHMENT10', 'COLOR_ATTACHMENT11', 'COLOR_ATTACHMENT12', 'COLOR_ATTACHMENT13', 'COLOR_ATTACHMENT14', 'COLOR_ATTACHMENT15']:
-                raise AttributeError("Invalid buffers")
-
-        self._commands.append({
-            'cmd':'drawBuffers', 
-            'buffers':buffers
-        })
\ No newline at end of file
+        self._commands = []
+        self._buffers  = []
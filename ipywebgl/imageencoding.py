@@ -0,0 +1,54 @@
+import io
+import numpy as np
+
+# the encodings of the image_data, they must match the ones in src/glviewer.ts
+IMAGE_ENCODINGS = ['raw', 'rows', 'png', 'jpeg', 'webp']
+
+
+def decode_rows(data, image:np.ndarray=None) -> np.ndarray:
+    """Apply a rows encoded frame on the previous image.
+
+    The frontend only sends the runs of rows that changed since the previous frame (all the rows for the first frame).
+
+    Layout (little endian u32):
+        width, height, run count, then for each run the first row and the row count, then the pixels of all the runs
+
+    Args:
+        data (bytes): the encoded frame
+        image (np.ndarray, optional): the previous (height, width, 4) uint8 image, in the opengl rows order. It is updated in place when its shape matches. Defaults to None.
+
+    Returns:
+        np.ndarray: the (height, width, 4) uint8 image, the first row is the bottom of the image
+    """
+    header = np.frombuffer(data, dtype='<u4', count=3)
+    width, height, count = int(header[0]), int(header[1]), int(header[2])
+    runs = np.frombuffer(data, dtype='<u4', count=count * 2, offset=12).reshape(count, 2)
+
+    if image is None or image.shape != (height, width, 4):
+        image = np.zeros((height, width, 4), dtype=np.uint8)
+
+    pixels = np.frombuffer(data, dtype=np.uint8, offset=12 + count * 8)
+    offset = 0
+    row_size = width * 4
+    for start, rows in runs:
+        size = int(rows) * row_size
+        image[start:start + rows] = pixels[offset:offset + size].reshape(rows, width, 4)
+        offset += size
+    return image
+
+
+def decode_image(data) -> np.ndarray:
+    """Decode a png, jpeg or webp frame, this needs Pillow.
+
+    Args:
+        data (bytes): the encoded frame
+
+    Returns:
+        np.ndarray: the (height, width, 4) uint8 image, the first row is the top of the image
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError('Pillow is needed to decode the png, jpeg and webp images, please install it (pip install pillow)')
+    with Image.open(io.BytesIO(data)) as image:
+        return np.asarray(image.convert('RGBA'))
@@ -0,0 +1,281 @@
+import numpy as np
+
+from .dynamicbuffer import DynamicBuffer
+
+
+# the instance attribute layouts, and their number of floats
+_INSTANCE_LAYOUTS = {'1f32':1, '2f32':2, '3f32':3, '4f32':4, 'mat4':16}
+
+_INDEX_TYPES = {np.dtype(np.uint8):'UNSIGNED_BYTE', np.dtype(np.uint16):'UNSIGNED_SHORT', np.dtype(np.uint32):'UNSIGNED_INT'}
+
+
+class InstancedMesh:
+    """A mesh drawn with one instanced draw for all its copies, the per copy values are attributes with a divisor.
+
+    The values that would be uniforms of a draw per copy (world matrix, color, ...) are packed in the rows of an instance
+    DynamicBuffer, so moving a copy only uploads its row. The program reads them as attributes, for example
+    ``in mat4 in_world;`` instead of ``uniform mat4 u_world;``.
+    A removed copy is replaced by the last one, the rows stay packed. The buffer grows in place when it is full,
+    the buffer and the vertex array stay the same, so a draw recorded in a CommandBuffer is still valid
+    (only its instance count is the one of when it was recorded).
+
+    The commands that create and update the buffers are recorded on the viewer, they are sent with the next execute_commands.
+
+    Example:
+        >>> cubes = ipywebgl.InstancedMesh(w, program, [(vbo, '3f32 3f32', 'in_vert', 'in_normal')], 36,
+        >>>     {'u_world':('in_world', 'mat4'), 'u_color':('in_color', '4f32')})
+        >>> cube = cubes.add({'u_world':world, 'u_color':[1, 0, 0, 1]})
+        >>> cubes.set(cube, {'u_world':moved})
+        >>> cubes.update()
+        >>> cubes.draw()
+        >>> w.execute_commands()
+
+    Attributes:
+        program (GLResourceWidget): the instanced program.
+        vertex_array (GLResourceWidget): the vertex array with the vertex bindings and the instance attributes.
+        instances (DynamicBuffer): the instance rows, float32.
+        attributes (dict): the uniform name, and the (attribute name, layout) that replaces it.
+    """
+
+    def __init__(self, viewer, program, bindings, count:int, attributes:dict, indices:np.ndarray=None, mode='TRIANGLES', capacity:int=64):
+        if not attributes:
+            raise AttributeError("Invalid attributes, at least one instance attribute is needed")
+        self._viewer = viewer
+        self.program = program
+        self.attributes = dict(attributes)
+        self.count = count
+        self.mode = mode
+        self._bindings = list(bindings)
+
+        # the columns of each value in the instance rows
+        self._columns = {}
+        stride = 0
+        for name, (_, layout) in self.attributes.items():
+            if layout not in _INSTANCE_LAYOUTS:
+                raise AttributeError(f"Invalid layout {layout}, the instance attributes are {list(_INSTANCE_LAYOUTS)}")
+            self._columns[name] = slice(stride, stride + _INSTANCE_LAYOUTS[layout])
+            stride += _INSTANCE_LAYOUTS[layout]
+        self._stride = stride
+
+        self._index_buffer = None
+        self.index_type = None
+        if indices is not None:
+            indices = np.ascontiguousarray(indices)
+            if indices.dtype not in _INDEX_TYPES:
+                raise AttributeError("Invalid indices, the dtype must be uint8, uint16 or uint32")
+            self.index_type = _INDEX_TYPES[indices.dtype]
+            self._index_buffer = viewer.create_buffer()
+            viewer.bind_buffer('ELEMENT_ARRAY_BUFFER', self._index_buffer)
+            viewer.buffer_data('ELEMENT_ARRAY_BUFFER', indices, 'STATIC_DRAW', update_info=True)
+            viewer.bind_buffer('ELEMENT_ARRAY_BUFFER', None)
+
+        self._ids = []
+        self._rows = {}
+        self._next_id = 0
+        self.instances = DynamicBuffer(viewer, np.zeros((max(1, capacity), self._stride), dtype=np.float32))
+
+        layout = ' '.join(('1mat4' if layout == 'mat4' else layout) + ':1' for _, layout in self.attributes.values())
+        names = [attribute for attribute, _ in self.attributes.values()]
+        self.vertex_array = viewer.create_vertex_array_ext(self.program,
+            self._bindings + [(self.instances.buffer, layout, *names)], auto_execute=False)
+        if self._index_buffer is not None:
+            viewer.bind_vertex_array(self.vertex_array)
+            viewer.bind_buffer('ELEMENT_ARRAY_BUFFER', self._index_buffer)
+            viewer.bind_vertex_array(None)
+
+
+    def __len__(self):
+        return len(self._ids)
+
+
+    def __contains__(self, instance:int):
+        return instance in self._rows
+
+
+    @property
+    def capacity(self) -> int:
+        """the number of rows of the instance buffer"""
+        return len(self.instances)
+
+
+    def _write(self, row:int, values:dict):
+        for name, value in values.items():
+            if name not in self._columns:
+                raise AttributeError(f"Invalid uniform {name}, it is not an instance attribute")
+            self.instances[row, self._columns[name]] = np.asarray(value, dtype=np.float32).reshape(-1)
+
+
+    def add(self, values:dict) -> int:
+        """Add a copy of the mesh.
+
+        Args:
+            values (dict): the uniform name and the value of each instance attribute, the missing ones are zeros.
+                A mat4 is stored in the same order as the matrices of a buffer bound with "1mat4:1".
+
+        Returns:
+            int: the id of the copy
+        """
+        row = len(self._ids)
+        if row == self.capacity:
+            self.instances.resize(self.capacity * 2)
+        instance = self._next_id
+        self._next_id += 1
+        self._ids.append(instance)
+        self._rows[instance] = row
+        self.instances[row] = 0
+        self._write(row, values)
+        return instance
+
+
+    def set(self, instance:int, values:dict):
+        """Change some values of a copy, only the changed rows are uploaded by update.
+
+        Args:
+            instance (int): the id of the copy
+            values (dict): the uniform name and the new value of the instance attributes to change
+        """
+        if instance not in self._rows:
+            raise AttributeError(f"Invalid instance {instance}")
+        self._write(self._rows[instance], values)
+
+
+    def remove(self, instance:int):
+        """Remove a copy, the last copy is moved in its row.
+
+        Args:
+            instance (int): the id of the copy
+        """
+        row = self._rows.pop(instance, None)
+        if row is None:
+            raise AttributeError(f"Invalid instance {instance}")
+        last = len(self._ids) - 1
+        moved = self._ids.pop()
+        if row != last:
+            self._ids[row] = moved
+            self._rows[moved] = row
+            self.instances[row] = self.instances.data[last]
+
+
+    def update(self) -> int:
+        """Record the upload of the rows that changed since the last update.
+
+        Returns:
+            int: the number of bytes recorded
+        """
+        return self.instances.update()
+
+
+    def draw(self, commands=None):
+        """Record the instanced draw of all the copies, nothing is recorded when there is no copy.
+
+        Args:
+            commands (GLViewer or CommandBuffer, optional): where to record the draw, the viewer when None. Defaults to None.
+        """
+        if not self._ids:
+            return
+        if commands is None:
+            commands = self._viewer
+        commands.use_program(self.program)
+        commands.bind_vertex_array(self.vertex_array)
+        if self.index_type is not None:
+            commands.draw_elements_instanced(self.mode, self.count, self.index_type, 0, len(self._ids))
+        else:
+            commands.draw_arrays_instanced(self.mode, 0, self.count, len(self._ids))
+
+
+class InstanceBatcher:
+    """Turn the draws of the same mesh that only differ by some uniforms into one instanced draw.
+
+    A (program, vertex array) pair is registered with the InstancedMesh that draws its copies.
+    Each frame, the objects are submitted with their key and their uniforms, the ones of a registered pair become
+    copies of its mesh. An object keeps its copy between the frames, so only the objects that moved are uploaded.
+    The objects that were not submitted since the previous emit are removed.
+
+    Example:
+        >>> batcher = ipywebgl.InstanceBatcher(w)
+        >>> batcher.register(program, vao, cubes)
+        >>> for obj in scene:
+        >>>     if not batcher.submit(obj, obj.program, obj.vao, {'u_world':obj.world}):
+        >>>         draw_the_usual_way(obj)
+        >>> batcher.emit()
+        >>> w.execute_commands()
+
+    Attributes:
+        last_stats (dict): the number of submitted objects, of instanced draws and of bytes uploaded by the last emit.
+    """
+
+    def __init__(self, viewer):
+        self._viewer = viewer
+        self._meshes = {}
+        self._objects = {}
+        self._submitted = set()
+        self.last_stats = {}
+
+
+    @staticmethod
+    def _key(program, vertex_array):
+        return (program.uid, vertex_array.uid)
+
+
+    def register(self, program, vertex_array, mesh:InstancedMesh):
+        """Instance the draws of a program and a vertex array with a mesh.
+
+        Args:
+            program (GLResourceWidget): the program of the draws
+            vertex_array (GLResourceWidget): the vertex array of the draws
+            mesh (InstancedMesh): the mesh that draws them, its attributes are the uniforms that change between the draws
+        """
+        self._meshes[self._key(program, vertex_array)] = mesh
+
+
+    def submit(self, key, program, vertex_array, uniforms:dict) -> bool:
+        """Submit the draw of an object for this frame.
+
+        Args:
+            key (hashable): what identifies the object between the frames
+            program (GLResourceWidget): the program of the draw
+            vertex_array (GLResourceWidget): the vertex array of the draw
+            uniforms (dict): the uniforms of the draw, they must be attributes of the registered mesh
+
+        Returns:
+            bool: True when the draw is instanced, False when the pair is not registered and the object must be drawn as usual
+        """
+        mesh = self._meshes.get(self._key(program, vertex_array))
+        if mesh is None:
+            return False
+        current = self._objects.get(key)
+        if current is not None and current[0] is not mesh:
+            current[0].remove(current[1])
+            current = None
+        if current is None:
+            self._objects[key] = (mesh, mesh.add(uniforms))
+        else:
+            # the rows are compared with the uploaded ones, an object that did not move is not uploaded
+            mesh.set(current[1], uniforms)
+        self._submitted.add(key)
+        return True
+
+
+    def emit(self, commands=None) -> dict:
+        """Remove the objects that were not submitted, upload the changed rows and record one instanced draw per mesh.
+
+        Args:
+            commands (GLViewer or CommandBuffer, optional): where to record the draws, the viewer when None. Defaults to None.
+
+        Returns:
+            dict: the stats of the emit, see last_stats
+        """
+        for key in [key for key in self._objects if key not in self._submitted]:
+            mesh, instance = self._objects.pop(key)
+            mesh.remove(instance)
+
+        uploaded = 0
+        draws = 0
+        for mesh in self._meshes.values():
+            uploaded += mesh.update()
+            if len(mesh):
+                mesh.draw(commands)
+                draws += 1
+        self.last_stats = {'objects':len(self._submitted), 'draws':draws, 'uploaded_bytes':uploaded}
+        self._submitted = set()
+        return self.last_stats
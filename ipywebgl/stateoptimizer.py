@@ -0,0 +1,145 @@
+# the commands executed only once with split_setup, they must match the ones in src/glviewer.ts
+SETUP_COMMANDS = {
+    'createTexture', 'createShader', 'createProgram', 'createBuffer', 'createUniformBuffer', 'createVertexArray', 'createFramebuffer',
+    'createTextures', 'createBuffers', 'createVertexArrays',
+    'deleteTexture', 'deleteShader', 'deleteProgram', 'deleteBuffer', 'deleteVertexArray', 'deleteFramebuffer',
+    'shaderSource', 'compileShader', 'attachShader', 'bindAttribLocation', 'linkProgram',
+    'bufferData', 'copyBufferSubData', 'texImage2D', 'texImage3D', 'texStorage2D', 'texStorage3D', 'compressedTexImage2D', 'generateMipmap',
+}
+
+# the commands that do not read nor change the bindings, they do not keep a pending bind alive
+_NEUTRAL_COMMANDS = {
+    'viewport', 'enable', 'disable', 'clearColor', 'blendColor', 'blendEquation', 'blendEquationSeparate', 'blendFunc', 'blendFuncSeparate',
+    'cullFace', 'depthFunc', 'depthMask', 'depthRange', 'frontFace', 'pixelStorei',
+    'createTexture', 'createShader', 'createProgram', 'createBuffer', 'createVertexArray', 'createFramebuffer',
+    'createTextures', 'createBuffers', 'createVertexArrays',
+    'shaderSource', 'compileShader', 'attachShader', 'bindAttribLocation', 'linkProgram',
+}
+
+_ELEMENT_BUFFER = ('buffer', 'ELEMENT_ARRAY_BUFFER')
+
+_UNKNOWN = object()
+
+
+class _StateTracker:
+    """the bindings known while walking a commands list, and the binds nothing has read yet"""
+
+    def __init__(self, output:list):
+        self.output = output
+        self.values = {}
+        self.pending = {}
+        self.removed = 0
+
+    def observe(self, slot=None):
+        """a command reads a binding (all of them when slot is None), its pending bind must be kept"""
+        if slot is None:
+            self.pending.clear()
+        else:
+            self.pending.pop(slot, None)
+
+    def forget(self, slot):
+        """the binding changed behind our back, its value is unknown"""
+        self.observe(slot)
+        self.values.pop(slot, None)
+
+    def forget_kind(self, kind:str):
+        for slot in [slot for slot in self.values if slot[0] == kind]:
+            self.forget(slot)
+
+    def bind(self, slot, value, command):
+        """append a bind command, unless it is a no-op, and drop the previous bind of the slot if nothing read it"""
+        if slot in self.pending:
+            # overwritten before being used, the previous bind is dead
+            index, previous = self.pending.pop(slot)
+            self.output[index] = None
+            self.removed += 1
+            if previous is _UNKNOWN:
+                self.values.pop(slot, None)
+            else:
+                self.values[slot] = previous
+        if self.values.get(slot, _UNKNOWN) == value:
+            self.removed += 1
+            return
+        self.pending[slot] = (len(self.output), self.values.get(slot, _UNKNOWN))
+        self.values[slot] = value
+        self.output.append(command)
+
+    def append(self, command):
+        self.output.append(command)
+
+
+def _optimize_range(commands:list, output:list) -> int:
+    """optimize a list of commands starting from an unknown state, append the result to output and return the number of removed commands"""
+    state = _StateTracker(output)
+    for command in commands:
+        cmd = command['cmd']
+        if cmd == 'useProgram':
+            state.bind(('program',), command['program'], command)
+        elif cmd == 'bindVertexArray':
+            # the element array buffer is part of the vertex array state
+            state.observe(_ELEMENT_BUFFER)
+            state.bind(('vertex_array',), command['vertex_array'], command)
+            state.forget(_ELEMENT_BUFFER)
+        elif cmd == 'bindBuffer':
+            if command['target'] == 'ELEMENT_ARRAY_BUFFER':
+                state.observe(('vertex_array',))
+            state.bind(('buffer', command['target']), command['buffer'], command)
+        elif cmd == 'activeTexture':
+            state.bind(('active_texture',), command['texture'], command)
+        elif cmd == 'bindTexture' and ('active_texture',) in state.values:
+            state.observe(('active_texture',))
+            state.bind(('texture', state.values[('active_texture',)], command['target']), command['texture'], command)
+        elif cmd == 'bindFramebuffer' and command['target'] == 'FRAMEBUFFER':
+            state.bind(('framebuffer',), command['framebuffer'], command)
+        else:
+            state.append(command)
+            if cmd in _NEUTRAL_COMMANDS:
+                continue
+            state.observe()
+            if cmd == 'bindTexture':
+                # on an unknown texture unit
+                state.forget_kind('texture')
+            elif cmd == 'bindFramebuffer':
+                state.forget(('framebuffer',))
+            elif cmd == 'bindBufferBase':
+                # it also binds the generic binding point
+                state.forget(('buffer', command['target']))
+            elif cmd == 'createUniformBuffer':
+                state.forget(('buffer', 'UNIFORM_BUFFER'))
+            elif cmd.startswith('delete'):
+                # deleting a bound object unbinds it
+                state.values.clear()
+    return state.removed
+
+
+def optimize_state_changes(commands:list, split_setup=False):
+    """Remove the redundant binding commands of a commands list.
+
+    The list is walked from an unknown state (the previous frame or pass can leave anything bound), the bindings
+    set by useProgram, bindVertexArray, bindBuffer, activeTexture, bindTexture and bindFramebuffer are tracked, and:
+
+    - a bind of the value that is already bound is removed,
+    - a bind that is replaced before any command could use it is removed.
+
+    The last bind of each binding is always kept, the state left at the end of the list does not change.
+    The input list is not modified, the commands that carry data are never removed so the buffers indices stay valid.
+
+    Args:
+        commands (list): the commands
+        split_setup (bool, optional): the setup commands are executed once and the others replayed, the state is reset between them. Defaults to False.
+
+    Returns:
+        tuple: the optimized commands list and the number of removed commands
+    """
+    output = []
+    removed = 0
+    start = 0
+    if split_setup:
+        last_setup = -1
+        for index, command in enumerate(commands):
+            if command['cmd'] in SETUP_COMMANDS:
+                last_setup = index
+        removed += _optimize_range(commands[:last_setup + 1], output)
+        start = last_setup + 1
+    removed += _optimize_range(commands[start:], output)
+    return [command for command in output if command is not None], removed
@@ -0,0 +1,154 @@
+from collections import deque
+
+import numpy as np
+
+from .arraybuffer import array_to_buffer
+from .commandbuffer import CommandBuffer
+
+
+class ChunkedUpload:
+    """A large upload sent to the frontend as a stream of small messages.
+
+    Each chunk is a small commands buffer executed once by the frontend, that answers with an acknowledgement.
+    Only window chunks are in flight at the same time, the next ones are recorded and sent when the acknowledgements arrive,
+    so the memory stays bounded and the kernel is not blocked while the data is sent.
+
+    The kernel only processes the acknowledgements once the current cell is done, await the future in another cell.
+
+    Attributes:
+        total (int): the number of bytes to upload.
+        uploaded (int): the number of bytes acknowledged by the frontend.
+        future (asyncio.Future): resolved with the number of bytes uploaded once all the chunks are acknowledged.
+    """
+
+    def __init__(self, viewer, request:int, future, chunks, total:int, window:int=4, progress=None):
+        if window < 1:
+            raise AttributeError("Invalid window, at least one chunk must be in flight")
+        self._viewer = viewer
+        self._request = request
+        self._chunks = iter(chunks)
+        self._window = window
+        self._progress = progress
+        self._in_flight = deque()
+        self._finished = False
+        self.total = total
+        self.uploaded = 0
+        self.future = future
+
+
+    def start(self):
+        """send the first chunks of the window"""
+        while len(self._in_flight) < self._window and self._send_next():
+            pass
+        self._check_done()
+
+
+    def cancel(self):
+        """Stop sending the chunks, the chunks already sent are still executed by the frontend."""
+        self._finished = True
+        self._chunks = iter(())
+        self._viewer._requests.pop(self._request, None)
+        if not self.future.done():
+            self.future.cancel()
+
+
+    def _send_next(self) -> bool:
+        """record and send the next chunk, return False when there is no more chunk"""
+        if self._finished:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._finished = True
+            return False
+        commands, buffers, size = chunk
+        # each chunk is sent once, hashing it for the upload cache is wasted time and would evict the useful entries
+        self._viewer._send_commands(commands, buffers, True, False, ack=self._request, cache=False)
+        self._in_flight.append(size)
+        return True
+
+
+    def _acknowledged(self):
+        """called when the frontend executed a chunk"""
+        if not self._in_flight:
+            return
+        self.uploaded += self._in_flight.popleft()
+        if self._progress is not None:
+            self._progress(self.uploaded, self.total)
+        self._send_next()
+        self._check_done()
+
+
+    def _check_done(self):
+        if self._finished and not self._in_flight:
+            self._viewer._resolve_request(self._request, self.uploaded)
+
+
+def buffer_chunks(viewer, buffer, src_data:np.ndarray, dst_byte_offset:int=0, chunk_size:int=4194304):
+    """Yield the chunks (commands, buffers, size) that write src_data in a buffer with bufferSubData.
+
+    The data is converted to the dtype sent to the frontend first, then cut in chunks of bytes without copy.
+
+    Args:
+        viewer (GLViewer): the viewer that owns the buffer
+        buffer (GLResourceWidget): the buffer to write
+        src_data (np.ndarray): the data
+        dst_byte_offset (int, optional): the offset in bytes where to write the data in the buffer. Defaults to 0.
+        chunk_size (int, optional): the size in bytes of a chunk. Defaults to 4MB.
+    """
+    _, data = array_to_buffer(src_data)
+    data = np.frombuffer(data, dtype=np.uint8)
+    for start in range(0, len(data), chunk_size):
+        chunk = data[start:start + chunk_size]
+        recorder = CommandBuffer(viewer)
+        recorder.bind_buffer('COPY_WRITE_BUFFER', buffer)
+        recorder.buffer_sub_data('COPY_WRITE_BUFFER', dst_byte_offset + start, chunk)
+        recorder.bind_buffer('COPY_WRITE_BUFFER', None)
+        yield recorder._commands, recorder._buffers, len(chunk)
+
+
+def texture_chunks(viewer, texture, target:str, src_data:np.ndarray, format:str, data_type:str, level:int=0, xoffset:int=0, yoffset:int=0, zoffset:int=0, chunk_size:int=4194304):
+    """Yield the chunks (commands, buffers, size) that write src_data in a texture with texSubImage2D or texSubImage3D.
+
+    A 2d target is cut in bands of rows, a 3d target ('TEXTURE_3D', 'TEXTURE_2D_ARRAY') in slabs of layers.
+    A chunk is at least one row (or one layer), even if it is bigger than chunk_size.
+    When the size of a row is not a multiple of 4, the UNPACK_ALIGNMENT is set to 1 around each chunk and set back to the WebGL default 4.
+
+    Args:
+        viewer (GLViewer): the viewer that owns the texture
+        texture (GLResourceWidget): the texture to write, its storage must already be allocated
+        target (str): the target of the region ('TEXTURE_2D', 'TEXTURE_CUBE_MAP_POSITIVE_X', ..., 'TEXTURE_3D', 'TEXTURE_2D_ARRAY')
+        src_data (np.ndarray): the texels, (height, width, ...) for a 2d target or (depth, height, width, ...) for a 3d target
+        format (str): the format of the texel data
+        data_type (str): the data type of the texel data
+        level (int, optional): the level of detail to write. Defaults to 0.
+        xoffset (int, optional): the first column of the region. Defaults to 0.
+        yoffset (int, optional): the first row of the region. Defaults to 0.
+        zoffset (int, optional): the first layer of the region, for a 3d target. Defaults to 0.
+        chunk_size (int, optional): the size in bytes of a chunk. Defaults to 4MB.
+    """
+    is_3d = target in ['TEXTURE_3D', 'TEXTURE_2D_ARRAY']
+    if src_data.ndim < (3 if is_3d else 2):
+        raise AttributeError("Invalid src_data, it must be (height, width, ...) or (depth, height, width, ...) for a 3d target")
+    bind_target = 'TEXTURE_CUBE_MAP' if target.startswith('TEXTURE_CUBE_MAP_') else target
+    items = len(src_data)
+    item_size = src_data[0].nbytes if items else 0
+    step = max(1, chunk_size // max(1, item_size))
+    # the rows of the numpy arrays are packed
+    row_size = item_size // src_data.shape[1] if is_3d and items else item_size
+    packed = row_size % 4 != 0
+    for start in range(0, items, step):
+        chunk = src_data[start:start + step]
+        recorder = CommandBuffer(viewer)
+        recorder.bind_texture(bind_target, texture)
+        if packed:
+            recorder.pixel_store_i('UNPACK_ALIGNMENT', 1)
+        if is_3d:
+            recorder.tex_sub_image_3d(target, level, xoffset, yoffset, zoffset + start,
+                chunk.shape[2], chunk.shape[1], len(chunk), format, data_type, chunk)
+        else:
+            recorder.tex_sub_image_2d(target, level, xoffset, yoffset + start,
+                chunk.shape[1], len(chunk), format, data_type, chunk)
+        if packed:
+            recorder.pixel_store_i('UNPACK_ALIGNMENT', 4)
+        recorder.bind_texture(bind_target, None)
+        yield recorder._commands, recorder._buffers, recorder._buffers[0].nbytes
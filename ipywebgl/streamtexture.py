@@ -0,0 +1,142 @@
+import numpy as np
+
+
+class StreamTexture:
+    """A texture allocated once with texStorage, and updated with texSubImage.
+
+    The storage is immutable, each update only overwrites a region (or a layer with layers),
+    so the cost of a frame is proportional to the region and the texture is never reallocated.
+    Use it for live heatmaps, video frames, ...
+
+    The commands are recorded on the viewer, they are sent with the next execute_commands.
+    They bind the texture on the active texture unit and unbind it after, so the texture bound on that unit
+    must be bound again before drawing with it.
+
+    Example:
+        >>> heatmap = ipywebgl.StreamTexture(w, 512, 512, 'R32F', 'RED', 'FLOAT', filter='NEAREST')
+        >>> heatmap.update(values)
+        >>> heatmap.update(values[100:200, 100:200], x=100, y=100)
+        >>> w.execute_commands(execute_once=True)
+
+    Attributes:
+        texture (GLResourceWidget): the texture resource.
+        target (str): 'TEXTURE_2D', or 'TEXTURE_2D_ARRAY' when the texture has layers.
+        width (int): the width of the texture.
+        height (int): the height of the texture.
+        layers (int): the number of layers, None for a TEXTURE_2D.
+        last_update_bytes (int): the number of bytes recorded by the last update.
+    """
+
+    def __init__(self, viewer, width:int, height:int, internal_format='RGBA8', format='RGBA', data_type='UNSIGNED_BYTE',
+                 layers:int=None, levels:int=1, filter='LINEAR', wrap='CLAMP_TO_EDGE'):
+        if width <= 0 or height <= 0:
+            raise AttributeError("Invalid size")
+        if layers is not None and layers <= 0:
+            raise AttributeError("Invalid layers")
+        self._viewer = viewer
+        self.width = width
+        self.height = height
+        self.layers = layers
+        self.levels = levels
+        self.format = format
+        self.data_type = data_type
+        self.target = 'TEXTURE_2D' if layers is None else 'TEXTURE_2D_ARRAY'
+        self.last_update_bytes = 0
+
+        self.texture = viewer.create_texture()
+        viewer.bind_texture(self.target, self.texture)
+        if layers is None:
+            viewer.tex_storage_2d(self.target, levels, internal_format, width, height)
+        else:
+            viewer.tex_storage_3d(self.target, levels, internal_format, width, height, layers)
+        min_filter = filter
+        if levels > 1:
+            min_filter = 'LINEAR_MIPMAP_LINEAR' if filter == 'LINEAR' else 'NEAREST_MIPMAP_NEAREST'
+        viewer.tex_parameter(self.target, 'TEXTURE_MIN_FILTER', min_filter)
+        viewer.tex_parameter(self.target, 'TEXTURE_MAG_FILTER', filter)
+        viewer.tex_parameter(self.target, 'TEXTURE_WRAP_S', wrap)
+        viewer.tex_parameter(self.target, 'TEXTURE_WRAP_T', wrap)
+        viewer.bind_texture(self.target, None)
+
+
+    def _check_region(self, frame:np.ndarray, x:int, y:int, layer:int):
+        """validate the region covered by the frame and return (width, height, depth)"""
+        if self.layers is None:
+            if layer is not None:
+                raise AttributeError("Invalid layer, the texture has no layers")
+            if frame.ndim < 2:
+                raise AttributeError("Invalid frame, it must be (height, width, ...)")
+            height, width, depth = frame.shape[0], frame.shape[1], 1
+        else:
+            if frame.ndim < 2:
+                raise AttributeError("Invalid frame, it must be (height, width, ...) or (layers, height, width, ...)")
+            # a frame without the layers axis updates a single layer
+            single = layer is not None
+            layer = 0 if layer is None else layer
+            depth = 1 if single else frame.shape[0]
+            height, width = (frame.shape[0], frame.shape[1]) if single else (frame.shape[1], frame.shape[2])
+            if layer < 0 or layer + depth > self.layers:
+                raise AttributeError("Invalid layer, the frame is outside of the texture")
+        if x < 0 or y < 0 or x + width > self.width or y + height > self.height:
+            raise AttributeError("Invalid offset, the frame is outside of the texture")
+        return width, height, depth
+
+
+    def update(self, frame:np.ndarray, x:int=0, y:int=0, layer:int=None, generate_mipmap=False) -> int:
+        """Record the texSubImage command that writes a frame in the texture.
+
+        The rows of the frame are packed, when their size is not a multiple of 4 the UNPACK_ALIGNMENT is set to 1
+        for the upload and set back to the WebGL default 4 after.
+        The texture is bound on the active texture unit, and that unit has no texture bound to the target after.
+
+        Args:
+            frame (np.ndarray): the texels, (height, width, ...). With layers, (layers, height, width, ...) to update layers from layer (or 0).
+            x (int, optional): the first column to update. Defaults to 0.
+            y (int, optional): the first row to update. Defaults to 0.
+            layer (int, optional): the layer to update, the frame has no layers axis when it is given. Defaults to None.
+            generate_mipmap (bool, optional): regenerate the other levels after the update. Defaults to False.
+
+        Returns:
+            int: the number of bytes recorded
+        """
+        frame = np.asarray(frame)
+        width, height, depth = self._check_region(frame, x, y, layer)
+        viewer = self._viewer
+        packed = (frame.nbytes // (height * depth)) % 4 != 0 if frame.nbytes else False
+        viewer.bind_texture(self.target, self.texture)
+        if packed:
+            viewer.pixel_store_i('UNPACK_ALIGNMENT', 1)
+        if self.layers is None:
+            viewer.tex_sub_image_2d(self.target, 0, x, y, width, height, self.format, self.data_type, frame)
+        else:
+            viewer.tex_sub_image_3d(self.target, 0, x, y, layer or 0, width, height, depth, self.format, self.data_type, frame)
+        if packed:
+            viewer.pixel_store_i('UNPACK_ALIGNMENT', 4)
+        if generate_mipmap:
+            viewer.generate_mipmap(self.target)
+        viewer.bind_texture(self.target, None)
+        self.last_update_bytes = frame.nbytes
+        return frame.nbytes
+
+
+    def stream(self, frame:np.ndarray, x:int=0, y:int=0, layer:int=None, chunk_size:int=4194304, window:int=4, progress=None):
+        """Write a large frame in chunks of rows (or layers), see GLViewer.stream_tex_sub_image.
+
+        Args:
+            frame (np.ndarray): the texels, same layout as update.
+            x (int, optional): the first column to update. Defaults to 0.
+            y (int, optional): the first row to update. Defaults to 0.
+            layer (int, optional): the layer to update, the frame has no layers axis when it is given. Defaults to None.
+            chunk_size (int, optional): the size in bytes of a chunk. Defaults to 4MB.
+            window (int, optional): the number of chunks sent before waiting for the acknowledgements. Defaults to 4.
+            progress (function, optional): called with (uploaded bytes, total bytes) each time a chunk is acknowledged. Defaults to None.
+
+        Returns:
+            ChunkedUpload: the upload, its future is resolved once all the texels are in the texture
+        """
+        frame = np.asarray(frame)
+        self._check_region(frame, x, y, layer)
+        if self.layers is not None and layer is not None:
+            frame = frame[np.newaxis]
+        return self._viewer.stream_tex_sub_image(self.texture, self.target, frame, self.format, self.data_type,
+            xoffset=x, yoffset=y, zoffset=layer or 0, chunk_size=chunk_size, window=window, progress=progress)
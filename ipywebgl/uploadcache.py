@@ -0,0 +1,154 @@
+import hashlib
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+# the smaller buffers (uniforms, small updates) are cheaper to send than to hash
+MIN_CACHED_BYTES = 4096
+
+# the messages kept until the frontend confirms their cached buffers, the frontend does not answer until the end of the cell
+# or when no view is displayed, past this count the messages are sent with all their bytes and are not kept
+MAX_PENDING_MESSAGES = 64
+
+# the hashes of the read only arrays, they cannot change so they are hashed once
+# arrays are not hashable, they are keyed by id with a weak reference that removes them
+_read_only_hashes = {}
+
+
+def hash_buffer(buffer:memoryview, dtype:str=None) -> str:
+    """Return the content hash of a buffer returned by array_to_buffer.
+
+    The hash of a read only array is computed once and kept as long as the array lives, or until it is made writeable again.
+    The frontend caches the typed array converted with the dtype, so the same bytes with another dtype have another hash.
+    The shape is not part of it, the cached typed array is flat and each command keeps its own shape.
+
+    Args:
+        buffer (memoryview): the buffer
+        dtype (str, optional): the dtype of the buffer metadata. Defaults to None.
+
+    Returns:
+        str: the hexadecimal blake2b hash of the bytes and the dtype
+    """
+    digest = _hash_bytes(buffer)
+    if dtype is None:
+        return digest
+    return hashlib.blake2b(f'{digest}:{dtype}'.encode(), digest_size=16).hexdigest()
+
+
+def _hash_bytes(buffer:memoryview) -> str:
+    """the hash of the bytes only, cached for the read only arrays"""
+    array = buffer.obj if isinstance(buffer, memoryview) else None
+    root = array
+    while isinstance(root, np.ndarray) and isinstance(root.base, np.ndarray):
+        root = root.base
+
+    if isinstance(root, np.ndarray) and root.flags.writeable:
+        # the array was made writeable again, its content can change, forget the hashes
+        entry = _read_only_hashes.get(id(root))
+        if entry is not None and entry[0]() is root:
+            del _read_only_hashes[id(root)]
+    elif isinstance(root, np.ndarray):
+        key = (array.__array_interface__['data'][0], buffer.nbytes)
+        entry = _read_only_hashes.get(id(root))
+        if entry is None or entry[0]() is not root:
+            entry = (weakref.ref(root, lambda _, key=id(root): _read_only_hashes.pop(key, None)), {})
+            _read_only_hashes[id(root)] = entry
+        hashes = entry[1]
+        digest = hashes.get(key)
+        if digest is None:
+            digest = hashlib.blake2b(buffer, digest_size=16).hexdigest()
+            hashes[key] = digest
+        return digest
+
+    return hashlib.blake2b(buffer, digest_size=16).hexdigest()
+
+
+class UploadCache:
+    """The mirror of the frontend cache of uploaded buffers.
+
+    The frontend keeps the converted arrays in a LRU cache with the same budget, and applies exactly the same operations
+    in the same order (src/uploadcache.ts), so python knows which buffers the frontend already has without asking it.
+    The mirror can still be wrong (the page was reloaded, ...), so the frontend confirms each message that uses the cache.
+    On a miss the viewer resets the mirror and sends the message again with all its bytes.
+
+    Attributes:
+        budget (int): the size in bytes of the cache.
+        size (int): the size in bytes of the cached buffers.
+    """
+
+    def __init__(self, budget:int=0):
+        self._entries = OrderedDict()
+        self.budget = budget
+        self.size = 0
+
+
+    def __contains__(self, digest:str):
+        return digest in self._entries
+
+
+    def touch(self, digest:str) -> bool:
+        """mark a hash as used, return False if it is not in the cache"""
+        if digest not in self._entries:
+            return False
+        self._entries.move_to_end(digest)
+        return True
+
+
+    def add(self, digest:str, size:int):
+        """add a buffer, it is ignored if it is larger than the cache"""
+        if self.touch(digest) or size > self.budget:
+            return
+        self._entries[digest] = size
+        self.size += size
+        self._evict()
+
+
+    def set_budget(self, budget:int):
+        """change the size of the cache, the least recently used buffers are evicted"""
+        self.budget = budget
+        self._evict()
+
+
+    def _evict(self):
+        while self.size > self.budget:
+            _, size = self._entries.popitem(last=False)
+            self.size -= size
+
+
+    def filter(self, commands, buffers):
+        """Return the commands and the buffers to send, without the buffers the frontend already has.
+
+        The commands with data are copied with the hash in their metadata, and the cached flag if their buffer is not sent.
+
+        Returns:
+            (list, list, int, int): the commands, the buffers, the number of cached buffers and their size in bytes
+        """
+        sent_commands = []
+        sent_buffers = []
+        hits = 0
+        saved = 0
+        for command in commands:
+            meta_data = command.get('buffer_metadata')
+            if meta_data is None:
+                sent_commands.append(command)
+                continue
+
+            buffer = buffers[meta_data['index']]
+            size = memoryview(buffer).nbytes
+            if size < MIN_CACHED_BYTES or size > self.budget:
+                sent_commands.append(command)
+                sent_buffers.append(buffer)
+                continue
+
+            digest = hash_buffer(buffer, meta_data['dtype'])
+            meta_data = dict(meta_data, hash=digest)
+            if self.touch(digest):
+                meta_data['cached'] = True
+                hits += 1
+                saved += size
+            else:
+                self.add(digest, size)
+                sent_buffers.append(buffer)
+            sent_commands.append(dict(command, buffer_metadata=meta_data))
+        return sent_commands, sent_buffers, hits, saved
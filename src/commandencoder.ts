@@ -0,0 +1,102 @@
+import { COMMANDS, ENUMS } from './commandcodes';
+
+// value tags, they must match the ones in ipywebgl/commandencoder.py
+const TAG_NULL = 0;
+const TAG_FALSE = 1;
+const TAG_TRUE = 2;
+const TAG_INT = 3;
+const TAG_FLOAT = 4;
+const TAG_NAME = 5;
+const TAG_NAME32 = 6;
+const TAG_LIST = 7;
+const TAG_DICT = 8;
+const TAG_OPCODE = 9;
+const TAG_ENUM = 10;
+
+/**
+ * Decode a binary command stream built by encode_commands in python.
+ * It returns the same list of commands we would have received as JSON,
+ * with the command code in op when the command name was sent as a code.
+ */
+export function decode_commands(keys: string[], names: string[], data: DataView): any[] {
+  let offset = 0;
+
+  const read_dict = (): any => {
+    const count = data.getUint8(offset);
+    offset += 1;
+    const dict: any = {};
+    for (let i = 0; i < count; ++i) {
+      const key = keys[data.getUint16(offset, true)];
+      offset += 2;
+      if (data.getUint8(offset) === TAG_OPCODE){
+        const code = data.getUint8(offset + 1);
+        offset += 2;
+        dict[key] = COMMANDS[code];
+        dict.op = code;
+      }
+      else{
+        dict[key] = read_value();
+      }
+    }
+    return dict;
+  };
+
+  const read_value = (): any => {
+    const tag = data.getUint8(offset);
+    offset += 1;
+    switch (tag) {
+      case TAG_NULL:
+        return null;
+      case TAG_FALSE:
+        return false;
+      case TAG_TRUE:
+        return true;
+      case TAG_INT: {
+        const value = data.getInt32(offset, true);
+        offset += 4;
+        return value;
+      }
+      case TAG_FLOAT: {
+        const value = data.getFloat64(offset, true);
+        offset += 8;
+        return value;
+      }
+      case TAG_NAME: {
+        const value = names[data.getUint16(offset, true)];
+        offset += 2;
+        return value;
+      }
+      case TAG_NAME32: {
+        const value = names[data.getUint32(offset, true)];
+        offset += 4;
+        return value;
+      }
+      case TAG_LIST: {
+        const count = data.getUint32(offset, true);
+        offset += 4;
+        const list = new Array(count);
+        for (let i = 0; i < count; ++i) {
+          list[i] = read_value();
+        }
+        return list;
+      }
+      case TAG_ENUM: {
+        const value = ENUMS[data.getUint16(offset, true)];
+        offset += 2;
+        return value;
+      }
+      case TAG_DICT:
+        return read_dict();
+      default:
+        throw 'Unknown command value tag ' + tag;
+    }
+  };
+
+  const count = data.getUint32(offset, true);
+  offset += 4;
+  const commands = new Array(count);
+  for (let i = 0; i < count; ++i) {
+    commands[i] = read_dict();
+  }
+  return commands;
+}
@@ -10,6 +10,39 @@ import { MODULE_NAME, MODULE_VERSION } from './version';
 // Import the CSS
 import '../css/widget.css';
 
+/**
+ * What the viewer needs from a resource, implemented by the GLResource model and the lightweight GLResourceEntry.
+ */
+export interface IGLResource {
+  get(key: string): any;
+  set(key: string, value: any): any;
+  save_changes(): void;
+}
+
+/**
+ * A resource without a widget model, created when the python side uses lightweight handles.
+ * If the handle is displayed later, the GLResource model takes over its state.
+ */
+export class GLResourceEntry implements IGLResource {
+  constructor(uid: number) {
+    this.attributes = {uid: uid, _gl_ptr: null, _info: {type: 'not set'}};
+  }
+
+  get(key: string) {
+    return this.attributes[key];
+  }
+
+  set(key: string, value: any) {
+    this.attributes[key] = value;
+  }
+
+  save_changes() {
+    // nothing to sync, the state is only sent to python if the handle is displayed
+  }
+
+  attributes: any;
+}
+
 export class GLResource extends DOMWidgetModel{
     defaults() {
       return {
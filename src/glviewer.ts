@@ -7,10 +7,76 @@ import {
 import { MODULE_NAME, MODULE_VERSION } from './version';
 
 import { m4dot, m4getColumnI, m4getColumnK, m4inverse, m4ProjectionMatrix, m4Translation, m4Transpose, m4Xrotation, m4Yrotation, vec3Add, vec3Scale } from './matrix';
-import { GLResource } from './glresource';
+import { GLResource, GLResourceEntry, IGLResource } from './glresource';
 import { buffer_to_array } from './arraybuffer';
+import { COMMAND_CODES, Op } from './commandcodes';
+import { decode_commands } from './commandencoder';
+import { encode_rows } from './imageencoding';
+import { UploadCache } from './uploadcache';
+
+// commands that only need to run once, they are not retained when a batch is sent with split_setup
+const SETUP_COMMANDS = new Set([
+  'createTexture', 'createShader', 'createProgram', 'createBuffer', 'createUniformBuffer', 'createVertexArray', 'createFramebuffer',
+  'createTextures', 'createBuffers', 'createVertexArrays',
+  'deleteTexture', 'deleteShader', 'deleteProgram', 'deleteBuffer', 'deleteVertexArray', 'deleteFramebuffer',
+  'shaderSource', 'compileShader', 'attachShader', 'bindAttribLocation', 'linkProgram',
+  'bufferData', 'copyBufferSubData', 'texImage2D', 'texImage3D', 'texStorage2D', 'texStorage3D', 'compressedTexImage2D', 'generateMipmap',
+]);
+
+// the bindings the setup commands read, they run with them, and are retained like the other commands
+const SETUP_BINDINGS = new Set([
+  'bindBuffer', 'bindBufferBase', 'bindTexture', 'activeTexture', 'bindVertexArray', 'bindFramebuffer', 'useProgram', 'pixelStorei',
+]);
+
+// the command fields that hold a resource uid (the texture of activeTexture is a unit)
+const RESOURCE_FIELDS = ['resource', 'program', 'shader', 'buffer', 'texture', 'vertex_array', 'framebuffer'];
+
+function command_uses_resource(command:any, uid:number): boolean{
+  if (command.cmd == 'activeTexture') return false;
+  if (command.hasOwnProperty('resources') && command.resources.indexOf(uid) >= 0) return true;
+  return RESOURCE_FIELDS.some((field:string)=>{return command[field] === uid;});
+}
+
+// the compressed texture extensions enabled at startup, their COMPRESSED_* constants are reported to python
+const COMPRESSED_TEXTURE_EXTENSIONS = [
+  'WEBGL_compressed_texture_s3tc',
+  'WEBGL_compressed_texture_s3tc_srgb',
+  'EXT_texture_compression_rgtc',
+  'EXT_texture_compression_bptc',
+  'WEBGL_compressed_texture_etc',
+  'WEBGL_compressed_texture_etc1',
+  'WEBGL_compressed_texture_astc',
+];
+
+// the numpy dtype and the typed array of the readPixels types, HALF_FLOAT is read as raw uint16
+const READ_PIXELS_TYPES: {[key: string]: [string, any]} = {
+  UNSIGNED_BYTE: ['uint8', Uint8Array],
+  BYTE: ['int8', Int8Array],
+  UNSIGNED_SHORT: ['uint16', Uint16Array],
+  SHORT: ['int16', Int16Array],
+  UNSIGNED_INT: ['uint32', Uint32Array],
+  INT: ['int32', Int32Array],
+  HALF_FLOAT: ['uint16', Uint16Array],
+  FLOAT: ['float32', Float32Array],
+};
+
+// a named list of retained commands, with the buffers they use
+export interface RenderPass {
+  commands: any[];
+  buffers: any[];
+  enabled: boolean;
+}
+
+// the locations of a linked program, indexed when the program is linked
+export interface ProgramLocations {
+  uniforms: Map<string, WebGLUniformLocation | null>;
+  // the uniform locations resolved from the ids sent by python (get_uniform_location)
+  uniform_ids: (WebGLUniformLocation | null)[];
+  uniform_blocks: Map<string, number>;
+  attributes: Map<string, number>;
+}
 
-function serializeImageData(array: Uint8ClampedArray) {
+function serializeImageData(array: Uint8Array | Uint8ClampedArray) {
   return new DataView(array.buffer.slice(0));
 }
 
@@ -44,9 +110,20 @@ export class GLModel extends DOMWidgetModel {
       mouse_speed:1,
       move_speed:1,
       move_keys:'wasd',
+      camera_sync_interval:0.2,
       sync_image_data:false,
+      image_data_interval:0,
+      image_data_encoding:'raw',
+      image_data_quality:0.9,
+      async_readback:false,
+      upload_cache_size:0,
       image_data: null,
       verbose:0,
+      profile:false,
+      frame_stats:{},
+      extensions:[],
+      compressed_texture_formats:[],
+      render_stats:{},
     };
   } 
 
@@ -60,6 +137,19 @@ export class GLModel extends DOMWidgetModel {
 
   initialize(attributes: any, options: any) {
     super.initialize(attributes, options);
+    this.upload_cache = new UploadCache();
+    this.waiting_resend = null;
+    this.held_messages = [];
+    this.compressed_formats = {};
+    this.render_scheduled = false;
+    this.render_dirty = false;
+    this.render_requested_at = 0;
+    this.last_render_time = -Infinity;
+    this.frame_interval = 1000 / 60;
+    this.render_stats = {frames:0, requests:0, coalesced:0, dropped:0, view_block_uploads:0, view_block_skips:0};
+    this.render_stats_timer = null;
+    this.view_block_data = null;
+    this.camera_sync_timer = null;
 
     this.canvas = document.createElement('canvas');
     this.ctx = this.canvas.getContext("webgl2", {preserveDrawingBuffer: true});
@@ -76,18 +166,47 @@ export class GLModel extends DOMWidgetModel {
 
       //extensions to activate
       gl.getExtension("EXT_color_buffer_float")
+      this.enable_compressed_textures(gl);
     }
 
     this.resizeCanvas();
     this.on_some_change(['width', 'height', 'camera_fov', 'camera_near', 'camera_far'], this.resizeCanvas, this);
-    this.on_some_change(['camera_pos', 'camera_yaw', 'camera_pitch'], this.run_commands, this);
+    this.on_some_change(['camera_pos', 'camera_yaw', 'camera_pitch'], this.request_render, this);
 
     this.on('msg:custom', this.handle_custom_messages, this);
 
+    this.upload_cache.set_budget(this.get('upload_cache_size'));
+    this.on('change:upload_cache_size', ()=>{this.upload_cache.set_budget(this.get('upload_cache_size'));}, this);
+
     this.camera_matrix = m4Translation(0,50,200);
     this.view_matrix = m4inverse(this.camera_matrix);
   }
 
+  enable_compressed_textures(gl:WebGL2RenderingContext){
+    COMPRESSED_TEXTURE_EXTENSIONS.forEach((name:string)=>{
+      const ext = gl.getExtension(name);
+      if (ext == null){
+        return;
+      }
+      for (const key in ext){
+        if (key.indexOf('COMPRESSED_') == 0){
+          this.compressed_formats[key] = (ext as any)[key];
+        }
+      }
+    });
+    this.set('extensions', gl.getSupportedExtensions() || []);
+    this.set('compressed_texture_formats', Object.keys(this.compressed_formats));
+    this.save_changes();
+  }
+
+  compressed_format(name:string) : number{
+    const format = this.compressed_formats[name];
+    if (format === undefined){
+      console.error('compressed texture format not supported by the browser : ' + name);
+    }
+    return format;
+  }
+
   resizeCanvas() {
     this.canvas.setAttribute('width', this.get('width'));
     this.canvas.setAttribute('height', this.get('height'));
@@ -95,37 +214,276 @@ export class GLModel extends DOMWidgetModel {
       this.ctx.viewport(0, 0, this.ctx.canvas.width, this.ctx.canvas.height);
     }
     this.projection_matrix = m4ProjectionMatrix(this.get('camera_fov'), this.get('width')/this.get('height'), this.get('camera_near'), this.get('camera_far'));
+    // resizing clears the canvas
+    this.request_render();
+  }
+
+  request_render(){
+    // all the triggers of a frame (messages, camera changes, ...) are coalesced in one replay per animation frame
+    this.render_stats.requests += 1;
+    if (this.render_dirty){
+      this.render_stats.coalesced += 1;
+      return;
+    }
+    this.render_dirty = true;
+    this.render_requested_at = performance.now();
+    if (!this.render_scheduled){
+      this.render_scheduled = true;
+      requestAnimationFrame((time:number)=>{
+        this.render_scheduled = false;
+        this.render_frame(time);
+      });
+    }
+  }
+
+  render_frame(time:number = performance.now()){
+    if (!this.render_dirty) return;
+    this.render_dirty = false;
+
+    // the shortest interval between two frames is the display refresh interval
+    const interval = time - this.last_render_time;
+    if (interval > 0 && interval < this.frame_interval){
+      this.frame_interval = Math.max(interval, 1000 / 240);
+    }
+    this.last_render_time = time;
+    // the display frames that went by between the request and its frame
+    const late = Math.floor((time - this.render_requested_at) / this.frame_interval) - 1;
+    if (late > 0){
+      this.render_stats.dropped += late;
+    }
+
+    this.run_commands();
+    this.render_stats.frames += 1;
+    this.sync_stats();
+  }
+
+  sync_stats(){
+    // the render and frame stats are synced at most once per second, a message per frame would slow the rendering
+    if (this.render_stats_timer != null) return;
+    this.render_stats_timer = window.setTimeout(()=>{
+      this.render_stats_timer = null;
+      this.set('render_stats', {...this.render_stats, frame_interval_ms:this.frame_interval});
+      if (this.get('profile')){
+        this.set('frame_stats', this.frame_stats);
+      }
+      this.save_changes();
+    }, 1000);
+  }
+
+  schedule_camera_sync(){
+    // the camera runs locally, python only gets the changes at the camera_sync_interval rate
+    const interval = this.get('camera_sync_interval');
+    if (interval <= 0 || this.camera_sync_timer != null) return;
+    this.camera_sync_timer = window.setTimeout(()=>{
+      this.camera_sync_timer = null;
+      this.save_changes();
+    }, interval * 1000);
+  }
+
+  flush_camera_sync(){
+    // at the end of an interaction, python gets the final camera right away
+    if (this.camera_sync_timer != null){
+      window.clearTimeout(this.camera_sync_timer);
+      this.camera_sync_timer = null;
+    }
+    this.save_changes();
   }
 
   handle_custom_messages(command: any, buffers:any) {
-    if(command.clear == true){
-      this.commands = [];
-      this.buffers = [];
+    const decode_start = performance.now();
+    if (command.hasOwnProperty('request_camera')){
+      this.flush_camera_sync();
+      this.send({
+        camera:command.request_camera,
+        camera_pos:this.get('camera_pos'),
+        camera_yaw:this.get('camera_yaw'),
+        camera_pitch:this.get('camera_pitch'),
+      }, {});
+      return;
+    }
+
+    if (command.hasOwnProperty('uniform_locations')){
+      const declared = command.uniform_locations;
+      declared.names.forEach((name:string, i:number)=>{
+        this.location_names[declared.first + i] = name;
+      });
+      return;
+    }
+
+    if (this.waiting_resend !== null && command.resend !== this.waiting_resend){
+      // keep the order, no pass is changed or captured until python sent again the message that missed the cache
+      this.held_messages.push([command, buffers]);
+      return;
+    }
+
+    if (command.hasOwnProperty('capture')){
+      this.pending_captures.push(command);
+      this.request_render();
+      return;
+    }
+
+    if (command.hasOwnProperty('request_frame')){
+      this.force_image_sync = true;
+      this.request_render();
+      return;
     }
+
+    if (command.hasOwnProperty('pass_control')){
+      this.update_passes(command.pass_control);
+      this.request_render();
+      return;
+    }
+
     let commands = command.commands;
+    if (command.hasOwnProperty('binary_commands')){
+      const binary = command.binary_commands;
+      commands = decode_commands(binary.keys, binary.names, buffers[binary.index]);
+    }
+    else{
+      // the commands are dispatched on their code, resolved once when they are received
+      commands.forEach((element:any)=>{
+        element.op = COMMAND_CODES.get(element.cmd);
+      });
+    }
+    if (command.hasOwnProperty('cache_seq')){
+      const missing = commands.some((element:any)=>{
+        return element.hasOwnProperty('buffer_metadata') && element.buffer_metadata.cached == true
+          && !this.upload_cache.has(element.buffer_metadata.hash);
+      });
+      if (missing){
+        // the cache of python does not match this one (reloaded page, ...), ask for the bytes
+        this.waiting_resend = command.cache_seq;
+        this.send({upload_cache_miss:command.cache_seq}, {});
+        return;
+      }
+      this.send({upload_cache_hit:command.cache_seq}, {});
+    }
+
+    const pass = this.get_pass(command.hasOwnProperty('pass') ? command.pass : 'default');
+    if(command.clear == true){
+      pass.commands = [];
+      pass.buffers = [];
+    }
     let converted_buffers:any[] = [];
+    // the buffers already in the upload cache are not sent, the others are sent in the commands order
+    let sent_index = 0;
     commands.forEach((element:any)=>{
       if (element.hasOwnProperty('buffer_metadata')) {
-        const converted = buffer_to_array(element.buffer_metadata.dtype, buffers[element.buffer_metadata.index].buffer);
+        const meta_data = element.buffer_metadata;
+        let converted;
+        if (meta_data.cached == true){
+          converted = this.upload_cache.get(meta_data.hash);
+        }
+        else{
+          converted = buffer_to_array(meta_data.dtype, buffers[sent_index].buffer);
+          sent_index += 1;
+          if (meta_data.hasOwnProperty('hash')){
+            this.upload_cache.add(meta_data.hash, converted);
+          }
+        }
         converted_buffers.push(converted);
       }
     });
+    this.decode_ms = performance.now() - decode_start;
 
     if(command.only_once == true){
       this.execute_commands(commands, converted_buffers);
     }
     else{
-      let buffer_id_offset = this.buffers.length;
-      this.buffers = this.buffers.concat(converted_buffers);
+      if(command.split_setup == true){
+        [commands, converted_buffers] = this.execute_setup_commands(commands, converted_buffers);
+      }
+      let buffer_id_offset = pass.buffers.length;
+      pass.buffers = pass.buffers.concat(converted_buffers);
       commands.forEach((element:any)=>{
         if (element.hasOwnProperty('buffer_metadata')) {
           element.buffer_metadata.index += buffer_id_offset;
         }
       });
-      this.commands = this.commands.concat(commands);
+      pass.commands = pass.commands.concat(commands);
     }
 
-    this.run_commands();
+    this.request_render();
+
+    if (command.hasOwnProperty('ack')){
+      // python waits for the acknowledgement before sending the next chunks
+      this.send({ack:command.ack}, {});
+    }
+
+    if (command.hasOwnProperty('resend') && command.resend === this.waiting_resend){
+      this.waiting_resend = null;
+      const held = this.held_messages;
+      this.held_messages = [];
+      held.forEach(([message, message_buffers])=>{
+        this.handle_custom_messages(message, message_buffers);
+      });
+    }
+  }
+
+  get_pass(name:string){
+    let pass = this.passes.get(name);
+    if (pass == undefined){
+      pass = {commands:[], buffers:[], enabled:true};
+      this.passes.set(name, pass);
+      this.pass_order.push(name);
+    }
+    return pass;
+  }
+
+  update_passes(control:any){
+    if (control.hasOwnProperty('order')){
+      // the passes that are not listed keep their relative order after the listed ones
+      let order:string[] = [];
+      control.order.forEach((name:string)=>{
+        this.get_pass(name);
+        if (order.indexOf(name) < 0) order.push(name);
+      });
+      this.pass_order.forEach((name:string)=>{
+        if (order.indexOf(name) < 0) order.push(name);
+      });
+      this.pass_order = order;
+    }
+    if (control.hasOwnProperty('enabled')){
+      for (const name in control.enabled){
+        this.get_pass(name).enabled = control.enabled[name];
+      }
+    }
+    if (control.hasOwnProperty('remove')){
+      control.remove.forEach((name:string)=>{
+        this.passes.delete(name);
+        this.pass_order = this.pass_order.filter((element:string)=>{return element != name});
+      });
+    }
+  }
+
+  execute_setup_commands(commands:any[], converted_buffers:any[]): [any[], any[]]{
+    if (this.ctx != null){
+      const gl:WebGL2RenderingContext = this.ctx;
+      // run the setup commands with the bindings recorded before them, the draws, clears, uniforms, ... are only
+      // run by the retained commands, or they would be executed twice on the first frame
+      let last_setup = -1;
+      commands.forEach((element:any, index:number)=>{
+        if (SETUP_COMMANDS.has(element.cmd)) last_setup = index;
+      });
+      for (let i = 0; i <= last_setup; ++i){
+        if (SETUP_COMMANDS.has(commands[i].cmd) || SETUP_BINDINGS.has(commands[i].cmd)){
+          this.execute_command(gl, commands[i], converted_buffers);
+        }
+      }
+    }
+
+    // only retain the other commands, and the buffers they use
+    let retained_commands:any[] = [];
+    let retained_buffers:any[] = [];
+    commands.forEach((element:any)=>{
+      if (SETUP_COMMANDS.has(element.cmd)) return;
+      if (element.hasOwnProperty('buffer_metadata')) {
+        retained_buffers.push(converted_buffers[element.buffer_metadata.index]);
+        element.buffer_metadata.index = retained_buffers.length - 1;
+      }
+      retained_commands.push(element);
+    });
+    return [retained_commands, retained_buffers];
   }
 
   private update_camera(){
@@ -140,10 +498,19 @@ export class GLModel extends DOMWidgetModel {
   }
 
   run_commands(){
-    this.execute_commands(this.commands, this.buffers);
+    let passes:RenderPass[] = [];
+    this.pass_order.forEach((name:string)=>{
+      const pass = this.passes.get(name);
+      if (pass != undefined && pass.enabled) passes.push(pass);
+    });
+    this.execute_passes(passes);
   }
 
   execute_commands(commands:any[], converted_buffers:any[]){
+    this.execute_passes([{commands:commands, buffers:converted_buffers, enabled:true}]);
+  }
+
+  execute_passes(passes:RenderPass[]){
     if (this.ctx == null) return;
     const gl:WebGL2RenderingContext = this.ctx;
 
@@ -159,32 +526,232 @@ export class GLModel extends DOMWidgetModel {
     let vpm = (this.get('shader_matrix_major')=='row_major')? m4Transpose(this.view_proj_matrix): this.view_proj_matrix;
     const vpm_f32 = new Float32Array(vpm);
 
-    gl.bindBuffer(gl.UNIFORM_BUFFER, this.view_block);
-    gl.bufferSubData(gl.UNIFORM_BUFFER, 0, cm_f32, 0);
-    gl.bufferSubData(gl.UNIFORM_BUFFER, 64, vm_f32, 0);
-    gl.bufferSubData(gl.UNIFORM_BUFFER, 128, pm_f32, 0);
-    gl.bufferSubData(gl.UNIFORM_BUFFER, 192, vpm_f32, 0);
-    gl.bindBuffer(gl.UNIFORM_BUFFER, null);
+    const view_block_data = new Float32Array(64);
+    view_block_data.set(cm_f32, 0);
+    view_block_data.set(vm_f32, 16);
+    view_block_data.set(pm_f32, 32);
+    view_block_data.set(vpm_f32, 48);
+    // the view block keeps its content, it is only uploaded when the matrices changed
+    const previous = this.view_block_data;
+    if (previous == null || view_block_data.some((value:number, i:number)=>{return value != previous[i];})){
+      gl.bindBuffer(gl.UNIFORM_BUFFER, this.view_block);
+      gl.bufferSubData(gl.UNIFORM_BUFFER, 0, view_block_data, 0);
+      gl.bindBuffer(gl.UNIFORM_BUFFER, null);
+      this.view_block_data = view_block_data;
+      this.render_stats.view_block_uploads += 1;
+    }
+    else{
+      this.render_stats.view_block_skips += 1;
+    }
 
-    commands.forEach((command:any)=>{
-      this.execute_command(gl, command, converted_buffers);
+    if (this.get('profile')){
+      this.execute_passes_profiled(gl, passes);
+    }
+    else{
+      passes.forEach((pass:RenderPass)=>{
+        pass.commands.forEach((command:any)=>{
+          this.execute_command(gl, command, pass.buffers);
+        });
+      });
+    }
+
+    if (this.force_image_sync){
+      this.force_image_sync = false;
+      this.last_image_sync = performance.now();
+      this.read_image_data();
+    }
+    else if (this.get('sync_image_data')){
+      this.sync_image_data();
+    }
+
+    if (this.pending_captures.length > 0){
+      const captures = this.pending_captures;
+      this.pending_captures = [];
+      captures.forEach((capture:any)=>{
+        const width = this.get('width');
+        const height = this.get('height');
+        const reply = (data:Uint8Array | Uint8ClampedArray)=>{
+          this.send({capture:capture.capture, encoding:capture.encoding, width:width, height:height}, {}, [data]);
+        };
+        if (capture.encoding == 'raw'){
+          this.read_frame(reply);
+        }
+        else{
+          this.encode_canvas(capture.encoding, capture.quality, reply);
+        }
+      });
+    }
+  }
+
+  read_image_data(){
+    const encoding = this.get('image_data_encoding');
+    if (encoding != 'rows'){
+      this.previous_frame = null;
+    }
+    if (encoding == 'raw'){
+      this.read_frame((pixels:Uint8ClampedArray)=>{this.store_image_data(pixels);});
+    }
+    else if (encoding == 'rows'){
+      this.read_frame((pixels:Uint8ClampedArray, width:number, height:number)=>{
+        const rows = encode_rows(pixels, this.previous_frame, width, height);
+        this.previous_frame = pixels;
+        this.store_image_data(rows);
+      });
+    }
+    else{
+      this.encode_canvas(encoding, this.get('image_data_quality'), (data:Uint8Array)=>{this.store_image_data(data);});
+    }
+  }
+
+  encode_canvas(encoding:string, quality:number, callback:(data:Uint8Array)=>void){
+    // the browser encodes the canvas, the image is already in the top to bottom rows order
+    this.canvas.toBlob((blob:Blob | null)=>{
+      if (blob == null){
+        console.error('could not encode the canvas as ' + encoding);
+        return;
+      }
+      blob.arrayBuffer().then((buffer:ArrayBuffer)=>{callback(new Uint8Array(buffer));});
+    }, 'image/' + encoding, quality);
+  }
+
+  sync_image_data(){
+    // a trailing sync is already scheduled, it will read the latest frame
+    if (this.image_sync_timer != null) return;
+
+    const now = performance.now();
+    const wait = this.last_image_sync + this.get('image_data_interval') * 1000 - now;
+    if (wait > 0){
+      this.image_sync_timer = window.setTimeout(()=>{
+        this.image_sync_timer = null;
+        this.sync_image_data();
+      }, wait);
+      return;
+    }
+    this.last_image_sync = now;
+    this.read_image_data();
+  }
+
+  store_image_data(pixels:Uint8Array | Uint8ClampedArray){
+    this.set('image_data', pixels);
+    this.save_changes();
+  }
+
+  read_frame(callback:(pixels:Uint8ClampedArray, width:number, height:number)=>void){
+    if (this.ctx == null) return;
+    const gl:WebGL2RenderingContext = this.ctx;
+    const width = this.get('width');
+    const height = this.get('height');
+    const size = width * height * 4;
+
+    // always read the canvas, even if the commands left a framebuffer bound
+    const read_framebuffer = gl.getParameter(gl.READ_FRAMEBUFFER_BINDING);
+    gl.bindFramebuffer(gl.READ_FRAMEBUFFER, null);
+
+    if (!this.get('async_readback')){
+      const pixels = new Uint8ClampedArray(size);
+      gl.readPixels(0, 0, width, height, gl.RGBA, gl.UNSIGNED_BYTE, pixels);
+      gl.bindFramebuffer(gl.READ_FRAMEBUFFER, read_framebuffer);
+      callback(pixels, width, height);
+      return;
+    }
+
+    // read into a pixel pack buffer, and only map it once the gpu is done, so we do not stall the pipeline
+    let pack_buffer = this.pack_buffers.pop();
+    if (pack_buffer == undefined){
+      pack_buffer = gl.createBuffer() as WebGLBuffer;
+    }
+    gl.bindBuffer(gl.PIXEL_PACK_BUFFER, pack_buffer);
+    gl.bufferData(gl.PIXEL_PACK_BUFFER, size, gl.STREAM_READ);
+    gl.readPixels(0, 0, width, height, gl.RGBA, gl.UNSIGNED_BYTE, 0);
+    gl.bindBuffer(gl.PIXEL_PACK_BUFFER, null);
+    gl.bindFramebuffer(gl.READ_FRAMEBUFFER, read_framebuffer);
+    const sync = gl.fenceSync(gl.SYNC_GPU_COMMANDS_COMPLETE, 0) as WebGLSync;
+    gl.flush();
+
+    const poll = ()=>{
+      if (gl.clientWaitSync(sync, 0, 0) == gl.TIMEOUT_EXPIRED){
+        window.setTimeout(poll, 1);
+        return;
+      }
+      gl.deleteSync(sync);
+      const pixels = new Uint8ClampedArray(size);
+      gl.bindBuffer(gl.PIXEL_PACK_BUFFER, pack_buffer as WebGLBuffer);
+      gl.getBufferSubData(gl.PIXEL_PACK_BUFFER, 0, pixels);
+      gl.bindBuffer(gl.PIXEL_PACK_BUFFER, null);
+      this.pack_buffers.push(pack_buffer as WebGLBuffer);
+      callback(pixels, width, height);
+    };
+    window.setTimeout(poll, 1);
+  }
+
+  execute_passes_profiled(gl:WebGL2RenderingContext, passes:RenderPass[]){
+    if (this.timer_ext === undefined){
+      this.timer_ext = gl.getExtension('EXT_disjoint_timer_query_webgl2');
+    }
+    // only one TIME_ELAPSED query can be active, the frame is measured as a whole
+    let query:WebGLQuery | null = null;
+    if (this.timer_ext != null){
+      query = gl.createQuery();
+      if (query != null) gl.beginQuery(this.timer_ext.TIME_ELAPSED_EXT, query);
+    }
+
+    // the cpu time of a command is the time to submit it, the gpu runs it later
+    let command_ms:any = {};
+    let command_count = 0;
+    const frame_start = performance.now();
+    passes.forEach((pass:RenderPass)=>{
+      pass.commands.forEach((command:any)=>{
+        const start = performance.now();
+        this.execute_command(gl, command, pass.buffers);
+        command_ms[command.cmd] = (command_ms[command.cmd] || 0) + performance.now() - start;
+        command_count += 1;
+      });
     });
+    const frame_ms = performance.now() - frame_start;
 
-    if (this.get('sync_image_data')){
-      const width = this.get('width');
-      const height = this.get('height');
-      const pixels = new Uint8ClampedArray( width * height * 4 );
-      gl.readPixels(
-        0,
-        0,
-        width,
-        height,
-        gl.RGBA,
-        gl.UNSIGNED_BYTE,
-        pixels,
-      );
-      this.set('image_data', pixels);
-      this.save_changes();
+    if (query != null){
+      gl.endQuery(this.timer_ext.TIME_ELAPSED_EXT);
+      this.pending_queries.push(query);
+    }
+
+    this.frame_count += 1;
+    this.frame_stats = {
+      frame: this.frame_count,
+      frame_ms: frame_ms,
+      decode_ms: this.decode_ms,
+      commands: command_count,
+      command_ms: command_ms,
+      gpu_ms: this.gpu_ms,
+    };
+    this.poll_queries();
+  }
+
+  poll_queries(){
+    if (this.ctx == null || this.pending_queries.length == 0) return;
+    const gl:WebGL2RenderingContext = this.ctx;
+    const disjoint = gl.getParameter(this.timer_ext.GPU_DISJOINT_EXT);
+    let updated = false;
+    while (this.pending_queries.length > 0){
+      const query = this.pending_queries[0];
+      if (!disjoint && !gl.getQueryParameter(query, gl.QUERY_RESULT_AVAILABLE)) break;
+      if (!disjoint){
+        this.gpu_ms = gl.getQueryParameter(query, gl.QUERY_RESULT) / 1e6;
+        updated = true;
+      }
+      gl.deleteQuery(query);
+      this.pending_queries.shift();
+    }
+    if (updated){
+      this.frame_stats = {...this.frame_stats, gpu_ms: this.gpu_ms};
+      this.sync_stats();
+    }
+    if (this.pending_queries.length > 0 && !this.poll_scheduled){
+      // the result of the last frame is only available later
+      this.poll_scheduled = true;
+      requestAnimationFrame(()=>{
+        this.poll_scheduled = false;
+        this.poll_queries();
+      });
     }
   }
 
@@ -209,12 +776,12 @@ export class GLModel extends DOMWidgetModel {
     }
     
     //console.log(this.bound_buffers);
-    switch(command.cmd){
-      case 'viewport':
+    switch(command.op){
+      case Op.viewport:
           gl.viewport(command.x, command.y, command.width, command.height);
         break;
-      case 'enable':
-      case 'disable':
+      case Op.enable:
+      case Op.disable:
         {
           let cap = 0;
           if (command.blend) cap |= gl.BLEND;
@@ -227,17 +794,17 @@ export class GLModel extends DOMWidgetModel {
           if (command.stencil_test) cap |= gl.STENCIL_TEST;
           if (command.rasterizer_discard) cap |= gl.RASTERIZER_DISCARD;
           if (command.cull_face) cap |= gl.CULL_FACE;
-          if (command.cmd == 'enable'){
+          if (command.op == Op.enable){
             gl.enable(cap);
           } else{
             gl.disable(cap);
           }
         }
         break;
-      case 'clearColor':
+      case Op.clearColor:
           gl.clearColor(command.r, command.g, command.b, command.a);
         break;
-      case 'clear':{
+      case Op.clear:{
         let bits = 0;
         if (command.depth) bits |= gl.DEPTH_BUFFER_BIT;
         if (command.color) bits |= gl.COLOR_BUFFER_BIT;
@@ -245,56 +812,66 @@ export class GLModel extends DOMWidgetModel {
         gl.clear(bits);
       }
       break;
-      case 'frontFace':{
+      case Op.frontFace:{
         gl.frontFace((gl as any)[command.mode]);
       }
       break;
-      case 'cullFace':{
+      case Op.cullFace:{
         gl.cullFace((gl as any)[command.mode]);
       }
       break;
 
       // ------------------------------- DEPTH --------------------------------------
-      case 'depthFunc':{
+      case Op.depthFunc:{
         gl.depthFunc((gl as any)[command.func]);
       }
       break;
-      case 'depthMask':{
+      case Op.depthMask:{
         gl.depthMask(command.flag);
       }
       break;
-      case 'depthRange':{
+      case Op.depthRange:{
         gl.depthRange(command.z_near, command.z_far);
       }
       break;
 
       // ------------------------------- COLOR --------------------------------------
-      case 'blendColor':
+      case Op.blendColor:
           gl.blendColor(command.r, command.g, command.b, command.a);
         break;
-      case 'blendEquation':
+      case Op.blendEquation:
         gl.blendEquation((gl as any)[command.mode]);
         break;
-      case 'blendEquationSeparate':
+      case Op.blendEquationSeparate:
           gl.blendEquationSeparate((gl as any)[command.mode_rgb], (gl as any)[command.mode_alpha]);
           break;
-      case 'blendFunc':
+      case Op.blendFunc:
           gl.blendFunc((gl as any)[command.s_factor], (gl as any)[command.d_factor])
       break;
-      case 'blend_func_separate':
+      case Op.blendFuncSeparate:
          gl.blendFuncSeparate((gl as any)[command.src_rgb], (gl as any)[command.dst_rgb], (gl as any)[command.src_alpha], (gl as any)[command.dst_alpha])
         break;
         
       // ------------------------------- TEXTURE --------------------------------------
-      case 'createTexture':{
-        let res = this.get_resource(command.resource);
+      case Op.createTextures:
+      case Op.createBuffers:
+      case Op.createVertexArrays:{
+        // a batch of resources created by one command, each one is created like the single command
+        const cmd = command.cmd.slice(0, -1);
+        command.resources.forEach((uid:number)=>{
+          this.execute_command(gl, {cmd:cmd, op:COMMAND_CODES.get(cmd), resource:uid}, converted_buffers);
+        });
+      }
+      break;
+      case Op.createTexture:{
+        let res = this.create_resource(command.resource);
         const ptr = gl.createTexture();
         res.set('_gl_ptr', ptr);
         res.set('_info', {type:'texture'});
         res.save_changes();
       }
       break;
-      case 'bindTexture':{
+      case Op.bindTexture:{
         if (command.texture > -1){
           const texture = this.get_resource(command.texture).get('_gl_ptr');
           gl.bindTexture((gl as any)[command.target], texture);
@@ -304,13 +881,13 @@ export class GLModel extends DOMWidgetModel {
         }
       }
       break;
-      case 'activeTexture':
+      case Op.activeTexture:
         gl.activeTexture(gl.TEXTURE0 + command.texture);
       break;
-      case 'generateMipmap':
+      case Op.generateMipmap:
         gl.generateMipmap((gl as any)[command.target]);
       break;
-      case 'texImage2D':
+      case Op.texImage2D:
         if (command.hasOwnProperty('buffer_metadata')){
           gl.texImage2D(
             (gl as any)[command.target],
@@ -338,7 +915,66 @@ export class GLModel extends DOMWidgetModel {
           )
         }
       break;
-      case 'texStorage2D':{
+      case Op.compressedTexImage2D:{
+        const format = this.compressed_format(command.internal_format);
+        if (format !== undefined){
+          gl.compressedTexImage2D(
+            (gl as any)[command.target],
+            command.level,
+            format,
+            command.width,
+            command.height,
+            0,
+            converted_buffers[command.buffer_metadata.index]
+          );
+        }
+      }
+      break;
+      case Op.compressedTexSubImage2D:{
+        const format = this.compressed_format(command.format);
+        if (format !== undefined){
+          gl.compressedTexSubImage2D(
+            (gl as any)[command.target],
+            command.level,
+            command.xoffset,
+            command.yoffset,
+            command.width,
+            command.height,
+            format,
+            converted_buffers[command.buffer_metadata.index]
+          );
+        }
+      }
+      break;
+      case Op.texSubImage2D:
+        gl.texSubImage2D(
+          (gl as any)[command.target],
+          command.level,
+          command.xoffset,
+          command.yoffset,
+          command.width,
+          command.height,
+          (gl as any)[command.format],
+          (gl as any)[command.data_type],
+          converted_buffers[command.buffer_metadata.index]
+        );
+      break;
+      case Op.texSubImage3D:
+        gl.texSubImage3D(
+          (gl as any)[command.target],
+          command.level,
+          command.xoffset,
+          command.yoffset,
+          command.zoffset,
+          command.width,
+          command.height,
+          command.depth,
+          (gl as any)[command.format],
+          (gl as any)[command.data_type],
+          converted_buffers[command.buffer_metadata.index]
+        );
+      break;
+      case Op.texStorage2D:{
         gl.texStorage2D(
           (gl as any)[command.target],
           command.levels,
@@ -348,7 +984,7 @@ export class GLModel extends DOMWidgetModel {
         );
       }
       break;
-      case 'texImage3D':
+      case Op.texImage3D:
         if (command.hasOwnProperty('buffer_metadata')){
           gl.texImage3D(
             (gl as any)[command.target],
@@ -377,7 +1013,7 @@ export class GLModel extends DOMWidgetModel {
           )
         }
       break;
-      case 'texStorage3D':{
+      case Op.texStorage3D:{
         gl.texStorage3D(
           (gl as any)[command.target],
           command.levels,
@@ -388,16 +1024,16 @@ export class GLModel extends DOMWidgetModel {
         );
       }
       break;
-      case 'texParameteri':
+      case Op.texParameteri:
         gl.texParameteri((gl as any)[command.target], (gl as any)[command.pname], command.param);
       break;
-      case 'texParameterf':
+      case Op.texParameterf:
         gl.texParameterf((gl as any)[command.target], (gl as any)[command.pname], command.param);
       break;
-      case 'texParameter_str':
+      case Op.texParameterStr:
         gl.texParameteri((gl as any)[command.target], (gl as any)[command.pname], (gl as any)[command.param]);
       break;
-      case 'pixelStorei':{
+      case Op.pixelStorei:{
         if (command.pname == 'UNPACK_COLORSPACE_CONVERSION_WEBGL'){
           gl.pixelStorei((gl as any)[command.pname], (gl as any)[command.param]);
         }
@@ -407,21 +1043,21 @@ export class GLModel extends DOMWidgetModel {
       }
       break;
       // ------------------------------- SHADERS --------------------------------------
-      case 'createShader':{
-        let res = this.get_resource(command.resource);
+      case Op.createShader:{
+        let res = this.create_resource(command.resource);
         const ptr = gl.createShader((gl as any)[command.type]);
         res.set('_gl_ptr', ptr);
         res.set('_info', {type:command.type});
         res.save_changes();
       }
       break;
-      case 'shaderSource':{
+      case Op.shaderSource:{
         const res = this.get_resource(command.shader);
           const ptr = res.get('_gl_ptr');
           gl.shaderSource(ptr, command.source);
         }
         break;
-      case 'compileShader':{
+      case Op.compileShader:{
           const res = this.get_resource(command.shader);
           const ptr = res.get('_gl_ptr');
           gl.compileShader(ptr);
@@ -439,33 +1075,34 @@ export class GLModel extends DOMWidgetModel {
         }
         break;
       // ------------------------------- PROGRAMS --------------------------------------
-      case 'createProgram':{
-          let res = this.get_resource(command.resource);
+      case Op.createProgram:{
+          let res = this.create_resource(command.resource);
           const ptr = gl.createProgram();
           res.set('_gl_ptr', ptr);
           res.set('_info', {type:'Program'});
           res.save_changes();
         }
         break;
-      case 'attachShader':{
+      case Op.attachShader:{
           const prog = this.get_resource(command.program).get('_gl_ptr');
           const shader = this.get_resource(command.shader).get('_gl_ptr');
           gl.attachShader(prog, shader);
         }
         break;
-      case 'bindAttribLocation':{
+      case Op.bindAttribLocation:{
           let res = this.get_resource(command.program);
           const ptr = res.get('_gl_ptr');
           gl.bindAttribLocation(ptr, command.index, command.name);
         }
         break;
-      case 'linkProgram':{
+      case Op.linkProgram:{
           let res = this.get_resource(command.program);
           const ptr = res.get('_gl_ptr');
           gl.linkProgram(ptr);
           gl.validateProgram(ptr);
           let resinfo = res.get('_info');
 
+          this.program_locations.delete(command.program);
           if ( !gl.getProgramParameter( ptr, gl.LINK_STATUS) ) {
             let info = gl.getShaderInfoLog( ptr );
             resinfo.message = info;
@@ -513,103 +1150,121 @@ export class GLModel extends DOMWidgetModel {
               if (info)
                 resinfo.attributes.push({name:info.name, type:this.glEnumToString(gl, info.type), size:info.size, location:gl.getAttribLocation(ptr, info.name)});
             }
+
+            // index the locations by name, so the uniforms and attributes commands do not search the info
+            let locations:ProgramLocations = {uniforms:new Map(), uniform_ids:[], uniform_blocks:new Map(), attributes:new Map()};
+            resinfo.uniforms.forEach((element:any)=>{
+              locations.uniforms.set(element.name, element.location);
+              // arrays are reported as name[0], they can also be set with their name only
+              if (element.name.endsWith('[0]')){
+                locations.uniforms.set(element.name.slice(0, -3), element.location);
+              }
+            });
+            resinfo.uniforms_blocks.forEach((element:any)=>{
+              locations.uniform_blocks.set(element.name, element.index);
+            });
+            resinfo.attributes.forEach((element:any)=>{
+              locations.attributes.set(element.name, element.location);
+            });
+            this.program_locations.set(command.program, locations);
+          }
+          if (this.bound_program === res){
+            this.bound_locations = this.program_locations.get(command.program) || null;
           }
           res.set('_info', resinfo);
           res.save_changes();
         }
         break;
-      case 'useProgram':{
+      case Op.useProgram:{
           if(command.program >= 0){
             const res = this.get_resource(command.program);
             const ptr = res.get('_gl_ptr');
             gl.useProgram(ptr);
             this.bound_program = res;
+            this.bound_locations = this.program_locations.get(command.program) || null;
           } else {
             gl.useProgram(null);
             this.bound_program = null;
+            this.bound_locations = null;
           }
         }
         break;
-      case 'uniform':
-      case 'uniformMatrix':
+      case Op.uniform:
+      case Op.uniformMatrix:
         {
-          if(this.bound_program != null){
-            let resinfo = this.bound_program.get('_info');
-            const uniform = resinfo.uniforms.find((element:any)=>{return element.name == command.name});
-            if (uniform != undefined){
-              const location = uniform.location;
-
-              if (command.cmd == 'uniform'){
-                let shape = command.buffer_metadata.shape[command.buffer_metadata.shape.length-1];
-                if (command.buffer_metadata.dtype == 'int32'){
-                  let bufarray:Int32Array = converted_buffers[command.buffer_metadata.index] as Int32Array;
-                  if (shape == 1) gl.uniform1iv(location, bufarray);
-                  else if (shape == 2) gl.uniform2iv(location, bufarray);
-                  else if (shape == 3) gl.uniform3iv(location, bufarray);
-                  else if (shape == 4) gl.uniform4iv(location, bufarray);
-                }
-                else if (command.buffer_metadata.dtype == 'uint32'){
-                  let bufarray:Uint32Array = converted_buffers[command.buffer_metadata.index] as Uint32Array;
-                  if (shape == 1) gl.uniform1uiv(location, bufarray);
-                  else if (shape == 2) gl.uniform2uiv(location, bufarray);
-                  else if (shape == 3) gl.uniform3uiv(location, bufarray);
-                  else if (shape == 4) gl.uniform4uiv(location, bufarray);
-                }
-                else if (command.buffer_metadata.dtype == 'float32'){
-                  let bufarray:Float32Array = converted_buffers[command.buffer_metadata.index] as Float32Array;
-                  if (shape == 1) gl.uniform1fv(location, bufarray);
-                  else if (shape == 2) gl.uniform2fv(location, bufarray);
-                  else if (shape == 3) gl.uniform3fv(location, bufarray);
-                  else if (shape == 4) gl.uniform4fv(location, bufarray);
-                }
+          const location = this.get_uniform_location(command);
+          if (location != null){
+            if (command.op == Op.uniform){
+              let shape = command.buffer_metadata.shape[command.buffer_metadata.shape.length-1];
+              if (command.buffer_metadata.dtype == 'int32'){
+                let bufarray:Int32Array = converted_buffers[command.buffer_metadata.index] as Int32Array;
+                if (shape == 1) gl.uniform1iv(location, bufarray);
+                else if (shape == 2) gl.uniform2iv(location, bufarray);
+                else if (shape == 3) gl.uniform3iv(location, bufarray);
+                else if (shape == 4) gl.uniform4iv(location, bufarray);
               }
-
-              else {
-                let a = command.buffer_metadata.shape[command.buffer_metadata.shape.length-2];
-                let b = command.buffer_metadata.shape[command.buffer_metadata.shape.length-1];
+              else if (command.buffer_metadata.dtype == 'uint32'){
+                let bufarray:Uint32Array = converted_buffers[command.buffer_metadata.index] as Uint32Array;
+                if (shape == 1) gl.uniform1uiv(location, bufarray);
+                else if (shape == 2) gl.uniform2uiv(location, bufarray);
+                else if (shape == 3) gl.uniform3uiv(location, bufarray);
+                else if (shape == 4) gl.uniform4uiv(location, bufarray);
+              }
+              else if (command.buffer_metadata.dtype == 'float32'){
                 let bufarray:Float32Array = converted_buffers[command.buffer_metadata.index] as Float32Array;
-                if (a==2)
-                {
-                  if (b==2) gl.uniformMatrix2fv(location, false, bufarray);
-                  else if (b==3) gl.uniformMatrix2x3fv(location, false, bufarray);
-                  else if (b==4)gl.uniformMatrix2x4fv(location, false, bufarray);
-                }
-                else if (a==3)
-                {
-                  if (b==2) gl.uniformMatrix3x2fv(location, false, bufarray);
-                  else if (b==3) gl.uniformMatrix3fv(location, false, bufarray);
-                  else if (b==4)gl.uniformMatrix3x4fv(location, false, bufarray);
-                }
-                else if (a==4)
-                {
-                  if (b==2) gl.uniformMatrix4x2fv(location, false, bufarray);
-                  else if (b==3) gl.uniformMatrix4x3fv(location, false, bufarray);
-                  else if (b==4)gl.uniformMatrix4fv(location, false, bufarray);
-                }
+                if (shape == 1) gl.uniform1fv(location, bufarray);
+                else if (shape == 2) gl.uniform2fv(location, bufarray);
+                else if (shape == 3) gl.uniform3fv(location, bufarray);
+                else if (shape == 4) gl.uniform4fv(location, bufarray);
+              }
+            }
+
+            else {
+              let a = command.buffer_metadata.shape[command.buffer_metadata.shape.length-2];
+              let b = command.buffer_metadata.shape[command.buffer_metadata.shape.length-1];
+              let bufarray:Float32Array = converted_buffers[command.buffer_metadata.index] as Float32Array;
+              if (a==2)
+              {
+                if (b==2) gl.uniformMatrix2fv(location, false, bufarray);
+                else if (b==3) gl.uniformMatrix2x3fv(location, false, bufarray);
+                else if (b==4)gl.uniformMatrix2x4fv(location, false, bufarray);
+              }
+              else if (a==3)
+              {
+                if (b==2) gl.uniformMatrix3x2fv(location, false, bufarray);
+                else if (b==3) gl.uniformMatrix3fv(location, false, bufarray);
+                else if (b==4)gl.uniformMatrix3x4fv(location, false, bufarray);
+              }
+              else if (a==4)
+              {
+                if (b==2) gl.uniformMatrix4x2fv(location, false, bufarray);
+                else if (b==3) gl.uniformMatrix4x3fv(location, false, bufarray);
+                else if (b==4)gl.uniformMatrix4fv(location, false, bufarray);
               }
             }
           }
         }
       break;
-      case 'uniformBlockBinding':{
+      case Op.uniformBlockBinding:{
         let res = this.get_resource(command.program);
         const ptr = res.get('_gl_ptr');
-        const uniformblock = res.get('_info').uniforms_blocks.find((element:any)=>{return element.name == command.uniform_block_name});
-        if (uniformblock != undefined){
-          gl.uniformBlockBinding(ptr, uniformblock.index, command.uniform_block_binding);
+        const locations = this.program_locations.get(command.program);
+        const block_index = (locations != undefined) ? locations.uniform_blocks.get(command.uniform_block_name) : undefined;
+        if (block_index != undefined){
+          gl.uniformBlockBinding(ptr, block_index, command.uniform_block_binding);
         }
       }
       break;
       // ------------------------------- BUFFERS --------------------------------------
-      case 'createBuffer':{
-          let res = this.get_resource(command.resource);
+      case Op.createBuffer:{
+          let res = this.create_resource(command.resource);
           const ptr = gl.createBuffer();
           res.set('_gl_ptr', ptr);
           res.set('_info', {type:'Buffer'});
           res.save_changes();
         }
         break;
-      case 'bindBuffer':{
+      case Op.bindBuffer:{
           const target:string = command.target;
           if(command.buffer >= 0){
             const res = this.get_resource(command.buffer);
@@ -622,7 +1277,7 @@ export class GLModel extends DOMWidgetModel {
           }
         }
         break;
-      case 'bindBufferBase':{
+      case Op.bindBufferBase:{
           const target:string = command.target;
           if(command.buffer >= 0){
             const res = this.get_resource(command.buffer);
@@ -633,7 +1288,7 @@ export class GLModel extends DOMWidgetModel {
           }
         }
         break;
-      case 'bufferData':{
+      case Op.bufferData:{
           const target:string = command.target;
           const usage:string = command.usage;
 
@@ -647,6 +1302,14 @@ export class GLModel extends DOMWidgetModel {
               buf.save_changes();
             }
           }
+          else if (command.hasOwnProperty('size')){
+            let buf = (this.bound_buffers as any)[target];
+            gl.bufferData((gl as any)[target], command.size, (gl as any)[usage]);
+            if (command.update_info && buf != null){
+              buf.set('_info', {type:"Buffer", size:command.size, target:target});
+              buf.save_changes();
+            }
+          }
           else{
             let buf = (this.bound_buffers as any)[target];
             gl.bufferData((gl as any)[target], null, (gl as any)[usage]);
@@ -657,8 +1320,12 @@ export class GLModel extends DOMWidgetModel {
           }
         }
         break;
-      case 'createUniformBuffer':{
-          let res = this.get_resource(command.buffer);
+      case Op.copyBufferSubData:{
+          gl.copyBufferSubData((gl as any)[command.read_target], (gl as any)[command.write_target], command.read_offset, command.write_offset, command.size);
+        }
+        break;
+      case Op.createUniformBuffer:{
+          let res = this.create_resource(command.buffer);
           const ptr = gl.createBuffer();
 
           let info = {type:'Buffer'};
@@ -678,11 +1345,11 @@ export class GLModel extends DOMWidgetModel {
           res.save_changes();
         }
         break;
-      case 'bufferSubData':
-      case 'bufferSubDataStr':{
+      case Op.bufferSubData:
+      case Op.bufferSubDataStr:{
           const target:string = command.target;
           let offset = command.dst_byte_offset;
-          if (command.cmd == 'bufferSubDataStr'){
+          if (command.op == Op.bufferSubDataStr){
             offset = 0;
             let buf = (this.bound_buffers as any)[target];
             if (buf != null){
@@ -703,15 +1370,15 @@ export class GLModel extends DOMWidgetModel {
         }
         break;
       // ------------------------------- VERTEX ARRAYS --------------------------------------
-      case 'createVertexArray':{
-          let res = this.get_resource(command.resource);
+      case Op.createVertexArray:{
+          let res = this.create_resource(command.resource);
           const ptr = gl.createVertexArray();
           res.set('_gl_ptr', ptr);
           res.set('_info', {type:'Vertex Array Object', bindings:[]});
           res.save_changes();
         }
         break;
-      case 'bindVertexArray':{
+      case Op.bindVertexArray:{
           if(command.vertex_array >= 0){
             const res = this.get_resource(command.vertex_array);
             const ptr = res.get('_gl_ptr');
@@ -723,13 +1390,13 @@ export class GLModel extends DOMWidgetModel {
           }
         }
         break;
-      case 'vertexAttribPointer':
-      case 'vertexAttribIPointer':
-      case 'enableVertexAttribArray':
-      case 'disableVertexAttribArray':
-      case 'vertexAttrib[1234]fv':
-      case 'vertexAttribI4[u]iv':
-      case 'vertexAttribDivisor':
+      case Op.vertexAttribPointer:
+      case Op.vertexAttribIPointer:
+      case Op.enableVertexAttribArray:
+      case Op.disableVertexAttribArray:
+      case Op.vertexAttrib1234fv:
+      case Op.vertexAttribI4uiv:
+      case Op.vertexAttribDivisor:
         {
           let index = -1;
           if (typeof command.index === 'number'){
@@ -737,9 +1404,9 @@ export class GLModel extends DOMWidgetModel {
           }
           else{
             if (this.bound_program != null){
-              const attr = this.bound_program.get('_info').attributes.find((element:any)=>{return element.name == command.index});
-              if (attr != undefined){
-                index = attr.location;
+              const location = (this.bound_locations != null) ? this.bound_locations.attributes.get(command.index) : undefined;
+              if (location != undefined){
+                index = location;
               }
             }else{
               console.error("a program must be bound to find the attribute");
@@ -748,7 +1415,7 @@ export class GLModel extends DOMWidgetModel {
           let buf = (this.bound_buffers as any)['ARRAY_BUFFER'];
           if (index >= 0){
             index += command.index_offset
-            if (command.cmd == "vertexAttribIPointer"){
+            if (command.op == Op.vertexAttribIPointer){
               gl.vertexAttribIPointer(index, command.size, (gl as any)[command.type], command.stride, command.offset);
               if (this.bound_vao != null && buf != null){
                 let vao_info = this.bound_vao.get('_info');
@@ -763,7 +1430,7 @@ export class GLModel extends DOMWidgetModel {
                 this.bound_vao.save_changes();
               }
             }
-            else if (command.cmd == "vertexAttribPointer"){
+            else if (command.op == Op.vertexAttribPointer){
               gl.vertexAttribPointer(index, command.size, (gl as any)[command.type], command.normalized, command.stride, command.offset);
               if (this.bound_vao != null && buf != null){
                 let vao_info = this.bound_vao.get('_info');
@@ -778,13 +1445,13 @@ export class GLModel extends DOMWidgetModel {
                 this.bound_vao.save_changes();
               }
             }
-            else if (command.cmd == "enableVertexAttribArray"){
+            else if (command.op == Op.enableVertexAttribArray){
               gl.enableVertexAttribArray(index);
             }
-            else if (command.cmd == "disableVertexAttribArray"){
+            else if (command.op == Op.disableVertexAttribArray){
               gl.disableVertexAttribArray(index);
             }
-            else if (command.cmd == "vertexAttrib[1234]fv"){
+            else if (command.op == Op.vertexAttrib1234fv){
               if (command.buffer_metadata.shape[0] == 1){
                 gl.vertexAttrib1fv(index, converted_buffers[command.buffer_metadata.index]);
               } else if (command.buffer_metadata.shape[0] == 2){
@@ -795,14 +1462,14 @@ export class GLModel extends DOMWidgetModel {
                 gl.vertexAttrib4fv(index, converted_buffers[command.buffer_metadata.index]);
               }
             }
-            else if (command.cmd == "vertexAttribI4[u]iv"){
+            else if (command.op == Op.vertexAttribI4uiv){
               if(command.buffer_metadata.dtype == "uint32"){
                 gl.vertexAttribI4uiv(index, converted_buffers[command.buffer_metadata.index]);
               } else if(command.buffer_metadata.dtype == "int32"){
                 gl.vertexAttribI4iv(index, converted_buffers[command.buffer_metadata.index]);
               }
             }
-            else if (command.cmd == "vertexAttribDivisor"){
+            else if (command.op == Op.vertexAttribDivisor){
               gl.vertexAttribDivisor(index, command.divisor);
             }
           }
@@ -813,33 +1480,56 @@ export class GLModel extends DOMWidgetModel {
         break;
 
         // ------------------------------- RENDER --------------------------------------
-        case 'drawArrays':{
+        case Op.drawArrays:{
           gl.drawArrays((gl as any)[command.mode], command.first, command.count);
         }
         break;
-        case 'drawArraysInstanced':{
+        case Op.drawArraysInstanced:{
           gl.drawArraysInstanced((gl as any)[command.mode], command.first, command.count, command.instance_count);
         }
         break;
-        case 'drawElements':{
+        case Op.drawElements:{
           gl.drawElements((gl as any)[command.mode], command.count, (gl as any)[command.type], command.offset);
         }
         break;
-        case 'drawElementsInstanced':{
+        case Op.drawElementsInstanced:{
           gl.drawElementsInstanced((gl as any)[command.mode], command.count, (gl as any)[command.type], command.offset, command.instance_count);
         }
         break;
 
+        // ------------------------------- DELETE --------------------------------------
+        case Op.deleteTexture:
+        case Op.deleteShader:
+        case Op.deleteProgram:
+        case Op.deleteBuffer:
+        case Op.deleteVertexArray:
+        case Op.deleteFramebuffer:{
+          const res = this.get_resource(command.resource);
+          if (res != undefined){
+            const ptr = res.get('_gl_ptr');
+            switch(command.op){
+              case Op.deleteTexture: gl.deleteTexture(ptr); break;
+              case Op.deleteShader: gl.deleteShader(ptr); break;
+              case Op.deleteProgram: gl.deleteProgram(ptr); break;
+              case Op.deleteBuffer: gl.deleteBuffer(ptr); break;
+              case Op.deleteVertexArray: gl.deleteVertexArray(ptr); break;
+              case Op.deleteFramebuffer: gl.deleteFramebuffer(ptr); break;
+            }
+            this.release_resource(command.resource);
+          }
+        }
+        break;
+
         // ------------------------------- FRAMEBUFFER --------------------------------------
-        case 'createFramebuffer':{
-          let res = this.get_resource(command.resource);
+        case Op.createFramebuffer:{
+          let res = this.create_resource(command.resource);
           const ptr = gl.createFramebuffer();
           res.set('_gl_ptr', ptr);
           res.set('_info', {type:'Framebuffer'});
           res.save_changes();
         }
         break;
-        case 'bindFramebuffer':{
+        case Op.bindFramebuffer:{
           if (command.framebuffer >= 0){
             let res = this.get_resource(command.framebuffer);
             gl.bindFramebuffer((gl as any)[command.target], res.get('_gl_ptr'));
@@ -849,41 +1539,177 @@ export class GLModel extends DOMWidgetModel {
           }
         }
         break;
-        case 'framebufferTexture2D':{
+        case Op.framebufferTexture2D:{
           let res = this.get_resource(command.texture);
           gl.framebufferTexture2D((gl as any)[command.target], (gl as any)[command.attachement], (gl as any)[command.textarget], res.get('_gl_ptr'), command.level);
         }
         break;
-        case 'drawBuffers' :{
+        case Op.drawBuffers:{
           const buffers = command.buffers.map((element:any)=>{return (gl as any)[element]; });
           gl.drawBuffers(buffers);
         }
         break;
+        case Op.readPixels:{
+          // a request is only answered once, even if the command is retained
+          if (command.request == null) break;
+          const request = command.request;
+          command.request = null;
+
+          const read_framebuffer = gl.getParameter(gl.READ_FRAMEBUFFER_BINDING);
+          const framebuffer = (command.framebuffer >= 0) ? this.get_resource(command.framebuffer).get('_gl_ptr') : null;
+          gl.bindFramebuffer(gl.READ_FRAMEBUFFER, framebuffer);
+          // the read buffer is a state of the framebuffer, it is restored before binding the previous one again
+          const read_buffer = gl.getParameter(gl.READ_BUFFER);
+          if (command.read_buffer != null){
+            gl.readBuffer((gl as any)[command.read_buffer]);
+          }
+          const [dtype, array_type] = READ_PIXELS_TYPES[command.type];
+          const pixels = new array_type(command.width * command.height * command.components);
+          // the rows are packed in the array, whatever the alignment set with pixelStorei
+          const pack_alignment = gl.getParameter(gl.PACK_ALIGNMENT);
+          gl.pixelStorei(gl.PACK_ALIGNMENT, 1);
+          gl.readPixels(command.x, command.y, command.width, command.height, (gl as any)[command.format], (gl as any)[command.type], pixels);
+          gl.pixelStorei(gl.PACK_ALIGNMENT, pack_alignment);
+          if (command.read_buffer != null){
+            gl.readBuffer(read_buffer);
+          }
+          gl.bindFramebuffer(gl.READ_FRAMEBUFFER, read_framebuffer);
+          this.send({
+            read_pixels:request,
+            type:command.type,
+            dtype:dtype,
+            shape:[command.height, command.width, command.components]
+          }, {}, [pixels]);
+        }
+        break;
         
     }
   }
 
   register_resource(resource:GLResource){
-    if(resource.get('uid') != this.resources.length){
+    const uid = resource.get('uid');
+    const entry = this.resources[uid];
+    if (entry instanceof GLResourceEntry){
+      // a lightweight resource is displayed, the widget takes over its state
+      resource.set('_gl_ptr', entry.get('_gl_ptr'));
+      resource.set('_info', entry.get('_info'));
+      resource.save_changes();
+    }
+    else if(entry != undefined || uid > this.resources.length){
       console.error('uid not matching what we have internally');
     }
-    this.resources.push(resource);
+    this.resources[uid] = resource;
+  }
+
+  get_uniform_location(command:any): WebGLUniformLocation | null {
+    const locations = this.bound_locations;
+    if (locations == null) return null;
+    if (command.hasOwnProperty('location')){
+      // the id was resolved once in python, the location is resolved once per program
+      let location = locations.uniform_ids[command.location];
+      if (location === undefined){
+        const name = this.location_names[command.location];
+        location = locations.uniforms.get(name) || null;
+        locations.uniform_ids[command.location] = location;
+      }
+      return location;
+    }
+    return locations.uniforms.get(command.name) || null;
+  }
+
+  release_resource(uid:number){
+    const res = this.resources[uid];
+    this.drop_passes_using(uid);
+    this.program_locations.delete(uid);
+    if (this.bound_program === res){
+      this.bound_program = null;
+      this.bound_locations = null;
+    }
+    if (this.bound_vao === res) this.bound_vao = null;
+    for (const target in this.bound_buffers){
+      if ((this.bound_buffers as any)[target] === res){
+        (this.bound_buffers as any)[target] = null;
+      }
+    }
+
+    // the uid will be reused by python, we keep the array as short as the used uids
+    delete this.resources[uid];
+    while (this.resources.length > 0 && this.resources[this.resources.length-1] == undefined){
+      this.resources.pop();
+    }
+  }
+
+  create_resource(uid:number){
+    // lightweight resources have no widget model registering itself, so we create their entry here
+    let res = this.resources[uid];
+    if (res == undefined){
+      res = new GLResourceEntry(uid);
+      this.resources[uid] = res;
+    }
+    return res;
   }
 
-  get_resource(index:number){
-    return this.resources[index];
+  get_resource(index:number): IGLResource{
+    const res = this.resources[index];
+    if (res == undefined){
+      // a deleted (or never created) resource, it is used as a null GL object instead of breaking the commands
+      console.error(`the resource ${index} does not exist, it was deleted or never created`);
+      return new GLResourceEntry(index);
+    }
+    return res;
+  }
+
+  drop_passes_using(uid:number){
+    // a retained pass that uses a deleted resource would fail on every replay, or use the next resource created with the uid
+    this.passes.forEach((pass:RenderPass, name:string)=>{
+      if (pass.commands.some((command:any)=>{return command_uses_resource(command, uid);})){
+        console.warn(`the render pass ${name} uses the deleted resource ${uid}, its commands are dropped`);
+        pass.commands = [];
+        pass.buffers = [];
+      }
+    });
   }
 
   canvas: HTMLCanvasElement;
   ctx: WebGL2RenderingContext | null;
   view_block: WebGLBuffer | null;
 
-  resources : GLResource[] = [];
-  bound_program: GLResource | null;
+  resources : IGLResource[] = [];
+  bound_program: IGLResource | null;
+  bound_locations: ProgramLocations | null = null;
+  program_locations = new Map<number, ProgramLocations>();
+  location_names: string[] = [];
   bound_buffers = {};
-  bound_vao: GLResource | null;
-  commands : any[] = [];
-  buffers : any[] = [];
+  bound_vao: IGLResource | null;
+  passes = new Map<string, RenderPass>();
+  // created in initialize, the field initializers only run after it
+  upload_cache: UploadCache;
+  waiting_resend: number | null;
+  held_messages: [any, any][];
+  compressed_formats: {[key: string]: number};
+  render_scheduled: boolean;
+  render_dirty: boolean;
+  render_requested_at: number;
+  last_render_time: number;
+  frame_interval: number;
+  render_stats: any;
+  render_stats_timer: number | null;
+  view_block_data: Float32Array | null;
+  camera_sync_timer: number | null;
+  decode_ms = 0;
+  frame_count = 0;
+  frame_stats:any = {};
+  gpu_ms: number | null = null;
+  timer_ext: any;
+  pending_queries: WebGLQuery[] = [];
+  poll_scheduled = false;
+  last_image_sync = -Infinity;
+  image_sync_timer: number | null = null;
+  force_image_sync = false;
+  pending_captures: any[] = [];
+  previous_frame: Uint8ClampedArray | null = null;
+  pack_buffers: WebGLBuffer[] = [];
+  pass_order : string[] = [];
 
   projection_matrix:number[];
   camera_matrix:number[];
@@ -949,13 +1775,13 @@ export class GLViewer extends DOMWidgetView {
         camera_pos = vec3Add(camera_pos, vec3Scale(side_axis, speed));
       }
       this.model.set('camera_pos', camera_pos);
-      this.touch();
+      this.model.schedule_camera_sync();
       // request a new frame if we are moving
       this.requestRedraw();
     }
 
-    // re draw
-    this.model.run_commands();
+    // re draw, the frame the model scheduled for the camera change is rendered now
+    this.model.render_frame();
   }
 
   private requestRedraw(){
@@ -971,7 +1797,7 @@ export class GLViewer extends DOMWidgetView {
       let speed = this.model.get('mouse_speed');
       this.model.set('camera_yaw', this.model.get('camera_yaw')-(event.movementX)*0.2*speed);
       this.model.set('camera_pitch', this.model.get('camera_pitch')-(event.movementY)*0.2*speed);
-      this.touch();
+      this.model.schedule_camera_sync();
       this.requestRedraw();
     }
   }
@@ -982,10 +1808,16 @@ export class GLViewer extends DOMWidgetView {
   }
 
   private onMouseUp(event: MouseEvent) {
+    if (this.is_mouse_down){
+      this.model.flush_camera_sync();
+    }
     this.is_mouse_down = false;
   }
 
   private onMouseOut(event: MouseEvent) {
+    if (this.is_mouse_down || this.move_direction.indexOf(true) >= 0){
+      this.model.flush_camera_sync();
+    }
     this.is_mouse_down = false;
     this.move_direction = [false, false, false, false];
   }
@@ -1034,6 +1866,13 @@ export class GLViewer extends DOMWidgetView {
     else if(event.key == keys[3]){
       this.move_direction[3] = false;
     }
+    else{
+      return;
+    }
+
+    if (this.move_direction.indexOf(true) < 0){
+      this.model.flush_camera_sync();
+    }
   }
 
   protected getCoordinates(event: MouseEvent | Touch) {
@@ -0,0 +1,55 @@
+/**
+ * Encode only the runs of rows that changed since the previous frame, it is decoded by decode_rows in python.
+ * All the rows are sent when there is no previous frame of the same size.
+ *
+ * Layout (little endian u32):
+ *   width, height, run count, then for each run the first row and the row count, then the pixels of all the runs
+ */
+export function encode_rows(pixels: Uint8ClampedArray, previous: Uint8ClampedArray | null, width: number, height: number): Uint8Array {
+  const row_size = width * 4;
+  // pairs of first row, row count
+  const runs: number[] = [];
+  if (previous == null || previous.length != pixels.length) {
+    runs.push(0, height);
+  } else {
+    // compare the pixels as u32, 4 times less comparisons than the bytes
+    const current = new Uint32Array(pixels.buffer, pixels.byteOffset, pixels.length / 4);
+    const last = new Uint32Array(previous.buffer, previous.byteOffset, previous.length / 4);
+    let start = -1;
+    for (let row = 0; row < height; ++row) {
+      let changed = false;
+      for (let i = row * width, end = i + width; i < end; ++i) {
+        if (current[i] !== last[i]) {
+          changed = true;
+          break;
+        }
+      }
+      if (changed) {
+        if (start < 0) start = row;
+      } else if (start >= 0) {
+        runs.push(start, row - start);
+        start = -1;
+      }
+    }
+    if (start >= 0) runs.push(start, height - start);
+  }
+
+  const header_size = 12 + runs.length * 4;
+  let size = header_size;
+  for (let i = 1; i < runs.length; i += 2) {
+    size += runs[i] * row_size;
+  }
+  const out = new Uint8Array(size);
+  const header = new DataView(out.buffer);
+  header.setUint32(0, width, true);
+  header.setUint32(4, height, true);
+  header.setUint32(8, runs.length / 2, true);
+  let offset = header_size;
+  for (let i = 0; i < runs.length; i += 2) {
+    header.setUint32(12 + i * 4, runs[i], true);
+    header.setUint32(16 + i * 4, runs[i + 1], true);
+    out.set(pixels.subarray(runs[i] * row_size, (runs[i] + runs[i + 1]) * row_size), offset);
+    offset += runs[i + 1] * row_size;
+  }
+  return out;
+}
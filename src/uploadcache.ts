@@ -0,0 +1,46 @@
+/**
+ * A LRU cache of the converted upload buffers, keyed by their content hash.
+ * Python mirrors it (ipywebgl/uploadcache.py), the messages that use it are confirmed,
+ * and sent again with their bytes when a cached upload is missing.
+ */
+export class UploadCache {
+  // a Map iterates in insertion order, the first entry is the least recently used
+  entries = new Map<string, any>();
+  size = 0;
+  budget = 0;
+
+  has(hash: string): boolean {
+    return this.entries.has(hash);
+  }
+
+  get(hash: string): any {
+    const array = this.entries.get(hash);
+    if (array !== undefined) {
+      this.entries.delete(hash);
+      this.entries.set(hash, array);
+    }
+    return array;
+  }
+
+  add(hash: string, array: any) {
+    if (this.get(hash) !== undefined || array.byteLength > this.budget) {
+      return;
+    }
+    this.entries.set(hash, array);
+    this.size += array.byteLength;
+    this.evict();
+  }
+
+  set_budget(budget: number) {
+    this.budget = budget;
+    this.evict();
+  }
+
+  private evict() {
+    while (this.size > this.budget) {
+      const [hash, array] = this.entries.entries().next().value;
+      this.entries.delete(hash);
+      this.size -= array.byteLength;
+    }
+  }
+}